@@ -0,0 +1,78 @@
+"""Benchmark for slash command autocomplete on a large guild.
+
+Builds the member name index for a guild with 100k+ members and measures
+prefix lookup latency (p50/p99), incremental updates, and the full
+autocomplete callback.
+
+Usage:
+    python -m benchmarks.bench_autocomplete [--members 150000]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+from types import SimpleNamespace
+
+from bot.names import GuildNameIndex, member_names
+from bot.slash import autocomplete_players
+
+GUILD_ID = 1
+SYLLABLES = ["ma", "ri", "jo", "ão", "pe", "dro", "lu", "ca", "na", "bi", "ga", "el", "th", "xX", "_", "Ó"]
+
+
+def _random_name(rng: random.Random) -> str:
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+    if rng.random() < 0.3:
+        name += " " + "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(3, 8)))
+    return name.capitalize()
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def _timed(func, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        func(value)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return _percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=150_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    members = [(i, _random_name(rng)) for i in range(args.members)]
+
+    started = time.perf_counter()
+    index = GuildNameIndex(members)
+    print(f"{args.members} members indexed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    member_names._guilds[GUILD_ID] = index
+
+    prefixes = [_random_name(rng)[:rng.randint(0, 4)] for _ in range(args.queries)]
+    p50, p99 = _timed(lambda prefix: index.search(prefix, 25), prefixes)
+    print(f"search:        p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+    renames = [(rng.randrange(args.members), _random_name(rng)) for _ in range(args.queries // 10)]
+    p50, p99 = _timed(lambda rename: index.add(*rename), renames)
+    print(f"rename:        p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+    interaction = SimpleNamespace(guild_id=GUILD_ID)
+    loop = asyncio.new_event_loop()
+    texts = [f"{members[rng.randrange(args.members)][1]}, {prefix}" for prefix in prefixes]
+    p50, p99 = _timed(lambda text: loop.run_until_complete(autocomplete_players(interaction, text)), texts)
+    print(f"autocomplete:  p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Benchmark for the weighted team-partition solver.
+
+Times `find_balanced_split` and `rank_splits` on random weighted lobbies
+with anti-panela groups. The 10-player case (252 splits) is the largest one
+the bot runs: extra players go to the waitlist.
+
+Usage:
+    python -m benchmarks.bench_balancer
+"""
+
+import random
+import time
+
+from bot.balancer import find_balanced_split, rank_splits
+
+
+def _random_lobby(rng: random.Random, size: int, group_count: int):
+    weights = [rng.randint(1, 10) for _ in range(size)]
+    players = list(range(size))
+    rng.shuffle(players)
+    groups = [players[i * 3:i * 3 + 3] for i in range(group_count)]
+    return weights, groups
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'players':>7} {'groups':>6} {'solver':>19} {'mean (ms)':>10} {'max (ms)':>9}")
+    for size, group_count in [(4, 0), (8, 2), (10, 0), (10, 2), (10, 3)]:
+        lobbies = [_random_lobby(rng, size, group_count) for _ in range(100)]
+        for solver in (find_balanced_split, rank_splits):
+            # Warm up caches (combination masks) like a long-running bot would
+            solver(lobbies[0][0], (size + 1) // 2, lobbies[0][1], rng)
+
+            timings = []
+            for weights, groups in lobbies:
+                start = time.perf_counter()
+                solver(weights, (size + 1) // 2, groups, rng)
+                timings.append(time.perf_counter() - start)
+
+            print(
+                f"{size:>7} {group_count:>6} {solver.__name__:>19} "
+                f"{sum(timings) / len(timings) * 1e3:>10.3f} {max(timings) * 1e3:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark for fuzzy name resolution on a large guild.
+
+Builds the trigram index for a guild with many members, then times
+`parse_roster` with and without the resolver on `!mix` rosters mixing exact
+names, unaccented names, typos, prefixes and unknown names.
+
+Usage:
+    python -m benchmarks.bench_fuzzy [--members 150000]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+
+from bot.fuzzy import fold_accents, fuzzy_names
+from bot.utils import parse_roster
+
+from .fakes import FakeGuild, FakeMember, FakeMessage
+
+FIRST_NAMES = [
+    "João", "Maria", "Pedro", "Ana", "Lucas", "Júlia", "Gabriel", "Beatriz", "Mateus", "Larissa", "Rafael",
+    "Camila", "Gustavo", "Letícia", "Felipe", "Fernanda", "Thiago", "Bruna", "Vinícius", "Amanda", "André",
+    "Mariana", "Rodrigo", "Isabela", "Diego", "Carolina", "Caio", "Natália", "Leonardo", "Patrícia", "Igor",
+    "Sofia", "Otávio", "Luíza", "Bruno", "Vitória", "Renan", "Helena", "Murilo", "Alícia",
+]
+TAGS = ["", "", "", "gamer", "xX", "_br", "tv", "ttv", "fps", "op"]
+
+
+def _random_name(rng: random.Random) -> str:
+    """A Discord-like display name: first name plus a nickname, tag or number."""
+    name = rng.choice(FIRST_NAMES)
+    kind = rng.randrange(4)
+    if kind == 0:
+        name += " " + "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8))).capitalize()
+    elif kind == 1:
+        name += str(rng.randrange(10_000))
+    elif kind == 2:
+        name = rng.choice(TAGS) + name + rng.choice(TAGS)
+    return name
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(len(name))
+    return name[:i] + rng.choice("aeiou") + name[i + 1:]
+
+
+def _roster(names, rng: random.Random):
+    """Return a roster text and, per token, the member name it refers to (None if unknown)."""
+    tokens = []
+    intended = []
+    for name in rng.sample(names, 10):
+        intended.append(name)
+        kind = rng.randrange(5)
+        if kind == 1:
+            name = fold_accents(name)
+        elif kind == 2:
+            name = _typo(name, rng)
+        elif kind == 3:
+            name = name[:max(3, len(name) - 1)]
+        elif kind == 4:
+            name = f"Desconhecido{rng.randrange(1000)}"
+            intended[-1] = None
+        tokens.append(name)
+    return ", ".join(tokens), intended
+
+
+def _timed(func, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        func(value)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=150_000)
+    parser.add_argument("--rosters", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    names = [_random_name(rng) for _ in range(args.members)]
+    guild = FakeGuild([FakeMember(name) for name in names])
+    guild_names = set(names)
+    message = FakeMessage("!mix", guild=guild)
+
+    started = time.perf_counter()
+    index = asyncio.run(fuzzy_names.index(guild))
+    print(f"{args.members} members indexed in {(time.perf_counter() - started):.2f}s (in a worker thread)")
+
+    # Names with spaces can't be typed as one `!mix` token
+    typeable = [name for name in names if " " not in name]
+    rosters, intended = zip(*(_roster(typeable, rng) for _ in range(args.rosters)))
+    p50, p99 = _timed(lambda text: parse_roster(text, message), rosters)
+    print(f"parse_roster:           p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+    p50, p99 = _timed(lambda text: parse_roster(text, message, resolve_name=index.resolver()), rosters)
+    print(f"parse_roster + fuzzy:   p50 {p50:8.1f} us   p99 {p99:8.1f} us")
+
+    correct = wrong = total = 0
+    for text, names_meant in zip(rosters, intended):
+        players = parse_roster(text, message, resolve_name=index.resolver()).players
+        for player, meant in zip(players, names_meant):
+            if meant is None:
+                continue
+            total += 1
+            if player == meant:
+                correct += 1
+            elif player in guild_names:
+                wrong += 1
+    print(f"typed member names resolved correctly: {correct / total:.0%}, to the wrong member: {wrong / total:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Compare the "full" and "lean" gateway profiles on a simulated large guild.
+
+Builds a real discord.py connection state for each profile and feeds it the
+traffic Discord would send for that profile's intents: the GUILD_CREATE
+payload, the member chunks (only for the members intent), presence updates,
+typing events, voice state churn and messages. Reports how many events
+reach the process, how long it takes to parse them and how much memory the
+member cache holds afterwards.
+
+Usage:
+    python -m benchmarks.bench_gateway_profile [members]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import discord
+from discord.state import ChunkRequest
+
+from bot.client import gateway_options
+
+GUILD_ID = 1
+VOICE_CHANNEL_ID = 10
+TEXT_CHANNEL_ID = 11
+CHUNK_SIZE = 1000
+
+# Simulated traffic for one hour in the guild
+PRESENCE_UPDATES = 50_000
+TYPING_EVENTS = 20_000
+VOICE_UPDATES = 2_000
+MESSAGES = 5_000
+VOICE_MEMBERS = 40
+
+
+def _user(user_id: int) -> dict:
+    return {
+        "id": str(user_id), "username": f"user{user_id}", "discriminator": "0",
+        "global_name": f"Jogador {user_id}", "avatar": None,
+    }
+
+
+def _member(user_id: int) -> dict:
+    return {
+        "user": _user(user_id), "nick": None, "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False, "mute": False, "flags": 0,
+    }
+
+
+def _voice_state(user_id: int, channel_id) -> dict:
+    return {
+        "guild_id": str(GUILD_ID), "channel_id": channel_id and str(channel_id), "user_id": str(user_id),
+        "member": _member(user_id), "session_id": "x", "deaf": False, "mute": False,
+        "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False,
+    }
+
+
+def _guild_create(member_count: int, intents: discord.Intents) -> dict:
+    voice_ids = range(100, 100 + VOICE_MEMBERS)
+    payload = {
+        "id": str(GUILD_ID), "name": "Perna", "member_count": member_count, "large": True,
+        "features": [], "emojis": [], "stickers": [], "threads": [], "stage_instances": [],
+        "guild_scheduled_events": [], "soundboard_sounds": [],
+        "roles": [{
+            "id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0,
+            "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0,
+        }],
+        "channels": [
+            {
+                "id": str(VOICE_CHANNEL_ID), "type": 2, "name": "Mix", "position": 0, "permission_overwrites": [],
+                "bitrate": 64000, "user_limit": 0,
+            },
+            {"id": str(TEXT_CHANNEL_ID), "type": 0, "name": "geral", "position": 1, "permission_overwrites": []},
+        ],
+        # Large guilds only ship the members in voice (and the bot itself)
+        "members": [_member(i) for i in voice_ids],
+        "voice_states": [_voice_state(i, VOICE_CHANNEL_ID) for i in voice_ids] if intents.voice_states else [],
+        "presences": [],
+    }
+    return payload
+
+
+def _simulate(profile: str, member_count: int) -> dict:
+    options = gateway_options(profile)
+    intents = options["intents"]
+    client = discord.Client(**options)
+    state = client._connection
+    state.dispatch = lambda *args, **kwargs: None
+    state.user = discord.ClientUser(state=state, data={**_user(1), "bot": True})
+
+    events = 0
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    state._add_guild_from_data(_guild_create(member_count, intents))
+    events += 1
+
+    if intents.members:
+        # The full profile requests every member right after startup, in the
+        # background (`PernaBot._fill_member_cache`): same request as `guild.chunk()`
+        request = ChunkRequest(GUILD_ID, 0, None, state._get_guild, cache=True)
+        state._chunk_requests[request.nonce] = request
+        for offset in range(0, member_count, CHUNK_SIZE):
+            state.parsers["GUILD_MEMBERS_CHUNK"]({
+                "guild_id": str(GUILD_ID), "nonce": request.nonce,
+                "members": [_member(i) for i in range(1000 + offset, 1000 + min(offset + CHUNK_SIZE, member_count))],
+                "chunk_index": offset // CHUNK_SIZE, "chunk_count": -(-member_count // CHUNK_SIZE),
+            })
+            events += 1
+
+    if intents.presences:
+        for i in range(PRESENCE_UPDATES):
+            state.parsers["PRESENCE_UPDATE"]({
+                "user": {"id": str(1000 + i % member_count)}, "guild_id": str(GUILD_ID),
+                "status": "online", "activities": [], "client_status": {"desktop": "online"},
+            })
+            events += 1
+
+    if intents.typing:
+        for i in range(TYPING_EVENTS):
+            user_id = 1000 + i % member_count
+            state.parsers["TYPING_START"]({
+                "channel_id": str(TEXT_CHANNEL_ID), "guild_id": str(GUILD_ID), "user_id": str(user_id),
+                "timestamp": 0, "member": _member(user_id),
+            })
+            events += 1
+
+    if intents.voice_states:
+        for i in range(VOICE_UPDATES):
+            user_id = 1000 + i % member_count
+            channel = VOICE_CHANNEL_ID if i % 2 == 0 else None
+            state.parsers["VOICE_STATE_UPDATE"](_voice_state(user_id, channel))
+            events += 1
+
+    if intents.guild_messages:
+        # Message parsing costs the same in both profiles: count only
+        events += MESSAGES
+
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    guild = state._get_guild(GUILD_ID)
+    return {
+        "events": events,
+        "parse_s": elapsed,
+        "memory_mb": memory / 1e6,
+        "cached_members": len(guild._members),
+    }
+
+
+def main():
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"Simulated guild with {member_count} members (one hour of traffic)")
+    print(f"{'profile':>8} {'events':>8} {'parse (s)':>10} {'memory (MB)':>12} {'members cached':>15}")
+    for profile in ("full", "lean"):
+        result = _simulate(profile, member_count)
+        print(
+            f"{profile:>8} {result['events']:>8} {result['parse_s']:>10.2f} "
+            f"{result['memory_mb']:>12.1f} {result['cached_members']:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main()
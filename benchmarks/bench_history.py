@@ -0,0 +1,73 @@
+"""Benchmark for the teammate history: loading a guild's pair matrix and scoring splits.
+
+Fills a temporary store with accepted matches drawn from a pool of regulars,
+then times a cold load of the pair matrix, scoring candidate splits and
+`create_team_message` with the history penalty.
+
+Usage:
+    python -m benchmarks.bench_history [--matches 50000] [--pool 80]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bot.history import TeammateHistory
+from bot.utils import create_team_message
+
+GUILD_ID = 1
+
+
+def _fill(history: TeammateHistory, matches: int, pool: list):
+    batch = []
+    for _ in range(matches):
+        players = random.sample(pool, 10)
+        batch.append((players[:5], players[5:]))
+        if len(batch) == 1000:
+            history.record_many(GUILD_ID, batch)
+            batch = []
+    if batch:
+        history.record_many(GUILD_ID, batch)
+
+
+def _time(func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=50_000)
+    parser.add_argument("--pool", type=int, default=80, help="Distinct players in the guild")
+    args = parser.parse_args()
+
+    pool = [f"Jogador{i}" for i in range(args.pool)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        started = time.perf_counter()
+        _fill(TeammateHistory(path), args.matches, pool)
+        print(f"stored {args.matches} matches in {time.perf_counter() - started:.2f}s")
+
+        def load():
+            return TeammateHistory(path).matrix(GUILD_ID)
+
+        matrix = load()
+        print(f"pair matrix: {len(matrix)} pairs")
+        print(f"cold load:                   {_time(load, 20):8.3f} ms")
+
+        candidates = [random.sample(pool, 10) for _ in range(1000)]
+        print(f"score 1000 splits:           "
+              f"{_time(lambda: [matrix.split_penalty(c[:5], c[5:]) for c in candidates], 20):8.3f} ms")
+
+        players = random.sample(pool, 12)
+        print(f"create_team_message:         {_time(lambda: create_team_message(players), 1000):8.3f} ms")
+        print(f"create_team_message+history: "
+              f"{_time(lambda: create_team_message(players, history=matrix), 1000):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
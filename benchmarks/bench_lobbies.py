@@ -0,0 +1,59 @@
+"""Benchmark for `!salas`: wall-clock time to move a full voice channel into lobbies.
+
+Builds a fake guild with one crowded voice channel and enough empty target
+channels, simulating per-request latency and Discord's member-move rate limit
+(429 with Retry-After), and moves everyone with different pool sizes.
+
+Usage:
+    python -m benchmarks.bench_lobbies [--players 30] [--latency 0.08] [--rate-limit 10]
+"""
+
+import argparse
+import asyncio
+
+from bot.commands import handle_lobby_command
+from bot.lobbies import VoiceMover, lobby_targets, plan_lobbies, plan_moves
+from bot.utils import scan_voice_channel_members
+
+from .fakes import FakeMessage, make_voice_guild
+
+
+async def _run(players: int, latency: float, rate_limit: int, concurrency: int):
+    lobbies = max(1, players // 10)
+    guild = make_voice_guild([players] + [0] * (lobbies * 2), bot_ratio=0.0, move_latency=latency,
+                             move_rate_limit=rate_limit)
+    source = guild.voice_channels[0]
+    plan = plan_lobbies(scan_voice_channel_members(source))
+    targets = lobby_targets(source)
+    report = await VoiceMover(concurrency=concurrency).move_all(plan_moves(plan, source.members, targets))
+    return report, guild.rate_limited_moves
+
+
+async def _end_to_end(players: int, latency: float, rate_limit: int):
+    guild = make_voice_guild([players] + [0] * (max(1, players // 10) * 2), bot_ratio=0.0,
+                             move_latency=latency, move_rate_limit=rate_limit)
+    author = guild.voice_channels[0].members[0]
+    message = FakeMessage("!salas", author=author, guild=guild)
+    await handle_lobby_command(message, "")
+    return message.channel.sent[-1]["content"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.08, help="Seconds per move request")
+    parser.add_argument("--rate-limit", type=int, default=10, help="Moves allowed per second")
+    args = parser.parse_args()
+
+    print(f"{args.players} players, {args.latency * 1000:.0f} ms per move, {args.rate_limit} moves/s")
+    print(f"{'pool':>6} {'moved':>6} {'failed':>7} {'429s':>6} {'retries':>8} {'wall clock':>12}")
+    for concurrency in (1, 2, 5, 10):
+        report, limited = asyncio.run(_run(args.players, args.latency, args.rate_limit, concurrency))
+        print(f"{concurrency:>6} {report.moved:>6} {len(report.failed):>7} {limited:>6} {report.retries:>8} "
+              f"{report.elapsed:>11.2f}s")
+
+    print(asyncio.run(_end_to_end(args.players, args.latency, args.rate_limit)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark for logging overhead on the calling (event loop) thread.
+
+Compares the previous setup (`basicConfig` stream handler, f-string
+messages) with the queued JSON mode (lazy %-formatting, formatting and I/O
+on a listener thread), plus a sampled noisy logger. Output goes to a temp
+file so terminal speed doesn't skew the numbers.
+
+Usage:
+    python -m benchmarks.bench_logging [--records 100000]
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+
+from bot.logs import setup_logging
+
+EXTRA = {"guild": 776249840938123286, "channel": 1132852398654754866, "command": "!mix", "latency_ms": 1.23}
+
+
+def _per_record(func, records: int) -> float:
+    started = time.perf_counter()
+    for i in range(records):
+        func(i)
+    return (time.perf_counter() - started) / records * 1e6
+
+
+class _SlowStream:
+    """Stream whose writes block, like stderr piped to a slow log collector."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def write(self, text: str):
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def _scenario(mode: str, stream, emit, records: int, sampling: str = ""):
+    listener = setup_logging(mode, sampling=sampling, stream=stream)
+    caller = _per_record(emit, records)
+    started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    return caller, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bot.bench")
+    gateway = logging.getLogger("discord.gateway")
+
+    def eager(i):
+        logger.info(f"[COMMAND] !mix took {i / 1000:.1f} ms in guild {EXTRA['guild']}")
+
+    def lazy(i):
+        logger.info("[COMMAND] %s took %.1f ms", "!mix", i / 1000, extra=EXTRA)
+
+    def heartbeat(i):
+        gateway.info("Shard ID %s has sent the HEARTBEAT payload.", None)
+
+    print(f"{'scenario':<46} {'caller':>12} {'drain':>8}")
+    with tempfile.TemporaryFile("w") as output:
+        sinks = [("file", output, args.records), ("slow sink (0.2 ms/write)", _SlowStream(0.0002), args.records // 10)]
+        for sink_name, stream, records in sinks:
+            for name, mode, emit, sampling in (
+                ("plain, f-string", "plain", eager, ""),
+                ("json queue, lazy", "json", lazy, ""),
+                ("json queue, gateway sampled at 10%", "json", heartbeat, "discord.gateway=0.1"),
+            ):
+                caller, drain = _scenario(mode, stream, emit, records, sampling)
+                print(f"{sink_name + ': ' + name:<46} {caller:>7.2f} us/rec {drain:>7.2f}s")
+
+    setup_logging("plain")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark for the rating pipeline: Elo updates per second.
+
+Times applying results in memory, recording them through the write-behind
+`RatingBook` (including the final flush) and the bulk backfill path.
+
+Usage:
+    python -m benchmarks.bench_ratings [--results 100000] [--pool 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from bot.ratings import MatchResult, RatingBook, RatingStore, apply_results, backfill
+
+GUILD_ID = 1
+
+
+def _results(count: int, pool: list):
+    results = []
+    for _ in range(count):
+        players = random.sample(pool, 10)
+        results.append(MatchResult(players[:5], players[5:]))
+    return results
+
+
+def _report(name: str, count: int, elapsed: float):
+    print(f"{name:<32} {count / elapsed:>12,.0f} updates/s ({elapsed * 1000:,.1f} ms)")
+
+
+async def _write_behind(path: str, results, batch: int):
+    book = RatingBook(RatingStore(path), flush_interval=3600)
+    started = time.perf_counter()
+    for i in range(0, len(results), batch):
+        await book.record(GUILD_ID, results[i:i + batch])
+    applied = time.perf_counter() - started
+    await book.close()
+    return applied, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=100_000)
+    parser.add_argument("--pool", type=int, default=200, help="Distinct players")
+    args = parser.parse_args()
+
+    pool = [f"Jogador{i}" for i in range(args.pool)]
+    results = _results(args.results, pool)
+
+    started = time.perf_counter()
+    apply_results({}, results)
+    _report("apply_results (memory)", len(results), time.perf_counter() - started)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for batch in (1, 100):
+            path = os.path.join(directory, f"write_behind_{batch}.sqlite3")
+            applied, total = asyncio.run(_write_behind(path, results, batch))
+            _report(f"record, batch={batch} (loop)", len(results), applied)
+            _report(f"record, batch={batch} (+flush)", len(results), total)
+
+        started = time.perf_counter()
+        backfill(RatingStore(os.path.join(directory, "backfill.sqlite3")), GUILD_ID, results)
+        _report("backfill", len(results), time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark for `!report` ingestion: reports per second and event loop blocking.
+
+Floods a `ReportQueue` with reports (many reporters, a few targets, so part
+of them are repeats and get dropped), in bursts that yield to the loop
+between them, and times the submit path, the slowest single burst and how
+long until every report is on disk. A naive write + fsync per report on the
+event loop is timed for comparison.
+
+Usage:
+    python -m benchmarks.bench_reports [--reports 100000] [--burst 50] [--targets 20] [--reporters 500]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from bot.reports import Report, ReportLog, ReportQueue
+
+GUILD_ID = 1
+CHANNEL_ID = 10
+
+# Reports written one fsync at a time by the naive baseline
+BASELINE_REPORTS = 2_000
+
+
+def _reports(count: int, targets: int, reporters: int):
+    now = time.time()
+    reports = []
+    for i in range(count):
+        reporter = random.randrange(reporters)
+        reports.append(Report(
+            GUILD_ID, CHANNEL_ID, reporter, f"Reporter{reporter}", f"Toxico{random.randrange(targets)}",
+            f"https://discord.com/channels/{GUILD_ID}/{CHANNEL_ID}/{i}", now + i * 1e-4,
+        ))
+    return reports
+
+
+async def _flood(path: str, reports, burst: int):
+    # Unbounded here: the flood is far faster than Discord could deliver reports
+    queue = ReportQueue(ReportLog(path), flush_interval=0.05, maxsize=len(reports))
+    bursts = []
+    queued = 0
+    started = time.perf_counter()
+    for i in range(0, len(reports), burst):
+        burst_started = time.perf_counter()
+        for report in reports[i:i + burst]:
+            queued += queue.submit(report)
+        bursts.append(time.perf_counter() - burst_started)
+        await asyncio.sleep(0)
+    submitted = time.perf_counter() - started
+    while queue.written < queued:
+        await asyncio.sleep(0.001)
+    durable = time.perf_counter() - started
+    await queue.close()
+    bursts.sort()
+    return queued, submitted, durable, bursts[len(bursts) // 2], bursts[int(len(bursts) * 0.99)], queue.log.fsyncs
+
+
+def _naive(path: str, reports):
+    log = ReportLog(path)
+    worst = 0.0
+    started = time.perf_counter()
+    for report in reports:
+        report_started = time.perf_counter()
+        log.append([report])
+        worst = max(worst, time.perf_counter() - report_started)
+    elapsed = time.perf_counter() - started
+    log.close()
+    return elapsed, worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=100_000)
+    parser.add_argument("--burst", type=int, default=50, help="Reports submitted between loop yields")
+    parser.add_argument("--targets", type=int, default=20, help="Distinct reported players")
+    parser.add_argument("--reporters", type=int, default=500, help="Distinct reporters")
+    args = parser.parse_args()
+
+    reports = _reports(args.reports, args.targets, args.reporters)
+    with tempfile.TemporaryDirectory() as directory:
+        queued, submitted, durable, median, p99, fsyncs = asyncio.run(
+            _flood(os.path.join(directory, "queue.jsonl"), reports, args.burst))
+        print(f"{'write-behind queue':<20} {len(reports) / submitted:>12,.0f} reports/s submitted, "
+              f"{queued:,} kept ({len(reports) - queued:,} repeats dropped)")
+        print(f"{'':<20} {durable * 1000:>12,.1f} ms until durable, {fsyncs} fsync(s), "
+              f"burst of {args.burst}: p50 {median * 1e6:,.0f} us, p99 {p99 * 1e6:,.0f} us")
+
+        baseline = reports[:BASELINE_REPORTS]
+        elapsed, worst = _naive(os.path.join(directory, "naive.jsonl"), baseline)
+        print(f"{'write + fsync each':<20} {len(baseline) / elapsed:>12,.0f} reports/s on the loop, "
+              f"slowest report: {worst * 1e6:,.0f} us")
+
+
+if __name__ == "__main__":
+    main()
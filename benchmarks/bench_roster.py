@@ -0,0 +1,61 @@
+"""Benchmark for the single-pass roster tokenizer.
+
+Shows that `parse_roster` scales linearly with the size of a pasted roster
+and with the number of mentions in it.
+
+Usage:
+    python -m benchmarks.bench_roster
+"""
+
+import random
+import time
+
+from bot.utils import parse_roster
+
+from .fakes import FakeGuild, FakeMember, FakeMessage
+
+
+def _fake_message(mention_count: int) -> FakeMessage:
+    members = [FakeMember(f"Membro{i}", member_id=1000 + i) for i in range(mention_count)]
+    return FakeMessage("", guild=FakeGuild(members), mentions=members)
+
+
+def _build_roster(name_count: int, mention_count: int, group_size: int = 3) -> str:
+    tokens = [f"Jogador{i}" for i in range(name_count)]
+    tokens += [f"<@{1000 + i}>" for i in range(mention_count)]
+    random.shuffle(tokens)
+
+    chunks = []
+    for i in range(0, len(tokens), group_size * 4):
+        block = tokens[i:i + group_size * 4]
+        chunks.append("(" + ", ".join(block[:group_size]) + ")")
+        chunks.append(" - ".join(block[group_size:]))
+    return "\n".join(chunks)
+
+
+def _time(text: str, message, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse_roster(text, message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    random.seed(42)
+    print(f"{'names':>6} {'mentions':>8} {'chars':>7} {'best (us)':>10} {'ns/char':>8}")
+    for name_count, mention_count in [
+        (50, 10), (100, 20), (200, 40), (400, 80), (800, 160), (1600, 320),
+    ]:
+        message = _fake_message(mention_count)
+        text = _build_roster(name_count, mention_count)
+        elapsed = _time(text, message, repeat=50)
+        print(
+            f"{name_count:>6} {mention_count:>8} {len(text):>7} "
+            f"{elapsed * 1e6:>10.1f} {elapsed * 1e9 / len(text):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
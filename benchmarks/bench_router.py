@@ -0,0 +1,68 @@
+"""Benchmark for the per-message overhead of `PernaBot.on_message`.
+
+Feeds a firehose of ordinary chat messages (plus a few commands that never
+reach a handler) through the previous if/elif chain and through the current
+table-driven router, and reports the overhead per message.
+
+Usage:
+    python -m benchmarks.bench_router
+"""
+
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from bot.client import PernaBot
+from bot.constants import HELP_COMMAND, MIX_COMMAND, REPORT_COMMAND
+
+CHAT = [
+    "bora jogar?", "kkkkkkk", "alguém online", "gg", "que time ruim", "vou entrar no discord",
+    "https://clips.twitch.tv/algumacoisa", "@everyone mix hoje às 21h", "quem vai?", "ok",
+]
+
+
+def _firehose(count: int):
+    author = SimpleNamespace(id=2)
+    messages = []
+    for i in range(count):
+        content = random.choice(CHAT) if i % 100 else "!comando_desconhecido"
+        messages.append(SimpleNamespace(content=content, author=author, channel=SimpleNamespace(id=3)))
+    return messages
+
+
+async def _legacy_on_message(bot, message):
+    """The if/elif chain `on_message` used before the router."""
+    if message.author == bot.user:
+        return
+    if message.content == HELP_COMMAND:
+        pass
+    elif message.content.startswith(REPORT_COMMAND):
+        pass
+    elif message.content.startswith(MIX_COMMAND):
+        pass
+
+
+async def _run(handler, messages) -> float:
+    start = time.perf_counter()
+    for message in messages:
+        await handler(message)
+    return time.perf_counter() - start
+
+
+async def main():
+    random.seed(42)
+    bot = PernaBot()
+    bot._connection.user = SimpleNamespace(id=1)
+    messages = _firehose(200_000)
+
+    legacy = min([await _run(lambda m: _legacy_on_message(bot, m), messages) for _ in range(3)])
+    routed = min([await _run(bot.on_message, messages) for _ in range(3)])
+
+    print(f"messages: {len(messages)}")
+    print(f"before (if/elif chain): {legacy / len(messages) * 1e9:8.1f} ns/message")
+    print(f"after  (router):        {routed / len(messages) * 1e9:8.1f} ns/message")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
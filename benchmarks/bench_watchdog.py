@@ -0,0 +1,61 @@
+"""Benchmark for the stall watchdog: per-handler overhead and stall capture.
+
+Measures the cost of `watchdog.track()` disabled and enabled, then runs a
+handler that blocks the event loop and shows the captured stack sample.
+
+Usage:
+    python -m benchmarks.bench_watchdog
+"""
+
+import asyncio
+import time
+
+from bot.metrics import LoopLagMonitor
+from bot.watchdog import StallWatchdog
+
+ITERATIONS = 200_000
+
+
+def _overhead(watchdog: StallWatchdog) -> float:
+    track = watchdog.track
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        with track("!mix", 42):
+            pass
+    return (time.perf_counter() - started) / ITERATIONS * 1e9
+
+
+def _blocking_solver(seconds: float):
+    """Stand-in for a CPU-heavy handler."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def _stall(watchdog: StallWatchdog):
+    monitor = LoopLagMonitor(watchdog.interval, on_lag=watchdog.on_lag)
+    monitor.start()
+    watchdog.start()
+    await asyncio.sleep(0.2)
+    with watchdog.track("!mix", 5000):
+        _blocking_solver(0.5)
+    await asyncio.sleep(0.2)
+    watchdog.stop()
+    monitor.stop()
+
+
+def main():
+    watchdog = StallWatchdog(threshold=0.2)
+    print(f"track() disabled: {_overhead(watchdog):6.0f} ns per handler")
+    watchdog.enabled = True
+    print(f"track() enabled:  {_overhead(watchdog):6.0f} ns per handler")
+    watchdog.enabled = False
+
+    asyncio.run(_stall(watchdog))
+    for sample in watchdog.samples:
+        print(f"\nstall of {sample.blocked_for * 1000:.0f} ms while running {sample.handlers}:")
+        print(sample.stack.rstrip().splitlines()[-2])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Run the cluster launcher locally against a stand-in gateway.
+
+Each simulated worker "connects" its shards, owns the guilds Discord would
+route to them (``(guild_id >> 22) % shard_count``) and reports health like a
+real worker. Cluster 0 crashes once after a few seconds to exercise the
+per-cluster restart. The launcher's aggregated /healthz and /metrics are
+fetched at the end.
+
+Usage:
+    python -m benchmarks.cluster_sim [guilds] [shards] [clusters] [seconds]
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from bot.cluster import ClusterLauncher
+from bot.metrics import Counter, registry
+
+IDENTIFY_DELAY = 0.05  # seconds per shard "connection"
+
+
+def simulated_worker(cluster_id, shard_ids, shard_count, status_queue):
+    """Stand-in for `run_cluster_worker` that never talks to Discord."""
+    guild_count = int(os.environ["PERNA_SIM_GUILDS"])
+    crash_after = float(os.environ.get("PERNA_SIM_CRASH_AFTER", "0"))
+    crashed_marker = os.environ.get("PERNA_SIM_CRASH_MARKER")
+
+    rng = random.Random(1234)
+    guild_ids = [rng.getrandbits(63) for _ in range(guild_count)]
+    owned = {shard: 0 for shard in shard_ids}
+    for guild_id in guild_ids:
+        shard = (guild_id >> 22) % shard_count
+        if shard in owned:
+            owned[shard] += 1
+
+    events = registry.register(Counter("perna_sim_events_total", "Simulated gateway events handled."))
+    started = time.monotonic()
+    ready_shards = []
+    while True:
+        if len(ready_shards) < len(shard_ids):
+            time.sleep(IDENTIFY_DELAY)
+            ready_shards.append(shard_ids[len(ready_shards)])
+        events.inc(rng.randint(0, 50))
+
+        status_queue.put({
+            "cluster": cluster_id,
+            "pid": os.getpid(),
+            "shards": shard_ids,
+            "ready": len(ready_shards) == len(shard_ids),
+            "guilds": sum(owned[s] for s in ready_shards),
+            "latency": 0.04 + rng.random() * 0.02,
+            "inflight": 0,
+            "mix_views": 0,
+            "time": time.time(),
+            "metrics": registry.collect(f'cluster="{cluster_id}"'),
+        })
+
+        crash = cluster_id == 0 and crash_after and time.monotonic() - started > crash_after
+        if crash and crashed_marker and not os.path.exists(crashed_marker):
+            open(crashed_marker, "w").close()
+            os._exit(1)
+        time.sleep(0.2)
+
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    shards = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    clusters = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 8.0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    marker = os.path.abspath(".cluster_sim_crashed")
+    if os.path.exists(marker):
+        os.remove(marker)
+    os.environ.update({
+        "PERNA_SIM_GUILDS": str(guilds),
+        "PERNA_SIM_CRASH_AFTER": "2",
+        "PERNA_SIM_CRASH_MARKER": marker,
+    })
+
+    port = int(os.environ.get("PORT", "18080"))
+    launcher = ClusterLauncher(shards, clusters, worker=simulated_worker, health_timeout=5.0, health_port=port)
+    stop_health = launcher.serve_health()
+    launcher.start()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            launcher.poll(0.5)
+        healthz_status, healthz = _get(f"http://127.0.0.1:{port}/healthz")
+        _, metrics = _get(f"http://127.0.0.1:{port}/metrics")
+    finally:
+        health = launcher.health()
+        launcher.stop(timeout=5.0)
+        stop_health()
+        if os.path.exists(marker):
+            os.remove(marker)
+
+    print(f"\n{'cluster':>7} {'shards':>9} {'alive':>6} {'ready':>6} {'guilds':>7} {'restarts':>8}")
+    for cluster in health["clusters"]:
+        shard_range = f"{cluster['shards'][0]}-{cluster['shards'][-1]}"
+        print(
+            f"{cluster['cluster']:>7} {shard_range:>9} {str(cluster['alive']):>6} "
+            f"{str(cluster.get('ready', False)):>6} {cluster.get('guilds', 0):>7} {cluster['restarts']:>8}"
+        )
+    print(f"total guilds: {health['guilds']} / {guilds}, restarts: {health['restarts']}")
+    print(f"/healthz: {healthz_status} {json.loads(healthz)['status']}")
+    print("/metrics:")
+    for line in metrics.splitlines():
+        if line.startswith(("perna_sim_events_total", "perna_cluster_")):
+            print(f"  {line}")
+
+
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+if __name__ == "__main__":
+    main()
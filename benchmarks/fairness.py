@@ -0,0 +1,310 @@
+"""Monte Carlo fairness simulator for the anti-panela team balancing.
+
+Runs randomized rosters and group layouts through one or more balancers and
+measures what players would notice:
+
+- group co-location: how often an anti-panela group is not split as evenly
+  as possible, for groups fully in play and for groups with a member on the
+  waitlist
+- seat bias: on rosters without groups, how often each roster position
+  lands on Time A or on the waitlist, against the uniform expectation
+  (max z-score; with groups, the constraint itself makes seats unequal)
+- waitlist bias: waitlist rate of grouped vs ungrouped players
+- team-size skew: distribution of |Time A| - |Time B|
+
+Every balancer sees exactly the same scenarios (each batch is generated from
+its own seed), so `--balancers legacy splits` is a side-by-side comparison.
+Outcomes are reduced to bitmasks over the roster positions (team A, waitlist)
+and tallied a batch at a time; batches can run on several processes.
+
+Usage:
+    python -m benchmarks.fairness                       # legacy vs splits, 200k rosters
+    python -m benchmarks.fairness --trials 2000000 --jobs 4
+    python -m benchmarks.fairness --balancers splits --check
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+from typing import Callable, Dict, List, Tuple
+
+from bot.splits import SplitStream
+from bot.utils import _draw_teams
+
+NAMES = [f"Jogador{i}" for i in range(64)]
+SEAT_OF = {name: i for i, name in enumerate(NAMES)}
+
+# Roster sizes and group layouts drawn for each scenario
+MIN_PLAYERS = 4
+MAX_PLAYERS = 16
+MAX_GROUPS = 3
+GROUP_SIZES = (2, 2, 3)
+
+BATCH_SIZE = 5_000
+
+# z-score above which a seat's waitlist or Time A rate counts as biased in --check
+MAX_SEAT_Z = 5.0
+
+
+def _legacy(users: List[str], groups: List[List[str]], seed: int) -> Tuple[List[str], List[str], List[str]]:
+    """`create_team_message` without history: `_draw_teams` / `balance_teams_with_groups`."""
+    random.seed(seed)
+    return _draw_teams(users, groups or None, None)
+
+
+def _splits(users: List[str], groups: List[List[str]], seed: int) -> Tuple[List[str], List[str], List[str]]:
+    """The first split of the `SplitStream` behind the mix buttons."""
+    return tuple(SplitStream(users, groups or None, seed=seed).next())
+
+
+BALANCERS: Dict[str, Callable] = {
+    "legacy": _legacy,
+    "splits": _splits,
+}
+
+
+def _scenario(rng: random.Random) -> Tuple[int, List[List[int]]]:
+    """A roster size and disjoint groups of roster positions."""
+    n = rng.randint(MIN_PLAYERS, MAX_PLAYERS)
+    seats = list(range(n))
+    rng.shuffle(seats)
+    groups = []
+    for _ in range(rng.randint(0, MAX_GROUPS)):
+        size = rng.choice(GROUP_SIZES)
+        if len(seats) < size:
+            break
+        groups.append(sorted(seats[:size]))
+        del seats[:size]
+    return n, groups
+
+
+def _mask(names: List[str]) -> int:
+    mask = 0
+    for name in names:
+        mask |= 1 << SEAT_OF[name]
+    return mask
+
+
+class FairnessStats:
+    """Tallies for one balancer, mergeable across batches."""
+
+    def __init__(self):
+        self.trials = 0
+        self.lost_players = 0
+        self.full_groups = 0
+        self.full_violations = 0
+        self.partial_groups = 0
+        self.partial_violations = 0
+        self.size_skew = Counter()
+        # Rosters without groups, per size: trials, and per seat the Time A and waitlist counts
+        self.size_trials = Counter()
+        self.seat_team_a: Dict[int, List[int]] = {}
+        self.seat_waitlist: Dict[int, List[int]] = {}
+        self.team_a_expected: Dict[int, float] = {}
+        # Waitlist rate of grouped vs ungrouped players (rosters over 10 only)
+        self.grouped_seen = 0
+        self.grouped_waitlisted = 0
+        self.ungrouped_seen = 0
+        self.ungrouped_waitlisted = 0
+
+    def record(self, n: int, groups: List[List[int]], team_a: int, team_b: int, waitlist: int):
+        self.trials += 1
+        all_seats = (1 << n) - 1
+        if team_a | team_b | waitlist != all_seats or team_a.bit_count() + team_b.bit_count() + waitlist.bit_count() != n:
+            self.lost_players += 1
+        size_a, size_b = team_a.bit_count(), team_b.bit_count()
+        self.size_skew[size_a - size_b] += 1
+
+        for group in groups:
+            group_mask = 0
+            for seat in group:
+                group_mask |= 1 << seat
+            playing = group_mask & ~waitlist
+            if playing.bit_count() < 2:
+                continue
+            on_a = (playing & team_a).bit_count()
+            on_b = (playing & team_b).bit_count()
+            uneven = abs(on_a - on_b) > 1
+            if playing == group_mask:
+                self.full_groups += 1
+                self.full_violations += uneven
+            else:
+                self.partial_groups += 1
+                self.partial_violations += uneven
+
+        if groups:
+            self._record_waitlist_bias(n, groups, waitlist)
+            return
+        self.size_trials[n] += 1
+        self.team_a_expected[n] = self.team_a_expected.get(n, 0.0) + size_a / max(1, size_a + size_b)
+        seat_a = self.seat_team_a.setdefault(n, [0] * n)
+        seat_wait = self.seat_waitlist.setdefault(n, [0] * n)
+        for seat in range(n):
+            bit = 1 << seat
+            if team_a & bit:
+                seat_a[seat] += 1
+            elif waitlist & bit:
+                seat_wait[seat] += 1
+
+    def _record_waitlist_bias(self, n: int, groups: List[List[int]], waitlist: int):
+        if not waitlist:
+            return
+        grouped = 0
+        for group in groups:
+            for seat in group:
+                grouped |= 1 << seat
+        grouped_count = grouped.bit_count()
+        self.grouped_seen += grouped_count
+        self.grouped_waitlisted += (grouped & waitlist).bit_count()
+        self.ungrouped_seen += n - grouped_count
+        self.ungrouped_waitlisted += (waitlist & ~grouped).bit_count()
+
+    def merge(self, other: "FairnessStats"):
+        for name in ("trials", "lost_players", "full_groups", "full_violations", "partial_groups",
+                     "partial_violations", "grouped_seen", "grouped_waitlisted", "ungrouped_seen",
+                     "ungrouped_waitlisted"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.size_skew.update(other.size_skew)
+        self.size_trials.update(other.size_trials)
+        for n, expected in other.team_a_expected.items():
+            self.team_a_expected[n] = self.team_a_expected.get(n, 0.0) + expected
+        for mine, theirs in ((self.seat_team_a, other.seat_team_a), (self.seat_waitlist, other.seat_waitlist)):
+            for n, counts in theirs.items():
+                totals = mine.setdefault(n, [0] * n)
+                for seat, count in enumerate(counts):
+                    totals[seat] += count
+
+    def seat_z(self) -> Tuple[float, float]:
+        """Largest |z-score| of any seat's Time A rate and waitlist rate, over all roster sizes."""
+        worst_a = worst_wait = 0.0
+        for n, trials in self.size_trials.items():
+            p_a = self.team_a_expected[n] / trials
+            # Playing players are on Time A with probability p_a, so the unconditional rate scales by p_play
+            p_wait = max(0, n - 10) / n
+            p_seat_a = p_a * (1 - p_wait)
+            for counts, p in ((self.seat_team_a[n], p_seat_a), (self.seat_waitlist[n], p_wait)):
+                if p <= 0 or p >= 1:
+                    continue
+                sigma = sqrt(trials * p * (1 - p))
+                worst = max(abs(count - trials * p) / sigma for count in counts)
+                if counts is self.seat_team_a[n]:
+                    worst_a = max(worst_a, worst)
+                else:
+                    worst_wait = max(worst_wait, worst)
+        return worst_a, worst_wait
+
+    def summary(self) -> Dict[str, str]:
+        def rate(part: int, whole: int) -> str:
+            return f"{part / whole:.2%}" if whole else "-"
+
+        z_a, z_wait = self.seat_z()
+        skew = ", ".join(f"{d:+d}: {rate(c, self.trials)}" for d, c in sorted(self.size_skew.items()))
+        return {
+            "rosters": f"{self.trials:,}",
+            "lost/duplicated players": str(self.lost_players),
+            "groups split unevenly (all playing)": rate(self.full_violations, self.full_groups),
+            "groups split unevenly (some waitlisted)": rate(self.partial_violations, self.partial_groups),
+            "seat bias, Time A (max |z|, no groups)": f"{z_a:.1f}",
+            "seat bias, waitlist (max |z|, no groups)": f"{z_wait:.1f}",
+            "waitlist rate, grouped players": rate(self.grouped_waitlisted, self.grouped_seen),
+            "waitlist rate, ungrouped players": rate(self.ungrouped_waitlisted, self.ungrouped_seen),
+            "team size skew |A|-|B|": skew,
+        }
+
+
+def run_batch(balancers: List[str], batch_seed: int, size: int) -> Dict[str, FairnessStats]:
+    """Run `size` scenarios from `batch_seed` through every balancer."""
+    rng = random.Random(batch_seed)
+    scenarios = [(_scenario(rng), rng.getrandbits(64)) for _ in range(size)]
+    results = {}
+    for name in balancers:
+        balance = BALANCERS[name]
+        stats = FairnessStats()
+        for (n, groups), seed in scenarios:
+            users = NAMES[:n]
+            team_a, team_b, waitlist = balance(users, [[users[i] for i in g] for g in groups], seed)
+            stats.record(n, groups, _mask(team_a), _mask(team_b), _mask(waitlist))
+        results[name] = stats
+    return results
+
+
+def simulate(balancers: List[str], trials: int, seed: int, jobs: int) -> Dict[str, FairnessStats]:
+    """Run `trials` scenarios through every balancer, `jobs` batches at a time."""
+    seeds = random.Random(seed)
+    batches = [(seeds.getrandbits(64), min(BATCH_SIZE, trials - start)) for start in range(0, trials, BATCH_SIZE)]
+    totals = {name: FairnessStats() for name in balancers}
+
+    def add(results: Dict[str, FairnessStats]):
+        for name, stats in results.items():
+            totals[name].merge(stats)
+
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as pool:
+            for results in pool.map(run_batch, [balancers] * len(batches), *zip(*batches)):
+                add(results)
+    else:
+        for batch_seed, size in batches:
+            add(run_batch(balancers, batch_seed, size))
+    return totals
+
+
+def report(totals: Dict[str, FairnessStats]):
+    summaries = {name: stats.summary() for name, stats in totals.items()}
+    rows = next(iter(summaries.values())).keys()
+    width = max(len(row) for row in rows)
+    print(f"{'':<{width}}  " + "  ".join(f"{name:>22}" for name in summaries))
+    for row in rows:
+        cells = [summaries[name][row] for name in summaries]
+        if any(len(cell) > 22 for cell in cells):
+            print(row)
+            for name, cell in zip(summaries, cells):
+                print(f"  {name:<{width - 2}}  {cell}")
+        else:
+            print(f"{row:<{width}}  " + "  ".join(f"{cell:>22}" for cell in cells))
+
+
+def failures(name: str, stats: FairnessStats) -> List[str]:
+    """Fairness guarantees the balancer broke (used by --check)."""
+    problems = []
+    if stats.lost_players:
+        problems.append(f"{name}: {stats.lost_players} rosters lost or duplicated players")
+    if stats.full_violations:
+        problems.append(f"{name}: {stats.full_violations} fully playing groups split unevenly")
+    z_a, z_wait = stats.seat_z()
+    if max(z_a, z_wait) > MAX_SEAT_Z:
+        problems.append(f"{name}: seat bias (Time A |z| {z_a:.1f}, waitlist |z| {z_wait:.1f})")
+    if any(abs(skew) > 1 for skew in stats.size_skew):
+        problems.append(f"{name}: team sizes differ by more than one player")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--balancers", nargs="+", default=list(BALANCERS), choices=list(BALANCERS))
+    parser.add_argument("--trials", type=int, default=200_000, help="rosters per balancer")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a balancer breaks a fairness guarantee")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    totals = simulate(args.balancers, args.trials, args.seed, args.jobs)
+    elapsed = time.perf_counter() - start
+    report(totals)
+    print(f"\n{args.trials * len(args.balancers):,} rosters in {elapsed:.1f}s "
+          f"({args.trials * len(args.balancers) / elapsed:,.0f}/s)")
+
+    if args.check:
+        problems = [problem for name, stats in totals.items() for problem in failures(name, stats)]
+        for problem in problems:
+            print(f"FAIL {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Lightweight stand-ins for the discord.py objects the bot touches.
+
+They implement only the attributes and coroutines used by `bot/`, so the
+utilities, command handlers and button callbacks can run without a live
+connection. Sent messages and edits are recorded for inspection.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+from bot.lifecycle import InflightTracker
+
+_ids = itertools.count(10_000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakeVoiceChannel:
+    def __init__(self, channel_id: Optional[int] = None, members: Optional[List["FakeMember"]] = None,
+                 guild: Optional["FakeGuild"] = None, category_id: Optional[int] = None):
+        self.id = channel_id or next_id()
+        self.members = members or []
+        self.guild = guild
+        self.category_id = category_id
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+
+class FakeVoiceState:
+    def __init__(self, channel: Optional[FakeVoiceChannel]):
+        self.channel = channel
+
+
+class FakeMember:
+    def __init__(self, display_name: str, member_id: Optional[int] = None, bot: bool = False,
+                 voice: Optional[FakeVoiceState] = None, guild: Optional["FakeGuild"] = None):
+        self.id = member_id or next_id()
+        self.guild = guild
+        self.display_name = display_name
+        self.name = display_name
+        self.bot = bot
+        self.voice = voice
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    async def move_to(self, channel: FakeVoiceChannel):
+        await self.guild.move_member(self, channel)
+
+
+class FakeGuild:
+    """Guild whose voice moves can simulate request latency and a rate limit.
+
+    With `move_rate_limit` set, at most that many moves succeed per
+    `move_window` seconds; the rest fail with a 429 carrying `Retry-After`.
+    """
+
+    def __init__(self, members: Optional[List[FakeMember]] = None, guild_id: Optional[int] = None,
+                 move_latency: float = 0.0, move_rate_limit: Optional[int] = None, move_window: float = 1.0):
+        self.id = guild_id or next_id()
+        self._members: Dict[int, FakeMember] = {m.id: m for m in members or []}
+        self.voice_channels: List[FakeVoiceChannel] = []
+        self.stage_channels: List[FakeVoiceChannel] = []
+        self.fetches = 0
+        self.move_latency = move_latency
+        self.move_rate_limit = move_rate_limit
+        self.move_window = move_window
+        self.moves = 0
+        self.rate_limited_moves = 0
+        self._window_start = 0.0
+        self._window_moves = 0
+
+    async def move_member(self, member: FakeMember, channel: FakeVoiceChannel):
+        if self.move_latency:
+            await asyncio.sleep(self.move_latency)
+        if self.move_rate_limit is not None:
+            now = time.monotonic()
+            if now - self._window_start >= self.move_window:
+                self._window_start, self._window_moves = now, 0
+            if self._window_moves >= self.move_rate_limit:
+                self.rate_limited_moves += 1
+                retry_after = self.move_window - (now - self._window_start)
+                response = _FakeResponse(429, "Too Many Requests", {"Retry-After": f"{retry_after:.3f}"})
+                raise discord.HTTPException(response, "You are being rate limited.")
+            self._window_moves += 1
+        if member.voice and member.voice.channel:
+            member.voice.channel.members.remove(member)
+        channel.members.append(member)
+        member.voice = FakeVoiceState(channel)
+        self.moves += 1
+
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    async def fetch_member(self, member_id: int) -> FakeMember:
+        self.fetches += 1
+        member = self._members.get(member_id)
+        if member is None:
+            raise discord.NotFound(_FakeResponse(404), "Unknown Member")
+        return member
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id: Optional[int] = None):
+        self.id = channel_id or next_id()
+        self.sent: List[dict] = []
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/@me/{self.id}"
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        self.sent.append({"content": content, **kwargs})
+        return FakeMessage(content or "", channel=self)
+
+
+class FakeMessage:
+    def __init__(self, content: str, author: Optional[FakeMember] = None, guild: Optional[FakeGuild] = None,
+                 channel: Optional[FakeTextChannel] = None, mentions: Optional[List[FakeMember]] = None):
+        self.id = next_id()
+        self.content = content
+        self.author = author or FakeMember("Autor")
+        self.guild = guild
+        self.channel = channel or FakeTextChannel()
+        self.mentions = mentions or []
+        self.replies: List[dict] = []
+        self.edits: List[dict] = []
+        self.reference = None
+
+    @property
+    def jump_url(self) -> str:
+        guild_id = self.guild.id if self.guild else "@me"
+        return f"https://discord.com/channels/{guild_id}/{self.channel.id}/{self.id}"
+
+    async def reply(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        self.replies.append({"content": content, **kwargs})
+        return FakeMessage(content or "", guild=self.guild, channel=self.channel)
+
+    async def edit(self, **kwargs) -> "FakeMessage":
+        self.edits.append(kwargs)
+        if "content" in kwargs:
+            self.content = kwargs["content"]
+        return self
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self.deferred = False
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def defer(self, **kwargs):
+        self.deferred = self.done = True
+
+    async def edit_message(self, **kwargs):
+        self.done = True
+        await self.interaction.message.edit(**kwargs)
+
+    async def send_message(self, content: Optional[str] = None, **kwargs):
+        self.done = True
+        self.interaction.sent.append({"content": content, **kwargs})
+
+
+class FakeClient:
+    """The parts of `PernaBot` that handlers reach through `interaction.client`."""
+
+    def __init__(self):
+        self.inflight = InflightTracker()
+
+
+class FakeInteraction:
+    def __init__(self, message: FakeMessage, user: Optional[FakeMember] = None,
+                 client: Optional[FakeClient] = None):
+        self.id = next_id()
+        self.created_at = discord.utils.utcnow()
+        self.message = message
+        self.user = user or FakeMember("Clicador")
+        self.guild = message.guild
+        self.guild_id = message.guild.id if message.guild else None
+        self.channel = message.channel
+        self.channel_id = message.channel.id
+        self.client = client or FakeClient()
+        self.response = FakeInteractionResponse(self)
+        self.sent: List[dict] = []
+
+    async def edit_original_response(self, **kwargs):
+        await self.message.edit(**kwargs)
+
+    async def original_response(self) -> FakeMessage:
+        return self.message
+
+
+class _FakeResponse:
+    """Minimal aiohttp-like response for building discord HTTP exceptions."""
+
+    def __init__(self, status: int, reason: str = "", headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.reason = reason
+        self.headers = headers or {}
+
+
+def make_roster_message(player_count: int, mention_ratio: float = 0.0, group_ratio: float = 0.0,
+                        content_prefix: str = "!mix ") -> FakeMessage:
+    """Build a `!mix` message with players, mentions and anti-panela groups.
+
+    Args:
+        player_count: Number of players in the roster
+        mention_ratio: Fraction of players written as mentions
+        group_ratio: Fraction of players inside (groups of 2)
+        content_prefix: Text before the roster
+
+    Returns:
+        Message whose guild knows every mentioned member
+    """
+    mention_count = int(player_count * mention_ratio)
+    members = [FakeMember(f"Membro {i}") for i in range(mention_count)]
+    tokens = [m.mention for m in members] + [f"Jogador{i}" for i in range(player_count - mention_count)]
+
+    grouped = int(player_count * group_ratio) // 2 * 2
+    parts = [f"({tokens[i]}, {tokens[i + 1]})" for i in range(0, grouped, 2)]
+    parts += tokens[grouped:]
+
+    guild = FakeGuild(members)
+    return FakeMessage(content_prefix + " ".join(parts), guild=guild, mentions=members)
+
+
+def make_voice_guild(channel_sizes: List[int], bot_ratio: float = 0.1, **guild_options) -> FakeGuild:
+    """Build a guild whose voice channels are already populated.
+
+    Args:
+        channel_sizes: Number of members in each voice channel
+        bot_ratio: Fraction of each channel's members that are bots
+        **guild_options: Passed to `FakeGuild` (e.g. move rate limits)
+
+    Returns:
+        Guild with `voice_channels` set and members wired to their channel
+    """
+    guild = FakeGuild(**guild_options)
+    for channel_index, size in enumerate(channel_sizes):
+        channel = FakeVoiceChannel(guild=guild)
+        bots = int(size * bot_ratio)
+        for i in range(size):
+            member = FakeMember(f"Canal{channel_index} Membro{i}", bot=i < bots,
+                                voice=FakeVoiceState(channel), guild=guild)
+            channel.members.append(member)
+            guild._members[member.id] = member
+        guild.voice_channels.append(channel)
+    return guild
@@ -0,0 +1,494 @@
+"""Loopback Discord gateway and REST API for end-to-end load tests of `PernaBot`.
+
+Starts a local aiohttp server that speaks enough of the Discord gateway
+(HELLO, IDENTIFY, READY, GUILD_CREATE, member chunks, heartbeats) and REST
+API (messages, interaction callbacks, webhook edits) for a real `PernaBot`
+to log in and run against it. Traffic is then replayed at a fixed rate:
+ordinary chat, `!mix` with mentions and groups, clicks on the mix buttons
+and voice state churn. Every command is timed from the moment its event is
+sent on the gateway until the bot's response reaches the REST API.
+
+Traffic can be synthetic (`--rate`, `--duration`, `--mix`) or replayed from
+a JSON lines file written by `--save` (one {"at": seconds, "kind": ..., "content": ...}
+object per line).
+
+Usage:
+    python -m benchmarks.loopback --rate 200 --duration 30
+    python -m benchmarks.loopback --rate 50 --duration 10 --save traffic.jsonl
+    python -m benchmarks.loopback --replay traffic.jsonl --speed 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import discord
+import yarl
+from aiohttp import WSMsgType, web
+
+from bot.client import PernaBot
+from bot.history import teammate_history
+from bot.mixstore import mix_store
+from bot.ratings import rating_book
+
+GUILD_ID = 1
+TEXT_CHANNEL_ID = 10
+VOICE_CHANNEL_IDS = (20, 21, 22)
+BOT_ID = 2
+APPLICATION_ID = 3
+FIRST_MEMBER_ID = 1000
+
+CHAT = ["bora jogar?", "kkkkkkk", "alguém online", "gg", "que time ruim", "quem vai?", "ok", "vou entrar"]
+
+# Default share of each kind of event in synthetic traffic
+DEFAULT_MIX = {"chat": 0.70, "mix": 0.15, "click": 0.10, "voice": 0.05}
+
+
+def _json_response(data) -> web.Response:
+    # discord.py only decodes bodies whose content type is exactly "application/json"
+    return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+
+def _timestamp() -> str:
+    return discord.utils.utcnow().isoformat()
+
+
+def _user(user_id: int, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id), "username": f"user{user_id}", "discriminator": "0",
+        "global_name": f"Jogador {user_id}", "avatar": None, "bot": bot,
+    }
+
+
+def _member(user_id: int, bot: bool = False) -> dict:
+    return {
+        "user": _user(user_id, bot), "nick": None, "roles": [], "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False, "mute": False, "flags": 0,
+    }
+
+
+def _voice_state(user_id: int, channel_id: Optional[int]) -> dict:
+    return {
+        "guild_id": str(GUILD_ID), "channel_id": channel_id and str(channel_id), "user_id": str(user_id),
+        "member": _member(user_id), "session_id": "loopback", "deaf": False, "mute": False,
+        "self_deaf": False, "self_mute": False, "self_video": False, "suppress": False,
+        "request_to_speak_timestamp": None,
+    }
+
+
+def _message(message_id: int, author: dict, content: str, member: Optional[dict] = None,
+             mentions: List[dict] = (), components: List[dict] = ()) -> dict:
+    payload = {
+        "id": str(message_id), "channel_id": str(TEXT_CHANNEL_ID), "guild_id": str(GUILD_ID),
+        "author": author, "content": content, "timestamp": _timestamp(), "edited_timestamp": None,
+        "tts": False, "mention_everyone": False, "mentions": list(mentions), "mention_roles": [],
+        "attachments": [], "embeds": [], "pinned": False, "type": 0, "flags": 0,
+        "components": list(components),
+    }
+    if member is not None:
+        payload["member"] = member
+    return payload
+
+
+class LoopbackDiscord:
+    """Local stand-in for the Discord gateway and REST API.
+
+    Args:
+        members: Number of guild members
+        voice_members: Members initially sitting in the first voice channel
+    """
+
+    def __init__(self, members: int, voice_members: int):
+        self.members = members
+        self.voice_members = voice_members
+        self.app = web.Application()
+        self.app.router.add_get("/gateway", self._gateway)
+        self.app.router.add_get("/api/v10/users/@me", self._me)
+        self.app.router.add_get("/api/v10/oauth2/applications/@me", self._application)
+        self.app.router.add_get("/api/v10/gateway/bot", self._gateway_bot)
+        self.app.router.add_get("/api/v10/channels/{channel_id}", self._channel)
+        self.app.router.add_post("/api/v10/channels/{channel_id}/messages", self._create_message)
+        self.app.router.add_post("/api/v10/interactions/{interaction_id}/{token}/callback", self._callback)
+        self.app.router.add_patch("/api/v10/webhooks/{application_id}/{token}/messages/@original", self._edit_original)
+        self.app.router.add_route("*", "/api/v10/{tail:.*}", self._anything)
+        self.runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+        self.ready = asyncio.Event()
+        self._ws: Optional[web.WebSocketResponse] = None
+        self._seq = 0
+        self._ids = itertools.count(10_000_000)
+        self._pending: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        self._tokens: Dict[str, int] = {}
+        self.bot_messages: Deque[dict] = deque(maxlen=200)
+        self._messages_by_id: Dict[int, dict] = {}
+        self.latencies: Dict[str, List[float]] = {}
+        self.sent: Dict[str, int] = {}
+        self.rest_requests = 0
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._ws is not None:
+            await self._ws.close()
+        await self.runner.cleanup()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    # Gateway
+
+    async def _send(self, payload: dict):
+        await self._ws.send_str(json.dumps(payload))
+
+    async def dispatch(self, event: str, data: dict):
+        self._seq += 1
+        await self._send({"op": 0, "t": event, "s": self._seq, "d": data})
+
+    def _guild_create(self) -> dict:
+        voice_ids = range(FIRST_MEMBER_ID, FIRST_MEMBER_ID + self.voice_members)
+        channels = [{"id": str(TEXT_CHANNEL_ID), "type": 0, "name": "geral", "position": 0,
+                     "permission_overwrites": []}]
+        channels += [
+            {"id": str(channel_id), "type": 2, "name": f"Mix {i}", "position": i + 1, "permission_overwrites": [],
+             "bitrate": 64000, "user_limit": 0}
+            for i, channel_id in enumerate(VOICE_CHANNEL_IDS)
+        ]
+        return {
+            "id": str(GUILD_ID), "name": "Perna", "owner_id": str(FIRST_MEMBER_ID), "member_count": self.members + 1,
+            "large": self.members > 250, "unavailable": False, "features": [], "emojis": [], "stickers": [],
+            "threads": [], "stage_instances": [], "guild_scheduled_events": [], "soundboard_sounds": [],
+            "roles": [{
+                "id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0,
+                "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0,
+            }],
+            "channels": channels,
+            "members": [_member(BOT_ID, bot=True)] + [_member(i) for i in voice_ids],
+            "voice_states": [_voice_state(i, VOICE_CHANNEL_IDS[0]) for i in voice_ids],
+            "presences": [],
+        }
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self._ws = ws
+        await self._send({"op": 10, "d": {"heartbeat_interval": 41250}})
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                continue
+            payload = json.loads(message.data)
+            op = payload["op"]
+            if op == 1:
+                await self._send({"op": 11})
+            elif op == 2:
+                await self.dispatch("READY", {
+                    "v": 10, "user": _user(BOT_ID, bot=True), "guilds": [{"id": str(GUILD_ID), "unavailable": True}],
+                    "session_id": "loopback", "resume_gateway_url": f"ws://127.0.0.1:{self.port}/gateway",
+                    "application": {"id": str(APPLICATION_ID), "flags": 0},
+                })
+                await self.dispatch("GUILD_CREATE", self._guild_create())
+            elif op == 8:
+                await self._chunk(payload["d"])
+        return ws
+
+    async def _chunk(self, request: dict):
+        """Answer a member request (startup chunking or a member query)."""
+        user_ids = request.get("user_ids")
+        ids = [int(i) for i in user_ids] if user_ids else range(FIRST_MEMBER_ID, FIRST_MEMBER_ID + self.members)
+        ids = list(ids)
+        chunk_size = 1000
+        chunks = max(1, -(-len(ids) // chunk_size))
+        for index in range(chunks):
+            await self.dispatch("GUILD_MEMBERS_CHUNK", {
+                "guild_id": str(GUILD_ID), "nonce": request.get("nonce"), "chunk_index": index, "chunk_count": chunks,
+                "members": [_member(i) for i in ids[index * chunk_size:(index + 1) * chunk_size]],
+            })
+        self.ready.set()
+
+    # REST
+
+    async def _me(self, request: web.Request) -> web.Response:
+        return _json_response(_user(BOT_ID, bot=True))
+
+    async def _application(self, request: web.Request) -> web.Response:
+        return _json_response({
+            "id": str(APPLICATION_ID), "name": "PernaBot", "description": "", "icon": None, "bot_public": False,
+            "bot_require_code_grant": False, "owner": _user(FIRST_MEMBER_ID), "verify_key": "", "flags": 0,
+        })
+
+    async def _gateway_bot(self, request: web.Request) -> web.Response:
+        return _json_response({
+            "url": f"ws://127.0.0.1:{self.port}/gateway", "shards": 1,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def _channel(self, request: web.Request) -> web.Response:
+        channel_id = request.match_info["channel_id"]
+        return _json_response({
+            "id": channel_id, "type": 0, "guild_id": str(GUILD_ID), "name": "avisos", "position": 0,
+            "permission_overwrites": [],
+        })
+
+    def _answered(self, key: Tuple[str, int]):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            kind, sent_at = pending
+            self.latencies.setdefault(kind, []).append(time.perf_counter() - sent_at)
+
+    async def _create_message(self, request: web.Request) -> web.Response:
+        self.rest_requests += 1
+        body = await request.json()
+        reference = body.get("message_reference")
+        if reference:
+            self._answered(("message", int(reference["message_id"])))
+        message = _message(next(self._ids), _user(BOT_ID, bot=True), body.get("content") or "",
+                           components=body.get("components") or [])
+        if message["components"]:
+            self.bot_messages.append(message)
+            self._messages_by_id[int(message["id"])] = message
+        return _json_response(message)
+
+    def _update_message(self, message_id: Optional[int], data: dict):
+        message = self._messages_by_id.get(message_id)
+        if message is None:
+            return
+        if "content" in data:
+            message["content"] = data["content"] or ""
+        if "components" in data:
+            message["components"] = data["components"] or []
+
+    async def _callback(self, request: web.Request) -> web.Response:
+        self.rest_requests += 1
+        body = await request.json()
+        interaction_id = int(request.match_info["interaction_id"])
+        self._answered(("interaction", interaction_id))
+        message_id = self._tokens.get(request.match_info["token"])
+        self._update_message(message_id, body.get("data") or {})
+        # discord.py asks for the callback resource (`with_response=1`)
+        resource = {"type": body["type"]}
+        if message_id in self._messages_by_id:
+            resource["message"] = self._messages_by_id[message_id]
+        return _json_response({"interaction": {"id": str(interaction_id), "type": 3}, "resource": resource})
+
+    async def _edit_original(self, request: web.Request) -> web.Response:
+        self.rest_requests += 1
+        body = await request.json()
+        message_id = self._tokens.get(request.match_info["token"])
+        self._update_message(message_id, body)
+        message = self._messages_by_id.get(message_id) or _message(next(self._ids), _user(BOT_ID, bot=True), "")
+        return _json_response(message)
+
+    async def _anything(self, request: web.Request) -> web.Response:
+        self.rest_requests += 1
+        if request.method == "PUT":
+            return _json_response([])
+        return _json_response({})
+
+    # Traffic
+
+    def _author(self) -> int:
+        return random.randrange(FIRST_MEMBER_ID, FIRST_MEMBER_ID + self.members)
+
+    async def send_message(self, content: str, kind: str, mentions: List[int] = ()):
+        message_id = next(self._ids)
+        author_id = self._author()
+        message = _message(
+            message_id, _user(author_id), content, member=_member(author_id),
+            mentions=[{**_user(i), "member": _member(i)} for i in mentions],
+        )
+        if kind != "chat":
+            self._pending[("message", message_id)] = (kind, time.perf_counter())
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        await self.dispatch("MESSAGE_CREATE", message)
+
+    async def send_mix(self, content: Optional[str] = None):
+        if content is None:
+            content = mix_content(self.members)
+        mentions = [int(part) for part in content.replace(">", "<@").split("<@") if part.isdigit()]
+        await self.send_message(content, "mix", mentions)
+
+    async def send_click(self) -> bool:
+        candidates = [message for message in self.bot_messages if message["components"]]
+        if not candidates:
+            return False
+        message = random.choice(candidates)
+        buttons = message["components"][0]["components"]
+        button = buttons[0] if random.random() < 0.9 or len(buttons) == 1 else buttons[-1]
+        interaction_id = next(self._ids)
+        token = f"token{interaction_id}"
+        self._tokens[token] = int(message["id"])
+        self._pending[("interaction", interaction_id)] = ("click", time.perf_counter())
+        self.sent["click"] = self.sent.get("click", 0) + 1
+        author_id = self._author()
+        await self.dispatch("INTERACTION_CREATE", {
+            "id": str(interaction_id), "application_id": str(APPLICATION_ID), "type": 3, "token": token,
+            "version": 1, "guild_id": str(GUILD_ID), "channel_id": str(TEXT_CHANNEL_ID),
+            "channel": {"id": str(TEXT_CHANNEL_ID), "type": 0, "guild_id": str(GUILD_ID), "name": "geral",
+                        "position": 0, "permission_overwrites": []},
+            "member": {**_member(author_id), "permissions": "0"}, "message": message,
+            "data": {"custom_id": button["custom_id"], "component_type": 2},
+            "app_permissions": "0", "locale": "pt-BR", "guild_locale": "pt-BR", "entitlements": [],
+            "authorizing_integration_owners": {}, "context": 0, "attachment_size_limit": 10_000_000,
+        })
+        return True
+
+    async def send_voice_update(self):
+        user_id = random.randrange(FIRST_MEMBER_ID, FIRST_MEMBER_ID + max(self.voice_members * 2, 20))
+        channel_id = random.choice((None,) + VOICE_CHANNEL_IDS)
+        self.sent["voice"] = self.sent.get("voice", 0) + 1
+        await self.dispatch("VOICE_STATE_UPDATE", _voice_state(user_id, channel_id))
+
+    async def send(self, kind: str, content: Optional[str] = None):
+        if kind == "chat":
+            await self.send_message(content or random.choice(CHAT), "chat")
+        elif kind == "mix":
+            await self.send_mix(content)
+        elif kind == "click":
+            if not await self.send_click():
+                await self.send_mix()
+        elif kind == "voice":
+            await self.send_voice_update()
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process (bot and harness), in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def mix_content(members: int) -> str:
+    """A `!mix` of 6-14 players: a third are mentions and the first two are grouped."""
+    players = random.randint(6, 14)
+    mentions = [random.randrange(FIRST_MEMBER_ID, FIRST_MEMBER_ID + members) for _ in range(players // 3)]
+    names = [f"<@{i}>" for i in mentions] + [f"Jogador{random.randrange(1000)}" for _ in range(players - len(mentions))]
+    random.shuffle(names)
+    names[0:2] = [f"({names[0]}, {names[1]})"]
+    return "!mix " + ", ".join(names)
+
+
+def synthetic_traffic(rate: float, duration: float, shares: Dict[str, float], members: int) -> List[dict]:
+    """Build a synthetic schedule of events at `rate` events per second.
+
+    Chat and `!mix` events carry their content, so a saved schedule replays
+    the same messages; clicks and voice updates pick their target at send time.
+    """
+    kinds, weights = zip(*shares.items())
+    traffic = []
+    for i in range(int(rate * duration)):
+        event = {"at": i / rate, "kind": random.choices(kinds, weights)[0]}
+        if event["kind"] == "chat":
+            event["content"] = random.choice(CHAT)
+        elif event["kind"] == "mix":
+            event["content"] = mix_content(members)
+        traffic.append(event)
+    return traffic
+
+
+async def run(traffic: List[dict], members: int, voice_members: int, speed: float) -> dict:
+    """Connect a real PernaBot to the loopback server and replay traffic against it."""
+    server = LoopbackDiscord(members, voice_members)
+    await server.start()
+    discord.http.Route.BASE = f"{server.base_url}/api/v10"
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{server.port}/gateway")
+
+    started = time.perf_counter()
+    bot = PernaBot(health_port=0, sync_commands=False)
+    bot_task = asyncio.create_task(bot.start("loopback-token"))
+    await asyncio.wait_for(server.ready.wait(), 60)
+    await bot.wait_until_ready()
+    print(f"bot ready after {time.perf_counter() - started:.2f}s ({members} members)")
+
+    memory = [(0.0, _rss_mb())]
+    replay_start = time.perf_counter()
+    next_sample = 1.0
+    for event in traffic:
+        delay = event["at"] / speed - (time.perf_counter() - replay_start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await server.send(event["kind"], event.get("content"))
+        elapsed = time.perf_counter() - replay_start
+        if elapsed >= next_sample:
+            memory.append((elapsed, _rss_mb()))
+            next_sample += 1.0
+
+    # Let the last responses arrive
+    await asyncio.sleep(1.0)
+    duration = time.perf_counter() - replay_start
+    memory.append((duration, _rss_mb()))
+
+    await bot.close()
+    bot_task.cancel()
+    await server.stop()
+    return {
+        "duration": duration, "sent": server.sent, "latencies": server.latencies,
+        "unanswered": len(server._pending), "rest_requests": server.rest_requests, "memory": memory,
+    }
+
+
+def report(results: dict):
+    duration = results["duration"]
+    answered = sum(len(values) for values in results["latencies"].values())
+    print(f"\nreplayed {sum(results['sent'].values())} events in {duration:.1f}s: {results['sent']}")
+    print(f"commands answered: {answered} ({answered / duration:.1f}/s), unanswered: {results['unanswered']}, "
+          f"REST requests: {results['rest_requests']}")
+    for kind, values in sorted(results["latencies"].items()):
+        values = sorted(values)
+        p99 = values[max(0, int(len(values) * 0.99) - 1)]
+        print(f"  {kind:<6} p50 {statistics.median(values) * 1000:8.2f} ms   p99 {p99 * 1000:8.2f} ms   "
+              f"(n={len(values)})")
+    print("memory over time (RSS, bot and harness):")
+    for at, rss in results["memory"][::max(1, len(results["memory"]) // 10)]:
+        print(f"  {at:6.1f}s  {rss:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100, help="Events per second (synthetic traffic)")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of synthetic traffic")
+    parser.add_argument("--mix", default=None, help="Event shares, e.g. chat=0.7,mix=0.15,click=0.1,voice=0.05")
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--voice-members", type=int, default=30)
+    parser.add_argument("--replay", help="JSON lines traffic file to replay instead of synthetic traffic")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--save", help="Write the replayed traffic to this JSON lines file")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            traffic = [json.loads(line) for line in f if line.strip()]
+    else:
+        shares = DEFAULT_MIX
+        if args.mix:
+            shares = {kind: float(share) for kind, _, share in (item.partition("=") for item in args.mix.split(","))}
+        traffic = synthetic_traffic(args.rate, args.duration, shares, args.members)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(event) + "\n" for event in traffic)
+
+    with tempfile.TemporaryDirectory() as directory:
+        mix_store.path = os.path.join(directory, "mixes.sqlite3")
+        teammate_history.path = os.path.join(directory, "history.sqlite3")
+        rating_book.store.path = os.path.join(directory, "ratings.sqlite3")
+        report(asyncio.run(run(traffic, args.members, args.voice_members, args.speed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Offline benchmark suite for the roster utilities and command handlers.
+
+Runs `bot/utils.py` and the `bot/commands.py` handlers against fake Discord
+objects at several roster sizes, mention densities and group densities, and
+writes the timings to a JSON results file. Two results files (e.g. from two
+commits) can be compared to catch regressions.
+
+Usage:
+    python -m benchmarks.suite [--output bench_results.json] [--sizes 10 100 1000 10000]
+    python -m benchmarks.suite --compare base.json head.json [--threshold 1.25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from bot import commands
+from bot.history import teammate_history
+from bot.mixstore import mix_store
+from bot.ratings import rating_book
+from bot.reports import report_queue
+from bot.teams import TeamLayout, assign_teams, create_multi_team_messages
+from bot.utils import (
+    balance_teams_with_groups, create_team_message, extract_groups_from_text, parse_players, parse_roster,
+    scan_voice_channel_members
+)
+from bot.voice import voice_rosters
+
+from .fakes import make_roster_message, make_voice_guild
+
+SIZES = [10, 100, 1_000, 10_000]
+MENTION_RATIOS = [0.0, 0.3]
+GROUP_RATIOS = [0.0, 0.2]
+
+# Each measurement repeats until it took this long (or MAX_RUNS runs)
+TARGET_SECONDS = 0.2
+MIN_RUNS = 3
+MAX_RUNS = 1_000
+
+
+def _measure(func: Callable[[], object]) -> Dict[str, float]:
+    timings = []
+    deadline = time.perf_counter() + TARGET_SECONDS
+    while len(timings) < MIN_RUNS or (time.perf_counter() < deadline and len(timings) < MAX_RUNS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "runs": len(timings),
+        "min_us": min(timings) * 1e6,
+        "median_us": statistics.median(timings) * 1e6,
+        "mean_us": statistics.fmean(timings) * 1e6,
+    }
+
+
+def _cases(sizes: List[int]):
+    for size in sizes:
+        for mention_ratio in MENTION_RATIOS:
+            for group_ratio in GROUP_RATIOS:
+                yield size, mention_ratio, group_ratio
+
+
+def run_suite(sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark and return the timings keyed by benchmark name."""
+    loop = asyncio.new_event_loop()
+    results = {}
+
+    def record(name: str, func: Callable[[], object]):
+        results[name] = _measure(func)
+        print(f"{name:<60} {results[name]['median_us']:>12.1f} us", file=sys.stderr)
+
+    for size, mention_ratio, group_ratio in _cases(sizes):
+        message = make_roster_message(size, mention_ratio, group_ratio)
+        text = message.content.removeprefix("!mix ")
+        players, groups, _ = parse_roster(text, message)
+        suffix = f"players={size}/mentions={mention_ratio}/groups={group_ratio}"
+
+        record(f"parse_roster/{suffix}", lambda: parse_roster(text, message))
+        record(f"parse_players/{suffix}", lambda: parse_players(text, message))
+        record(f"extract_groups_from_text/{suffix}", lambda: extract_groups_from_text(text, message))
+        if groups:
+            record(f"balance_teams_with_groups/{suffix}", lambda: balance_teams_with_groups(players, groups))
+        record(f"create_team_message/{suffix}", lambda: create_team_message(players, groups or None))
+        record(
+            f"handle_mix_command/{suffix}",
+            lambda: loop.run_until_complete(commands.handle_mix_command(message, " " + text)),
+        )
+
+    for size in sizes:
+        message = make_roster_message(size, content_prefix="!report ")
+        args = message.content.removeprefix("!report")
+        record(
+            f"handle_report_command/players={size}",
+            lambda: loop.run_until_complete(commands.handle_report_command(message, args)),
+        )
+
+    players = [f"Jogador{i}" for i in range(200)]
+    groups = [players[i:i + 4] for i in range(0, 80, 4)]
+    layout = TeamLayout(20, 10)
+    record("assign_teams/players=200/teams=20", lambda: assign_teams(players, layout, groups))
+    record("create_multi_team_messages/players=200/teams=20",
+           lambda: create_multi_team_messages(players, layout, groups))
+    message = make_roster_message(200, group_ratio=0.4, content_prefix="!mix 20x10 ")
+    args = message.content.removeprefix("!mix")
+    record(
+        "handle_mix_command/players=200/teams=20",
+        lambda: loop.run_until_complete(commands.handle_mix_command(message, args)),
+    )
+
+    for size in sizes:
+        guild = make_voice_guild([size, size])
+        channel = guild.voice_channels[0]
+        voice_rosters.seed_guild(guild)
+        record(f"voice_roster/index/members={size}", lambda: voice_rosters.names(channel.id))
+        record(f"voice_roster/scan/members={size}", lambda: scan_voice_channel_members(channel))
+        voice_rosters.drop_guild(guild.id)
+
+    message = make_roster_message(0, content_prefix="!help")
+    record("handle_help_command", lambda: loop.run_until_complete(commands.handle_help_command(message, "")))
+
+    loop.run_until_complete(report_queue.close())
+    loop.close()
+    return results
+
+
+def _metadata() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(base_path: str, head_path: str, threshold: float) -> int:
+    """Print the median ratio of every benchmark; return 1 if any regressed."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(head_path) as f:
+        head = json.load(f)
+
+    print(f"base {base['meta']['commit']} -> head {head['meta']['commit']}")
+    regressions = 0
+    for name, result in head["results"].items():
+        before = base["results"].get(name)
+        if before is None:
+            print(f"{name:<60} {'new':>8}")
+            continue
+        ratio = result["median_us"] / before["median_us"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<60} {ratio:>7.2f}x{flag}")
+    print(f"{regressions} regression(s) above {threshold:.2f}x")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_results.json", help="results file to write")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="roster sizes to run")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two results files")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio flagged as regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Keep everything stored by the handlers out of the real data dir
+        mix_store.path = os.path.join(data_dir, "mixes.sqlite3")
+        teammate_history.path = os.path.join(data_dir, "history.sqlite3")
+        rating_book.store.path = os.path.join(data_dir, "ratings.sqlite3")
+        report_queue.log.path = os.path.join(data_dir, "reports.jsonl")
+        results = run_suite(args.sizes)
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": _metadata(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
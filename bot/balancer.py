@@ -0,0 +1,171 @@
+"""Exact weighted team-partition solver.
+
+Splits players into two teams minimizing the difference of the weight sums
+while keeping every anti-panela group split as evenly as possible (hard
+constraint). Teams are represented as bitmasks over the player indices:
+bit ``i`` set means player ``i`` is on team A.
+
+Every team-A mask of the lobby is enumerated: at most
+``splits.MAX_PLAYING`` (10) players are split at a time, the rest going to
+the waitlist, so that is 252 masks.
+"""
+
+import random
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Weight differences closer than this are considered ties
+_EPSILON = 1e-9
+
+
+@lru_cache(maxsize=64)
+def _masks_of_size(n: int, k: int) -> Tuple[int, ...]:
+    """Return every n-bit mask with exactly k bits set (cached per lobby shape)."""
+    masks = []
+    for combo in combinations(range(n), k):
+        mask = 0
+        for i in combo:
+            mask |= 1 << i
+        masks.append(mask)
+    return tuple(masks)
+
+
+def _subset_sums(weights: Sequence[float]) -> List[float]:
+    """Return the weight sum of every subset mask of `weights`.
+
+    Each entry is derived from a smaller subset by removing its lowest bit,
+    so the whole table costs one addition per mask.
+    """
+    sums = [0.0] * (1 << len(weights))
+    for mask in range(1, len(sums)):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + weights[low.bit_length() - 1]
+    return sums
+
+
+def _group_masks(groups: Sequence[Sequence[int]]) -> List[int]:
+    """Convert groups of player indices into bitmasks, dropping trivial groups."""
+    masks = []
+    for group in groups:
+        mask = 0
+        for i in group:
+            mask |= 1 << i
+        if mask.bit_count() > 1:
+            masks.append(mask)
+    return masks
+
+
+def is_split_allowed(mask: int, group_masks: Sequence[int]) -> bool:
+    """Check whether a team-A mask splits every group as evenly as possible.
+
+    Args:
+        mask: Team A bitmask
+        group_masks: Group bitmasks (see `_group_masks`)
+
+    Returns:
+        True if every group is split evenly between the teams
+    """
+    for group_mask in group_masks:
+        size = group_mask.bit_count()
+        count = (mask & group_mask).bit_count()
+        if count != size // 2 and count != (size + 1) // 2:
+            return False
+    return True
+
+
+def _brute_force(weights: Sequence[float], team_size: int, group_masks: Sequence[int],
+                 rng: random.Random) -> Optional[int]:
+    sums = _subset_sums(weights)
+    total = sums[-1]
+
+    best_mask = None
+    best_diff = float("inf")
+    ties = 0
+
+    for mask in _masks_of_size(len(weights), team_size):
+        if group_masks and not is_split_allowed(mask, group_masks):
+            continue
+        diff = abs(total - 2 * sums[mask])
+        if diff < best_diff - _EPSILON:
+            best_mask, best_diff, ties = mask, diff, 1
+        elif diff <= best_diff + _EPSILON:
+            # Reservoir sampling keeps the choice uniform among optimal splits
+            ties += 1
+            if rng.randrange(ties) == 0:
+                best_mask = mask
+
+    return best_mask
+
+
+def find_balanced_split(weights: Sequence[float], team_size: int,
+                        groups: Sequence[Sequence[int]] = (),
+                        rng: Optional[random.Random] = None) -> int:
+    """Find the team-A mask with the smallest weight difference between teams.
+
+    Every group must be split as evenly as possible between the teams. If the
+    groups cannot all be satisfied at once, they are ignored.
+
+    Args:
+        weights: Weight of each player, indexed by player position
+        team_size: Number of players on team A
+        groups: Groups of player indices that must be separated
+        rng: Random generator used to break ties between optimal splits
+
+    Returns:
+        Bitmask of the players on team A
+    """
+    rng = rng or random
+    group_masks = _group_masks(groups)
+    mask = _brute_force(weights, team_size, group_masks, rng)
+    if mask is None and group_masks:
+        mask = _brute_force(weights, team_size, [], rng)
+    return mask
+
+
+def rank_splits(weights: Sequence[float], team_size: int, groups: Sequence[Sequence[int]] = (),
+                rng: Optional[random.Random] = None) -> List[int]:
+    """Return every allowed team-A mask, from the most balanced to the least balanced.
+
+    Groups are handled like in `find_balanced_split` (ignored if they cannot
+    all be satisfied), so its answer is always one of the first masks here.
+
+    Args:
+        weights: Weight of each player, indexed by player position
+        team_size: Number of players on team A
+        groups: Groups of player indices that must be separated
+        rng: Random generator used to order splits that are equally balanced
+
+    Returns:
+        Team-A bitmasks, most balanced first
+    """
+    rng = rng or random
+    group_masks = _group_masks(groups)
+    sums = _subset_sums(weights)
+    total = sums[-1]
+    ranked = [
+        (abs(total - 2 * sums[mask]), rng.random(), mask)
+        for mask in _masks_of_size(len(weights), team_size)
+        if not group_masks or is_split_allowed(mask, group_masks)
+    ]
+    if not ranked and group_masks:
+        return rank_splits(weights, team_size, (), rng)
+    ranked.sort()
+    return [mask for _, _, mask in ranked]
+
+
+def resolve_weights(players: List[str], weights: Dict[str, float]) -> List[float]:
+    """Return the weight of each player, in roster order.
+
+    Players without an explicit weight count as the average of the explicit
+    weights, so a partially weighted roster is still balanced sensibly.
+
+    Args:
+        players: List of player names
+        weights: Explicit weights keyed by lowercase player name
+
+    Returns:
+        List of weights aligned with `players`
+    """
+    default = sum(weights.values()) / len(weights) if weights else 1.0
+    return [weights.get(p.lower(), default) for p in players]
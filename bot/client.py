@@ -1,63 +1,286 @@
 """Discord client and event handlers."""
 
+import asyncio
 import logging
+import time
 import discord
-from discord.ext import commands
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from discord import app_commands
 
-from .constants import HELP_COMMAND, MIX_COMMAND, REPORT_COMMAND, NOTIFICATION_CHANNEL_ID
-from .commands import handle_help_command, handle_mix_command, handle_report_command
+from .constants import (
+    GATEWAY_PROFILE, HEALTH_PORT, MEMBER_CHUNK_TIMEOUT, MIX_COMMAND, MODERATION_CHANNEL_ID, NOTIFICATION_CHANNEL_ID,
+    SHUTDOWN_ANNOUNCE_TIMEOUT, SYNC_APP_COMMANDS, WATCHDOG, WATCHDOG_INTERVAL
+)
+from .commands import AcceptButton, ReshuffleButton, router
+from .fuzzy import fuzzy_names
+from .lifecycle import InflightTracker, run_closers
+from .metrics import LoopLagMonitor
+from .names import member_names
+from .outbox import AnnouncementOutbox
+from .reports import report_queue
+from .slash import register_app_commands
+from .startup import startup_profile
+from .voice import voice_rosters
+from .watchdog import watchdog
 
 logger = logging.getLogger(__name__)
 
 
+def gateway_options(profile: str) -> Dict[str, Any]:
+    """Build the client gateway options for a profile.
+
+    - "full": every intent and a full member cache, filled in the background
+      after startup so commands are served meanwhile (mentions that are not
+      cached yet are fetched on demand)
+    - "lean": message content, messages and voice states only; no
+      presences or typing events, no startup chunking, and only the members
+      seen in voice are cached (mentions come with their member data)
+
+    Args:
+        profile: Profile name ("full" or "lean")
+
+    Returns:
+        Keyword arguments for discord.Client
+    """
+    if profile == "lean":
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.dm_messages = True
+        intents.message_content = True
+        intents.voice_states = True
+        return {
+            "intents": intents,
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": False,
+        }
+
+    if profile != "full":
+        logger.warning("[DISCORD] Unknown gateway profile %r, using 'full'", profile)
+    return {"intents": discord.Intents.all(), "chunk_guilds_at_startup": False}
+
+
 class PernaBot(discord.Client):
-    """Perna Mix Bot Discord client."""
+    """Perna Mix Bot Discord client.
+
+    Args:
+        health_port: Port for the /healthz and /metrics endpoint (0 disables it)
+        announce: Whether to post the ONLINE/OFFLINE announcements (only one
+            cluster worker does)
+        sync_commands: Whether to sync the slash commands with Discord on startup
+    """
+
+    def __init__(self, *args, health_port: int = HEALTH_PORT, announce: bool = True,
+                 sync_commands: bool = SYNC_APP_COMMANDS, **kwargs):
+        kwargs = {**gateway_options(GATEWAY_PROFILE), **kwargs}
+        super().__init__(*args, **kwargs)
+        self.health_port = health_port
+        self.announce = announce
+        self.sync_commands = sync_commands
+        self.health_server = None
+        if WATCHDOG:
+            self.loop_lag = LoopLagMonitor(WATCHDOG_INTERVAL, on_lag=watchdog.on_lag)
+        else:
+            self.loop_lag = LoopLagMonitor()
+        self._notification_channel = None
+        self._moderation_channel = None
+        self.outbox = AnnouncementOutbox(self.get_notification_channel)
+        self.inflight = InflightTracker()
+        self.tree = app_commands.CommandTree(self)
+        register_app_commands(self.tree)
+        self.created_at = time.monotonic()
+        self.time_to_ready = None
+        self._chunk_queue: Deque[int] = deque()
+        self._chunker: Optional[asyncio.Task] = None
+
+    async def login(self, token: str):
+        """Log in (this also runs `setup_hook`)."""
+        await super().login(token)
+        startup_profile.mark("login")
 
-    def __init__(self, *args, **kwargs):
-        intents = discord.Intents.all()
-        super().__init__(intents=intents, *args, **kwargs)
+    async def setup_hook(self):
+        """Register the mix button handlers, sync the slash commands and start the background tasks."""
+        # A single dynamic handler per button serves every mix ever posted,
+        # including the ones sent before a restart
+        self.add_dynamic_items(ReshuffleButton, AcceptButton)
+
+        if self.sync_commands:
+            try:
+                synced = await self.tree.sync()
+                logger.info("[STARTUP] Synced %s slash command(s)", len(synced))
+            except discord.HTTPException as e:
+                logger.warning("[STARTUP] Could not sync slash commands: %s", e)
+
+        if MODERATION_CHANNEL_ID:
+            report_queue.start_digests(self.get_moderation_channel)
+        self.loop_lag.start()
+        if WATCHDOG:
+            watchdog.start()
+        if self.health_port:
+            # aiohttp.web is only loaded when the endpoint is enabled
+            from .health import HealthServer, register_bot_metrics
+
+            register_bot_metrics(self)
+            self.health_server = HealthServer(self, self.health_port)
+            await self.health_server.start()
+
+    async def get_notification_channel(self) -> discord.abc.Messageable:
+        """Return the notification channel, resolved once per process.
+
+        Uses the gateway cache first and only falls back to a REST fetch.
+        """
+        if self._notification_channel is None:
+            channel = self.get_channel(NOTIFICATION_CHANNEL_ID)
+            if channel is None:
+                logger.info("[DISCORD] Fetching notification channel %s", NOTIFICATION_CHANNEL_ID)
+                channel = await self.fetch_channel(NOTIFICATION_CHANNEL_ID)
+            self._notification_channel = channel
+        return self._notification_channel
+
+    async def get_moderation_channel(self) -> discord.abc.Messageable:
+        """Return the channel that receives the report digests, resolved once per process."""
+        if self._moderation_channel is None:
+            channel = self.get_channel(MODERATION_CHANNEL_ID)
+            if channel is None:
+                channel = await self.fetch_channel(MODERATION_CHANNEL_ID)
+            self._moderation_channel = channel
+        return self._moderation_channel
+
+    async def on_connect(self):
+        """Called on every gateway READY, before the guilds arrive."""
+        startup_profile.mark("gateway READY")
 
     async def on_ready(self):
-        """Called when the bot is ready."""
-        logger.info(f"[DISCORD] Bot connected as {self.user.name} (ID: {self.user.id})")
+        """Called when the bot is ready (again after every reconnect)."""
+        startup_profile.mark("on_ready")
+        logger.info("[DISCORD] Bot connected as %s (ID: %s)", self.user.name, self.user.id)
+        if self.time_to_ready is None:
+            self.time_to_ready = time.monotonic() - self.created_at
+            logger.info("[STARTUP] Time to ready: %.2fs", self.time_to_ready)
+
+        # Send startup message to notification channel (once per session)
+        if self.announce and self.outbox.post("online", "🤖 **Perna Bot está ONLINE!** 🎯"):
+            logger.info("[DISCORD] Sending startup message to channel %s", NOTIFICATION_CHANNEL_ID)
+
+    async def on_guild_available(self, guild: discord.Guild):
+        """Seed the voice rosters and member names of a guild (also after reconnects)."""
+        voice_rosters.seed_guild(guild)
+        member_names.seed_guild(guild)
+        # Events may have been missed while disconnected: rebuild the name
+        # index now, or once the member cache is filled
+        if not self._fill_member_cache(guild):
+            fuzzy_names.refresh(guild)
 
-        # Send startup message to notification channel
+    async def on_guild_join(self, guild: discord.Guild):
+        await self.on_guild_available(guild)
+
+    def _fill_member_cache(self, guild: discord.Guild) -> bool:
+        """Queue a guild whose members are not all cached yet (see `gateway_options`).
+
+        Returns:
+            True if the guild was queued
+        """
+        if not self.intents.members or guild.chunked:
+            return False
+        self._chunk_queue.append(guild.id)
+        if self._chunker is None:
+            self._chunker = asyncio.create_task(self._chunk_guilds())
+        return True
+
+    async def _chunk_guilds(self):
+        """Request the members of the queued guilds, one guild at a time."""
         try:
-            channel = await self.fetch_channel(NOTIFICATION_CHANNEL_ID)
-            logger.info(f"[DISCORD] Sending startup message to channel {NOTIFICATION_CHANNEL_ID}")
-            await channel.send("🤖 **Perna Bot está ONLINE!** 🎯")
-        except discord.errors.NotFound:
-            logger.warning(f"[DISCORD] Notification channel {NOTIFICATION_CHANNEL_ID} not found")
-        except discord.errors.Forbidden:
-            logger.warning(f"[DISCORD] No permission to access notification channel {NOTIFICATION_CHANNEL_ID}")
-        except Exception as e:
-            logger.warning(f"[DISCORD] Error accessing notification channel {NOTIFICATION_CHANNEL_ID}: {e}")
+            while self._chunk_queue:
+                guild = self.get_guild(self._chunk_queue.popleft())
+                if guild is None or guild.chunked:
+                    continue
+                try:
+                    await asyncio.wait_for(guild.chunk(), MEMBER_CHUNK_TIMEOUT)
+                except Exception as e:
+                    logger.warning("[DISCORD] Could not fetch the members of guild %s: %r", guild.id, e)
+                    fuzzy_names.refresh(guild)
+                    continue
+                member_names.seed_guild(guild)
+                fuzzy_names.refresh(guild)
+                logger.info("[DISCORD] Cached %s members of guild %s", len(guild.members), guild.id)
+        finally:
+            self._chunker = None
+        startup_profile.mark("member cache filled")
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        voice_rosters.drop_guild(guild.id)
+        member_names.drop_guild(guild.id)
+        fuzzy_names.drop_guild(guild.id)
+
+    async def on_member_join(self, member: discord.Member):
+        member_names.add(member)
+        fuzzy_names.add(member)
+
+    async def on_member_remove(self, member: discord.Member):
+        member_names.remove(member)
+        fuzzy_names.remove(member)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        """Follow global display name changes in every guild the user shares with the bot."""
+        if before.display_name == after.display_name:
+            return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member is not None:
+                member_names.add(member)
+                fuzzy_names.add(member)
+
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState,
+                                    after: discord.VoiceState):
+        voice_rosters.on_voice_state_update(member, before, after)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        voice_rosters.on_member_update(before, after)
+        if before.display_name != after.display_name:
+            member_names.add(after)
+            fuzzy_names.add(after)
 
     async def on_message(self, message: discord.Message):
         """Handle incoming messages."""
-        # Ignore messages from the bot itself
-        if message.author == self.user:
+        # Most messages are ordinary chat: reject them before anything else
+        resolved = router.resolve(message.content)
+        if resolved is None:
             return
 
-        # Handle commands
-        if message.content == HELP_COMMAND:
-            await handle_help_command(message)
-
-        elif message.content.startswith(REPORT_COMMAND):
-            await handle_report_command(message)
+        # Ignore messages from the bot itself, and new commands while shutting down
+        if message.author == self.user or self.inflight.closing:
+            return
 
-        elif message.content.startswith(MIX_COMMAND):
-            await handle_mix_command(message)
+        with self.inflight.track(), watchdog.track(resolved[0].name, len(message.content)):
+            await router.dispatch(message, resolved)
+        if startup_profile.enabled and resolved[0].name == MIX_COMMAND:
+            startup_profile.mark("first !mix served")
 
     async def send_shutdown_message(self):
-        """Send shutdown notification message."""
-        try:
-            channel = await self.fetch_channel(NOTIFICATION_CHANNEL_ID)
-            logger.info(f"[DISCORD] Sending shutdown message to channel {NOTIFICATION_CHANNEL_ID}")
-            await channel.send("🔴 **Perna Bot está OFFLINE!** \nVolto em breve para sortear Mix! 👋")
-        except discord.errors.NotFound:
-            logger.warning(f"[DISCORD] Notification channel {NOTIFICATION_CHANNEL_ID} not found")
-        except discord.errors.Forbidden:
-            logger.warning(f"[DISCORD] No permission to access notification channel {NOTIFICATION_CHANNEL_ID}")
-        except Exception as e:
-            logger.warning(f"[DISCORD] Error accessing notification channel {NOTIFICATION_CHANNEL_ID}: {e}")
+        """Send shutdown notification message and wait until it is delivered."""
+        if not self.announce:
+            return
+        logger.info("[DISCORD] Sending shutdown message to channel %s", NOTIFICATION_CHANNEL_ID)
+        self.outbox.post("offline", "🔴 **Perna Bot está OFFLINE!** \nVolto em breve para sortear Mix! 👋")
+        await self.outbox.drain(SHUTDOWN_ANNOUNCE_TIMEOUT)
+
+    async def close(self):
+        """Stop the background tasks, write pending ratings and reports and close the connection."""
+        self.outbox.close()
+        if self._chunker is not None:
+            self._chunker.cancel()
+        await run_closers()
+        self.loop_lag.stop()
+        watchdog.stop()
+        if self.health_server is not None:
+            await self.health_server.stop()
+        await super().close()
+
+
+class AutoShardedPernaBot(PernaBot, discord.AutoShardedClient):
+    """Perna Mix Bot client running several shards in one process.
+
+    Pass `shard_ids` and `shard_count` to run a slice of the shards (as the
+    cluster launcher does); without them every recommended shard is run.
+    """
@@ -0,0 +1,348 @@
+"""Multi-process cluster launcher for sharded deployments.
+
+The shard range is split across worker processes. Each one runs its own
+`AutoShardedPernaBot` (with its own caches and views) and reports its health
+and metrics to the launcher through a queue. The only state workers share is
+in DATA_DIR: the SQLite stores (WAL mode, where writers from several
+processes wait for each other's locks) and the reports log (each batch is
+one O_APPEND write). The in-memory caches over those stores are per guild,
+and a guild is always served by the cluster running its shard.
+The launcher aggregates those reports, serves them on /healthz and /metrics
+and restarts a worker that exits or stops reporting, without touching the
+other clusters. Only cluster 0 posts the ONLINE/OFFLINE announcements and
+syncs the slash commands.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+
+from .constants import CLUSTER_HEALTH_INTERVAL, CLUSTER_HEALTH_TIMEOUT, HEALTH_PORT, SYNC_APP_COMMANDS
+from .lifecycle import backoff_delay
+from .metrics import Counter, Gauge, merge_collected, registry
+
+logger = logging.getLogger(__name__)
+
+# Worker entry point: worker(cluster_id, shard_ids, shard_count, status_queue)
+ClusterWorker = Callable[[int, List[int], int, Any], None]
+
+_GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split shard IDs into contiguous, nearly equal ranges.
+
+    Args:
+        shard_count: Total number of shards
+        clusters: Number of worker processes
+
+    Returns:
+        One list of shard IDs per cluster
+    """
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for i in range(clusters):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+async def fetch_recommended_shard_count(token: str) -> int:
+    """Ask Discord how many shards the bot should run."""
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(_GATEWAY_BOT_URL, headers=headers) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+def _bot_health(cluster_id: int, shard_ids: List[int], bot) -> Dict[str, Any]:
+    """Health report of a cluster worker."""
+    from .mixstore import mix_views
+
+    ready = bot is not None and bot.is_ready()
+    latency = bot.latency if ready else None
+    return {
+        "cluster": cluster_id,
+        "pid": os.getpid(),
+        "shards": shard_ids,
+        "ready": ready,
+        "guilds": len(bot.guilds) if ready else 0,
+        "latency": latency if latency == latency else None,  # NaN before the first heartbeat
+        "inflight": bot.inflight.active if bot is not None else 0,
+        "mix_views": len(mix_views),
+        "time": time.time(),
+    }
+
+
+async def _report_health(cluster_id: int, shard_ids: List[int], supervisor, status_queue):
+    labels = f'cluster="{cluster_id}"'
+    while True:
+        status = _bot_health(cluster_id, shard_ids, supervisor.bot)
+        status["metrics"] = registry.collect(labels)
+        try:
+            status_queue.put_nowait(status)
+        except queue.Full:
+            pass
+        await asyncio.sleep(CLUSTER_HEALTH_INTERVAL)
+
+
+def run_cluster_worker(cluster_id: int, shard_ids: List[int], shard_count: int, status_queue):
+    """Worker process entry point: run the bot for a slice of the shards.
+
+    Workers do not serve /healthz and /metrics, since they would all compete
+    for the same port; their health and metrics are reported to the launcher
+    instead.
+    """
+    from .client import AutoShardedPernaBot
+    from .health import register_bot_metrics
+    from .logs import setup_logging
+    from .supervisor import BotSupervisor, run_until_signal
+
+    # Spawned workers don't inherit the launcher's logging setup
+    log_listener = setup_logging(cluster=cluster_id)
+
+    def bot_factory():
+        bot = AutoShardedPernaBot(
+            shard_ids=shard_ids, shard_count=shard_count, health_port=0,
+            announce=cluster_id == 0, sync_commands=SYNC_APP_COMMANDS and cluster_id == 0,
+        )
+        register_bot_metrics(bot)
+        return bot
+
+    async def main():
+        supervisor = BotSupervisor(os.environ["DISCORD_TOKEN"], bot_factory=bot_factory)
+        reporter = asyncio.create_task(_report_health(cluster_id, shard_ids, supervisor, status_queue))
+        try:
+            await run_until_signal(supervisor)
+        finally:
+            reporter.cancel()
+
+    try:
+        asyncio.run(main())
+    finally:
+        if log_listener is not None:
+            log_listener.stop()
+
+
+class _Cluster:
+    __slots__ = ("cluster_id", "shard_ids", "process", "status", "metrics", "restarts", "restart_at", "started_at")
+
+    def __init__(self, cluster_id: int, shard_ids: List[int]):
+        self.cluster_id = cluster_id
+        self.shard_ids = shard_ids
+        self.process: Optional[multiprocessing.Process] = None
+        self.status: Optional[Dict[str, Any]] = None
+        self.metrics: Optional[Dict[str, List[str]]] = None
+        self.restarts = 0
+        self.restart_at: Optional[float] = None
+        self.started_at = 0.0
+
+
+class ClusterLauncher:
+    """Start, monitor and restart cluster worker processes.
+
+    Args:
+        shard_count: Total number of shards
+        clusters: Number of worker processes
+        worker: Worker entry point (a stand-in can be passed for local testing)
+        health_timeout: Seconds without a health report before a worker is restarted
+        health_port: Port for the aggregated /healthz and /metrics endpoint (0 disables it)
+    """
+
+    def __init__(self, shard_count: int, clusters: int, worker: ClusterWorker = run_cluster_worker,
+                 health_timeout: float = CLUSTER_HEALTH_TIMEOUT, health_port: int = HEALTH_PORT):
+        self.shard_count = shard_count
+        self.worker = worker
+        self.health_timeout = health_timeout
+        self.health_port = health_port
+        self._context = multiprocessing.get_context("spawn")
+        self._status_queue = self._context.Queue(maxsize=1000)
+        self.clusters = [_Cluster(i, ids) for i, ids in enumerate(split_shards(shard_count, clusters))]
+        self.stopping = False
+
+    def _spawn(self, cluster: _Cluster):
+        cluster.process = self._context.Process(
+            target=self.worker,
+            args=(cluster.cluster_id, cluster.shard_ids, self.shard_count, self._status_queue),
+            name=f"perna-cluster-{cluster.cluster_id}",
+            daemon=False,
+        )
+        cluster.process.start()
+        cluster.status = None
+        cluster.metrics = None
+        cluster.restart_at = None
+        cluster.started_at = time.monotonic()
+        logger.info(
+            "[CLUSTER] Started cluster %s (pid %s, shards %s-%s of %s)",
+            cluster.cluster_id, cluster.process.pid, cluster.shard_ids[0], cluster.shard_ids[-1], self.shard_count,
+        )
+
+    def start(self):
+        """Start every worker."""
+        for cluster in self.clusters:
+            self._spawn(cluster)
+
+    def _collect(self, timeout: float):
+        """Read health reports for up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                status = self._status_queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                return
+            cluster = self.clusters[status["cluster"]]
+            if cluster.process is not None and status["pid"] == cluster.process.pid:
+                status["received_at"] = time.monotonic()
+                cluster.metrics = status.pop("metrics", None)
+                cluster.status = status
+            if remaining <= 0:
+                return
+
+    def _check(self, cluster: _Cluster):
+        """Schedule or perform the restart of a dead or silent worker."""
+        now = time.monotonic()
+        if cluster.restart_at is not None:
+            if now >= cluster.restart_at:
+                cluster.restarts += 1
+                self._spawn(cluster)
+            return
+
+        process = cluster.process
+        last_seen = cluster.status["received_at"] if cluster.status else cluster.started_at
+        if process.is_alive() and now - last_seen > self.health_timeout:
+            logger.warning("[CLUSTER] Cluster %s stopped reporting, restarting it", cluster.cluster_id)
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+        if not process.is_alive():
+            delay = backoff_delay(cluster.restarts, 1.0, 30.0)
+            logger.warning(
+                "[CLUSTER] Cluster %s exited with code %s, restarting in %.1fs",
+                cluster.cluster_id, process.exitcode, delay,
+            )
+            cluster.status = None
+            cluster.restart_at = now + delay
+
+    def poll(self, timeout: float = 1.0):
+        """Collect health reports and restart failed workers."""
+        self._collect(timeout)
+        if self.stopping:
+            return
+        for cluster in self.clusters:
+            self._check(cluster)
+
+    def health(self) -> Dict[str, Any]:
+        """Aggregate the latest health report of every cluster."""
+        clusters = []
+        for cluster in self.clusters:
+            status = dict(cluster.status or {})
+            status.update({
+                "cluster": cluster.cluster_id,
+                "shards": cluster.shard_ids,
+                "alive": cluster.process is not None and cluster.process.is_alive(),
+                "restarts": cluster.restarts,
+            })
+            clusters.append(status)
+        latencies = [c["latency"] for c in clusters if c.get("latency") is not None]
+        return {
+            "clusters": clusters,
+            "shard_count": self.shard_count,
+            "ready_clusters": sum(1 for c in clusters if c.get("ready")),
+            "guilds": sum(c.get("guilds", 0) for c in clusters),
+            "max_latency": max(latencies) if latencies else None,
+            "restarts": sum(c["restarts"] for c in clusters),
+        }
+
+    def metrics(self) -> str:
+        """Render the launcher metrics and the latest metrics reported by every cluster."""
+        up = Gauge("perna_cluster_up", "Whether the cluster worker process is alive.", ["cluster"])
+        restarts = Counter("perna_cluster_restarts_total", "Restarts of the cluster worker process.", ["cluster"])
+        for cluster in self.clusters:
+            alive = cluster.process is not None and cluster.process.is_alive()
+            up.set(1.0 if alive else 0.0, str(cluster.cluster_id))
+            restarts.inc(cluster.restarts, str(cluster.cluster_id))
+        launcher = {metric.name: metric.render() for metric in (up, restarts)}
+        return merge_collected([launcher] + [c.metrics for c in self.clusters if c.metrics])
+
+    def serve_health(self) -> Callable[[], None]:
+        """Serve /healthz and /metrics from a background thread.
+
+        The launcher loop blocks on the status queue, so the endpoint gets
+        an event loop of its own.
+
+        Returns:
+            Function stopping the endpoint
+        """
+        # aiohttp.web is only loaded when the endpoint is enabled
+        from .health import ClusterHealthServer
+
+        loop = asyncio.new_event_loop()
+        server = ClusterHealthServer(self, self.health_port)
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, name="perna-cluster-health", daemon=True)
+        thread.start()
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.run_until_complete(server.stop())
+            loop.close()
+
+        return stop
+
+    def stop(self, timeout: float = 30.0):
+        """Ask every worker to shut down gracefully, killing the ones that do not."""
+        self.stopping = True
+        for cluster in self.clusters:
+            if cluster.process is not None and cluster.process.is_alive():
+                cluster.process.terminate()
+        deadline = time.monotonic() + timeout
+        for cluster in self.clusters:
+            if cluster.process is None:
+                continue
+            cluster.process.join(max(0.0, deadline - time.monotonic()))
+            if cluster.process.is_alive():
+                logger.warning("[CLUSTER] Cluster %s did not stop in time, killing it", cluster.cluster_id)
+                cluster.process.kill()
+                cluster.process.join()
+
+    def run(self, health_log_interval: float = 60.0):
+        """Run until SIGINT/SIGTERM, then stop every worker."""
+        def request_stop(signum, frame):
+            logger.info("[SHUTDOWN] Received signal %s, stopping clusters...", signal.Signals(signum).name)
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        stop_health = self.serve_health() if self.health_port else None
+        self.start()
+        next_log = time.monotonic() + health_log_interval
+        while not self.stopping:
+            self.poll()
+            if time.monotonic() >= next_log:
+                health = self.health()
+                logger.info(
+                    "[CLUSTER] %s/%s clusters ready, %s guilds, %s restarts",
+                    health['ready_clusters'], len(self.clusters), health['guilds'], health['restarts'],
+                )
+                next_log = time.monotonic() + health_log_interval
+        self.stop()
+        if stop_health is not None:
+            stop_health()
@@ -1,29 +1,77 @@
 """Command handlers for the bot."""
 
-import random
+import re
+import time
 import discord
-from typing import List
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-from .constants import HELP_MESSAGE, REPORT_MESSAGE, MIX_COMMAND, HELP_COMMAND, REPORT_COMMAND
-from .utils import create_team_message, parse_players, get_voice_channel_members, extract_groups_from_text
+from .constants import (
+    COMMAND_ALIASES, COMMAND_CHANNELS, COMMAND_PREFIX, HELP_MESSAGE, REPORT_MESSAGE, MIX_COMMAND, HELP_COMMAND,
+    REPORT_COMMAND, LOBBY_COMMAND, LOBBY_SIZE, HISTORY_CANDIDATES, RESULT_COMMAND, FUZZY_NAMES
+)
+from .fuzzy import fuzzy_names
+from .history import PairMatrix, least_repeated, teammate_history
+from .metrics import INTERACTION_ACK_LATENCY
+from .mixstore import MixRoster, mix_store, mix_views
+from .reports import Report, report_queue
+from .router import CommandRouter
+from .splits import SplitStream, TeamSplit
+from .teams import TeamLayout, create_multi_team_messages, paginate, parse_team_layout
+from .throttle import edit_scheduler
+from .utils import (
+    format_team_message, parse_report_targets, parse_roster, parse_team_message, get_voice_channel_members,
+    resolve_mentions
+)
+from .watchdog import offload, watchdog
 
+router = CommandRouter(COMMAND_PREFIX)
 
-async def handle_help_command(message: discord.Message):
+# Last accepted mix per channel: channel ID -> (message ID, (Time A, Time B))
+last_accepted: Dict[int, Tuple[int, Tuple[List[str], List[str]]]] = {}
+
+
+def _command(name: str, glued_args: bool = False):
+    """Register a handler with the aliases and channels configured for it."""
+    return router.command(name, COMMAND_ALIASES.get(name, ()), COMMAND_CHANNELS.get(name), glued_args)
+
+
+@_command(HELP_COMMAND)
+async def handle_help_command(message: discord.Message, args: str = ""):
     """Handle !help command.
 
     Args:
         message: Discord message that triggered the command
+        args: Text after the command (ignored)
     """
     await message.channel.send(HELP_MESSAGE)
 
 
-async def handle_report_command(message: discord.Message):
+def submit_reports(guild_id: Optional[int], channel_id: int, reporter: discord.abc.User, targets: List[str],
+                   message_url: str) -> int:
+    """Queue one report per player for the moderators (see `reports.ReportQueue`).
+
+    Returns:
+        Number of reports queued (repeated reports are dropped)
+    """
+    now = time.time()
+    return sum(
+        report_queue.submit(Report(guild_id, channel_id, reporter.id, reporter.display_name, target, message_url, now))
+        for target in targets
+    )
+
+
+@_command(REPORT_COMMAND, glued_args=True)
+async def handle_report_command(message: discord.Message, args: str):
     """Handle !report command.
 
+    Every reported player is queued for the moderators' log and digest; the
+    reply does not wait for the report to be written.
+
     Args:
         message: Discord message that triggered the command
+        args: Text after the command
     """
-    cleaned_input = message.content.removeprefix(REPORT_COMMAND).strip()
+    cleaned_input = args.strip()
 
     if not cleaned_input:
         await message.channel.send(
@@ -31,19 +79,26 @@ async def handle_report_command(message: discord.Message):
         )
         return
 
+    targets = parse_report_targets(cleaned_input, await resolve_mentions(cleaned_input, message))
+    guild_id = message.guild.id if message.guild else None
+    submit_reports(guild_id, message.channel.id, message.author, targets, message.jump_url)
     await message.channel.send(REPORT_MESSAGE)
 
 
-async def handle_mix_command(message: discord.Message):
+@_command(MIX_COMMAND, glued_args=True)
+async def handle_mix_command(message: discord.Message, args: str):
     """Handle !mix command to create random teams.
 
     Args:
         message: Discord message that triggered the command
+        args: Text after the command
     """
-    cleaned_input = message.content.removeprefix(MIX_COMMAND).strip()
+    layout, args = parse_team_layout(args)
+    cleaned_input = args.strip()
 
     users = []
     groups = None
+    weights = None
 
     # If no arguments, try to get players from voice channel
     if not cleaned_input:
@@ -57,7 +112,9 @@ async def handle_mix_command(message: discord.Message):
             )
             return
     else:
-        users = parse_players(cleaned_input, message)
+        mention_names = await resolve_mentions(cleaned_input, message)
+        resolve_name = await fuzzy_names.resolver(message.guild) if FUZZY_NAMES and message.guild else None
+        users, groups, weights = parse_roster(cleaned_input, message, mention_names, resolve_name)
 
         if not users or len(users) < 2:
             await message.channel.send(
@@ -66,33 +123,342 @@ async def handle_mix_command(message: discord.Message):
             )
             return
 
-        groups = extract_groups_from_text(cleaned_input, message) or None
+        groups = groups or None
+        weights = weights or None
+
+    if layout:
+        await _send_multi_team_mix(message, users, layout, groups, weights)
+        return
 
     # Create buttons
-    view = MixView(users, groups)
+    history = await guild_history(message.guild.id if message.guild else None)
+    view = await MixView.build(users, groups, weights, history)
+    content = view.next_message()
 
     # Send message with teams and buttons
-    await message.reply(
-        content=create_team_message(users, groups),
+    sent = await message.reply(
+        content=content,
         view=view,
         mention_author=False
     )
+    mix_views.put(sent.id, view)
+
+
+async def _send_multi_team_mix(message: discord.Message, users: List[str], layout: TeamLayout,
+                               groups: Optional[List[List[str]]], weights: Optional[Dict[str, float]]):
+    """Send an N-team mix, split over several messages if needed (no buttons)."""
+    pages = await offload(create_multi_team_messages, users, layout, groups, weights, size=len(users))
+    await message.reply(content=pages[0], mention_author=False)
+    for page in pages[1:]:
+        await message.channel.send(page)
+
+
+async def _result_target(message: discord.Message) -> Optional[Tuple[int, Tuple[List[str], List[str]]]]:
+    """Find the mix a result refers to: the replied-to message, or the channel's last accepted mix.
+
+    Only mixes posted by the bot and accepted through the "✅ Aceito" button
+    count, with the teams recorded on accept (never the message text).
+    """
+    reference = message.reference
+    if reference is None or reference.message_id is None:
+        return last_accepted.get(message.channel.id)
+
+    referenced = reference.resolved
+    if isinstance(referenced, discord.Message) and referenced.author != message.guild.me:
+        return None
+    teams = await teammate_history.load_accepted_teams(reference.message_id)
+    return (reference.message_id, teams[:2]) if teams else None
+
+
+@_command(RESULT_COMMAND)
+async def handle_result_command(message: discord.Message, args: str):
+    """Handle !resultado command: record which team won a mix and update the ratings.
+
+    Args:
+        message: Discord message that triggered the command (optionally replying to the mix)
+        args: Winning team ("A" or "B")
+    """
+    winner = args.strip().upper().removeprefix("TIME").strip()
+    if winner not in ("A", "B") or message.guild is None:
+        await message.channel.send(
+            "🚨 Diz quem ganhou: `!resultado A` ou `!resultado B` (respondendo ao mix ou depois de aceitar). 🙄"
+        )
+        return
+
+    target = await _result_target(message)
+    if target is None:
+        await message.channel.send("🚨 Não achei nenhum mix aceito aqui. Aceita os times primeiro! 😒")
+        return
+    mix_id, (team_a, team_b) = target
+
+    # Ratings are loaded on the first result, keeping them off the startup path
+    from .ratings import MatchResult, rating_book
+
+    if not await rating_book.claim(mix_id):
+        await message.channel.send("🚨 O resultado desse mix já foi registrado! Sem roubar. 😤")
+        return
+
+    winners, losers = (team_a, team_b) if winner == "A" else (team_b, team_a)
+    ratings = await rating_book.record(message.guild.id, [MatchResult(winners, losers, mix_id)])
+    lines = [
+        f"{'🏆' if name in winners else '💀'} {name}: {ratings[name.lower()]:.0f}"
+        for name in winners + losers
+    ]
+    await message.channel.send(f"📊 Resultado registrado! Time {winner} venceu.\n" + "\n".join(lines))
+
+
+@_command(LOBBY_COMMAND)
+async def handle_lobby_command(message: discord.Message, args: str):
+    """Handle !salas command: split the author's voice channel into lobbies and move the players.
+
+    Args:
+        message: Discord message that triggered the command
+        args: Text after the command (ignored)
+    """
+    from .lobbies import VoiceMover, format_lobby_message, lobby_targets, plan_lobbies, plan_moves
+
+    players = get_voice_channel_members(message)
+    if not players:
+        await message.channel.send(
+            "🚨 Você precisa estar em um canal de voz para dividir as salas! Entra lá primeiro. 🙄"
+        )
+        return
+
+    source = message.author.voice.channel
+    plan = plan_lobbies(players, LOBBY_SIZE)
+    targets = lobby_targets(source)
+    if len(targets) < len(plan.lobbies) * 2:
+        await message.channel.send(
+            f"🚨 Preciso de {len(plan.lobbies) * 2} canais de voz na mesma categoria para "
+            f"{len(plan.lobbies)} sala(s), mas só achei {len(targets)}. Cria mais canais aí! 🛠️"
+        )
+        return
+
+    pages = paginate(format_lobby_message(plan, targets))
+    await message.reply(content=pages[0], mention_author=False)
+    for page in pages[1:]:
+        await message.channel.send(page)
+
+    report = await VoiceMover().move_all(plan_moves(plan, source.members, targets))
+    summary = f"🚚 {report.moved} jogador(es) movido(s) em {report.elapsed:.1f}s."
+    if report.failed:
+        summary += f" Não consegui mover: {', '.join(report.failed)}"
+    await message.channel.send(summary)
+
+
+_MIX_STATE_PATTERN = (
+    r'(?P<key>[0-9a-f]{16}):(?P<seed>[0-9a-f]+):(?P<cursor>[0-9a-f]+):(?P<produced>[0-9a-f]+)'
+    r'(?::(?P<shown>[0-9a-f]+))?'
+)
+
+
+class MixButtonState(NamedTuple):
+    """Mix state carried in a button custom_id."""
+
+    key: str
+    seed: int
+    cursor: int
+    produced: int
+    # Splits of the current history window already shown (see `MixView._next_split`)
+    shown: int = 0
+
+    def encode(self) -> str:
+        return f"{self.key}:{self.seed:x}:{self.cursor:x}:{self.produced:x}:{self.shown:x}"
+
+    @classmethod
+    def from_match(cls, match: "re.Match[str]") -> "MixButtonState":
+        return cls(match["key"], int(match["seed"], 16), int(match["cursor"], 16), int(match["produced"], 16),
+                   int(match["shown"] or "0", 16))
 
 
 class MixView(discord.ui.View):
-    """View with buttons for team reshuffling."""
+    """View with buttons for team reshuffling.
+
+    Each view owns a `SplitStream`, so every reshuffle shows a split that was
+    not shown before for this mix. The buttons are dynamic items whose
+    custom_id carries the roster key and the stream position, so any mix can
+    be rebuilt after a restart or after being evicted from `mix_views`.
+    """
 
-    def __init__(self, users: List[str], groups: List[List[str]] = None):
+    def __init__(self, key: str, roster: MixRoster, splits: SplitStream, history: Optional[PairMatrix] = None,
+                 shown: int = 0):
         super().__init__(timeout=None)
-        self.users = users
-        self.groups = groups
-
-    @discord.ui.button(label="🔮 Não tá balanceado", style=discord.ButtonStyle.primary, custom_id="reshuffle")
-    async def reshuffle_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Reshuffle teams when button is clicked."""
-        await interaction.response.edit_message(content=create_team_message(self.users, self.groups), view=self)
-
-    @discord.ui.button(label="✅ Aceito", style=discord.ButtonStyle.success, custom_id="accept")
-    async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        """Accept teams and remove buttons."""
-        await interaction.response.edit_message(view=None)
+        self.key = key
+        self.users, self.groups, self.weights = roster
+        self.splits = splits
+        self.history = history
+        self.shown = shown
+        self.last_message = None
+        # Teams the message shows: (Time A, Time B)
+        self.teams: Optional[Tuple[List[str], List[str]]] = None
+        self._refresh_buttons()
+
+    @classmethod
+    async def build(cls, users: List[str], groups: List[List[str]] = None, weights: Dict[str, float] = None,
+                    history: Optional[PairMatrix] = None) -> "MixView":
+        """Create a view for a new mix, storing its roster.
+
+        The split stream is set up through the CPU offload hook.
+        """
+        roster = MixRoster(users, groups, weights)
+        splits = await offload(SplitStream, users, groups, weights, size=len(users))
+        return cls(await mix_store.store(roster), roster, splits, history)
+
+    @classmethod
+    async def restore(cls, interaction: discord.Interaction, state: MixButtonState) -> Optional["MixView"]:
+        """Return the live view of the clicked message, rebuilding it if needed."""
+        view = mix_views.get(interaction.message.id)
+        if view is not None:
+            return view
+
+        roster = await mix_store.load(state.key)
+        if roster is None:
+            return None
+        splits = SplitStream(*roster, seed=state.seed, cursor=state.cursor, produced=state.produced)
+        view = cls(state.key, roster, splits, await guild_history(interaction.guild_id), state.shown)
+        view.last_message = interaction.message.content
+        view.teams = parse_team_message(view.last_message, roster.users)
+        mix_views.put(interaction.message.id, view)
+        return view
+
+    def _refresh_buttons(self):
+        """Rebuild the buttons so their custom_id matches the stream position."""
+        state = MixButtonState(self.key, *self.splits.state(), self.shown)
+        self.clear_items()
+        self.add_item(ReshuffleButton(state, disabled=self.splits.exhausted))
+        self.add_item(AcceptButton(state))
+
+    def _next_split(self) -> Optional[TeamSplit]:
+        """Draw the next split, preferring teammates that rarely played together.
+
+        With a teammate history (and no weights, whose stream is already
+        ordered by balance), the stream is read in windows of a few splits:
+        each reshuffle shows the least repeated split of the window not
+        shown yet (tracked in `shown`), and the stream only moves past the
+        window once all of its splits were shown, so none is skipped.
+        """
+        if not self.history or self.weights:
+            return self.splits.next()
+        _, start, produced = self.splits.state()
+        window = []
+        for _ in range(HISTORY_CANDIDATES):
+            split = self.splits.next()
+            if split is None:
+                break
+            window.append(split)
+        if not window:
+            return None
+        _, end, _ = self.splits.state()
+        exhausted = self.splits.exhausted
+
+        unseen = [i for i in range(len(window)) if not self.shown >> i & 1]
+        best = least_repeated([window[i] for i in unseen], self.history)
+        self.shown |= 1 << window.index(best)
+        if self.shown == (1 << len(window)) - 1:
+            self.splits.seek(end, produced + 1)
+            self.splits.exhausted = exhausted
+            self.shown = 0
+        else:
+            self.splits.seek(start, produced + 1)
+        return best
+
+    def next_message(self) -> str:
+        """Return the message for the next unseen split.
+
+        Once every split was shown, keeps the last split and says so.
+        """
+        split = self._next_split()
+        self._refresh_buttons()
+        if split is None:
+            if self.last_message is None:
+                return "🚨 Não consegui montar nenhuma divisão com esses jogadores! 😵"
+            return (
+                f"{self.last_message}\n\n"
+                f"🔁 Já mostrei todas as {self.splits.produced} divisões possíveis! Agora é aceitar. 😤"
+            )
+        self.teams = split.team_a, split.team_b
+        self.last_message = format_team_message(*split, weights=self.weights)
+        return self.last_message
+
+
+async def guild_history(guild_id: Optional[int]) -> Optional[PairMatrix]:
+    """Teammate history of a guild (None in DMs), loaded once and then kept in memory."""
+    return await teammate_history.load_matrix(guild_id) if guild_id else None
+
+
+def _record_ack(interaction: discord.Interaction, button: str):
+    """Record how long after the click (per Discord's timestamp) it was acknowledged."""
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    INTERACTION_ACK_LATENCY.observe(max(0.0, elapsed), button)
+
+
+async def _expired_mix(interaction: discord.Interaction):
+    """Answer a click on a mix whose roster is no longer stored."""
+    await interaction.response.edit_message(view=None)
+
+
+class ReshuffleButton(discord.ui.DynamicItem[discord.ui.Button], template=r'perna:mix:reshuffle:' + _MIX_STATE_PATTERN):
+    """"🔮 Não tá balanceado" button: shows the next unseen split."""
+
+    def __init__(self, state: MixButtonState, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label="🔮 Não tá balanceado",
+            style=discord.ButtonStyle.primary,
+            custom_id=f"perna:mix:reshuffle:{state.encode()}",
+            disabled=disabled,
+        ))
+        self.state = state
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: "re.Match[str]"):
+        return cls(MixButtonState.from_match(match))
+
+    async def callback(self, interaction: discord.Interaction):
+        """Show the next unseen split when button is clicked.
+
+        Clicks landing in quick succession are merged into a single reshuffle.
+        """
+        with interaction.client.inflight.track(), watchdog.track("button:reshuffle", self.state.produced):
+            view = await MixView.restore(interaction, self.state)
+            if view is None:
+                await _expired_mix(interaction)
+                return
+            await edit_scheduler.submit(interaction, lambda: (view.next_message(), view))
+            _record_ack(interaction, "reshuffle")
+
+
+class AcceptButton(discord.ui.DynamicItem[discord.ui.Button], template=r'perna:mix:accept:' + _MIX_STATE_PATTERN):
+    """"✅ Aceito" button: accepts the teams and removes the buttons."""
+
+    def __init__(self, state: MixButtonState):
+        super().__init__(discord.ui.Button(
+            label="✅ Aceito",
+            style=discord.ButtonStyle.success,
+            custom_id=f"perna:mix:accept:{state.encode()}",
+        ))
+        self.state = state
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: "re.Match[str]"):
+        return cls(MixButtonState.from_match(match))
+
+    async def callback(self, interaction: discord.Interaction):
+        """Accept teams, remove buttons and remember who played together."""
+        with interaction.client.inflight.track(), watchdog.track("button:accept", len(interaction.message.content)):
+            # A reshuffle edit already on its way lands first: record the teams it shows
+            content = await edit_scheduler.cancel(interaction.message.id)
+            view = mix_views.pop(interaction.message.id)
+            await interaction.response.edit_message(view=None)
+            _record_ack(interaction, "accept")
+
+            if view is None:
+                # Evicted or posted before a restart: match the message against the stored roster
+                view = await MixView.restore(interaction, self.state)
+                mix_views.pop(interaction.message.id)
+                if view is not None and content:
+                    view.teams = parse_team_message(content, view.users)
+            teams = view.teams if view is not None else None
+            if teams:
+                last_accepted[interaction.channel_id] = (interaction.message.id, teams)
+                if interaction.guild_id:
+                    await teammate_history.add_match(interaction.guild_id, teams, interaction.message.id)
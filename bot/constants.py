@@ -1,5 +1,7 @@
 """Constants used throughout the bot."""
 
+import os
+
 HELP_MESSAGE = """
 Perna Bot aqui! 🐦
 
@@ -25,6 +27,27 @@ Você invocou meus poderes, vamos ver o que posso fazer por você:
 
    ⚖️ Resultado: Times mais equilibrados, sem panelinha dominando! 🎯
 
+🏋️ **PESO:** Coloque `:peso` depois do nome para indicar o nível do jogador!
+   O bot escolhe a divisão com a menor diferença de peso entre os times.
+   Quem ficar sem peso conta como a média dos pesos informados.
+
+   **Exemplo:**
+   • `!mix João:3 Maria:5 Pedro:2 Ana:4` → Times com a soma de pesos mais próxima possível
+
+👥 **VÁRIOS TIMES:** Comece com `timesxjogadores` para eventos grandes!
+   Os agrupados continuam separados, agora entre todos os times.
+
+   **Exemplos:**
+   • `!mix 4x5 João Maria Pedro ...` → 4 times de 5
+   • `!mix 8x5` (estando em um canal de voz) → 8 times de 5 com quem estiver no canal
+
+📊 **RESULTADO:** Depois de aceitar os times, digite `!resultado A` ou `!resultado B`!
+   O bot registra quem venceu e atualiza a pontuação de cada jogador.
+
+🎮 **SALAS:** Muita gente no mesmo canal de voz? Digite `!salas`!
+   O bot divide o canal em salas de 10 (dois times de 5) e move cada time
+   para os outros canais de voz da mesma categoria.
+
 ❓ Quer ver os mandamentos do Perna?
 ➡️ Aqui está: <https://discord.com/channels/776249840938123286/1128670966449438841/1128670966449438841>
 
@@ -45,7 +68,154 @@ REPORT_MESSAGE = """
 # Channel ID for startup/shutdown messages
 NOTIFICATION_CHANNEL_ID = 1132852398654754866
 
+# Maximum time (seconds) to wait for the shutdown message before closing
+SHUTDOWN_ANNOUNCE_TIMEOUT = 5.0
+
+# Maximum time (seconds) to wait for running commands and button clicks on shutdown
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("PERNA_SHUTDOWN_DRAIN_TIMEOUT", "10"))
+
+# Connection retry backoff (seconds): first attempt scale and maximum delay
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 60.0
+
 # Command prefixes
+COMMAND_PREFIX = "!"
 HELP_COMMAND = "!help"
 MIX_COMMAND = "!mix"
 REPORT_COMMAND = "!report"
+LOBBY_COMMAND = "!salas"
+RESULT_COMMAND = "!resultado"
+
+# Slash commands (registered alongside the prefixed commands)
+SLASH_MIX_COMMAND = "mix"
+SLASH_REPORT_COMMAND = "report"
+
+# Sync the slash commands with Discord on startup. Off by default: the sync is a
+# global, rate limited call only needed when the commands change (in cluster
+# mode only cluster 0 syncs)
+SYNC_APP_COMMANDS = os.getenv("PERNA_SYNC_COMMANDS", "0") == "1"
+
+# Maximum number of autocomplete suggestions (Discord's limit)
+AUTOCOMPLETE_LIMIT = 25
+
+# Alternative names for each command
+COMMAND_ALIASES = {
+    HELP_COMMAND: ("!ajuda",),
+    MIX_COMMAND: ("!sortear",),
+    REPORT_COMMAND: ("!reportar",),
+    LOBBY_COMMAND: ("!lobbies",),
+    RESULT_COMMAND: ("!result",),
+}
+
+# Channels each command is restricted to (commands not listed work everywhere)
+COMMAND_CHANNELS = {}
+
+# Limits for `!mix <times>x<jogadores>` (e.g. `!mix 4x5 ...`)
+MAX_TEAM_COUNT = 50
+MAX_TEAM_SIZE = 50
+
+# Players per lobby for `!salas` (two teams)
+LOBBY_SIZE = 10
+
+# Voice moves for `!salas`: requests in flight, retries and retry backoff (seconds)
+MOVE_CONCURRENCY = 5
+MOVE_MAX_RETRIES = 3
+MOVE_RETRY_BASE_DELAY = 0.5
+MOVE_RETRY_MAX_DELAY = 10.0
+
+# Discord's message length limit
+MESSAGE_CHAR_LIMIT = 2000
+
+# Optional fuzzy matching of typed names to guild members (accents, typos, prefixes)
+FUZZY_NAMES = os.getenv("PERNA_FUZZY_NAMES", "0") == "1"
+
+# Minimum trigram similarity (0-1) for a fuzzy match, and trigrams shared by more names are ignored
+FUZZY_MIN_SCORE = 0.65
+FUZZY_MAX_POSTINGS = 2000
+
+# Logging: "plain" (stream handler) or "json" (JSON lines written by a background thread),
+# and per-logger sampling of records below WARNING, e.g. "discord.gateway=0.1"
+LOG_MODE = os.getenv("PERNA_LOG_MODE", "plain")
+LOG_SAMPLING = os.getenv("PERNA_LOG_SAMPLING", "")
+
+# Event loop stall watchdog: on/off, stall threshold, heartbeat interval (seconds) and samples kept
+WATCHDOG = os.getenv("PERNA_WATCHDOG", "0") == "1"
+WATCHDOG_THRESHOLD = float(os.getenv("PERNA_WATCHDOG_THRESHOLD", "0.25"))
+WATCHDOG_INTERVAL = 0.05
+WATCHDOG_SAMPLES = 50
+
+# Run CPU-heavy mix work in a worker thread for rosters of at least OFFLOAD_MIN_SIZE players
+OFFLOAD_CPU = os.getenv("PERNA_OFFLOAD_CPU", "0") == "1"
+OFFLOAD_MIN_SIZE = 50
+
+# Local storage for mix rosters, so buttons keep working after a restart
+DATA_DIR = os.getenv("PERNA_DATA_DIR", "data")
+MIX_STORE_PATH = os.path.join(DATA_DIR, "mixes.sqlite3")
+
+# Discord keeps a message's buttons clickable for as long as the message exists,
+# so rosters are deleted MIX_RETENTION seconds after the mix was last posted (a
+# click on an older mix just removes its buttons). Swept every MIX_SWEEP_INTERVAL seconds
+MIX_RETENTION = float(os.getenv("PERNA_MIX_RETENTION_DAYS", "30")) * 86400
+MIX_SWEEP_INTERVAL = 3600.0
+
+# Local history of accepted mixes, used to avoid repeating teammates
+HISTORY_STORE_PATH = os.path.join(DATA_DIR, "history.sqlite3")
+
+# Candidate splits compared against the history for each mix (at most 64: the
+# ones already shown are tracked in the button's custom_id)
+HISTORY_CANDIDATES = min(64, int(os.getenv("PERNA_HISTORY_CANDIDATES", "16")))
+
+# Player ratings from `!resultado` (Elo): store, K-factor, starting rating and write-behind interval (seconds)
+RATING_STORE_PATH = os.path.join(DATA_DIR, "ratings.sqlite3")
+RATING_K = 32.0
+RATING_INITIAL = 1000.0
+RATING_FLUSH_INTERVAL = 5.0
+
+# Moderation reports (`!report`): append-only log, channel that receives the digests (0 disables
+# them) and seconds between digests
+REPORT_LOG_PATH = os.path.join(DATA_DIR, "reports.jsonl")
+MODERATION_CHANNEL_ID = int(os.getenv("PERNA_MODERATION_CHANNEL", "0"))
+REPORT_DIGEST_INTERVAL = float(os.getenv("PERNA_REPORT_DIGEST_INTERVAL", "300"))
+
+# Repeated reports of a player by the same reporter within this window (seconds) are dropped
+REPORT_DEDUPE_WINDOW = 600.0
+
+# Report writes: seconds to gather a batch (one fsync per batch), batch size and queue bound
+REPORT_FLUSH_INTERVAL = 1.0
+REPORT_BATCH_SIZE = 1000
+REPORT_QUEUE_SIZE = 10_000
+
+# Maximum number of mix views kept in memory (older ones are rebuilt from the store)
+MIX_VIEW_CACHE_SIZE = int(os.getenv("PERNA_MIX_VIEW_CACHE_SIZE", "500"))
+
+# Log import times and startup milestones (login, gateway READY, first `!mix`)
+STARTUP_PROFILE = os.getenv("PERNA_STARTUP_PROFILE", "0") == "1"
+
+# Maximum time (seconds) to wait for one guild's members when filling the member cache after startup
+MEMBER_CHUNK_TIMEOUT = 60.0
+
+# Gateway profile: "full" (all intents, full member cache) or "lean" (message content,
+# guild voice states and the members seen in voice or mentions only)
+GATEWAY_PROFILE = os.getenv("PERNA_GATEWAY_PROFILE", "full")
+
+# Clicks on the same message within this window (seconds) are merged into one edit
+CLICK_COALESCE_WINDOW = float(os.getenv("PERNA_CLICK_COALESCE_WINDOW", "0.4"))
+
+# Message edits allowed per channel: sustained rate (per second) and burst size
+CHANNEL_EDIT_RATE = 1.0
+CHANNEL_EDIT_BURST = 5
+
+# Sharding: one process with every shard ("PERNA_AUTO_SHARD=1"), or a cluster of
+# worker processes each running a slice of the shards ("PERNA_CLUSTERS=N")
+AUTO_SHARD = os.getenv("PERNA_AUTO_SHARD", "0") == "1"
+CLUSTER_COUNT = int(os.getenv("PERNA_CLUSTERS", "0"))
+# Total shard count (0 = use Discord's recommendation)
+SHARD_COUNT = int(os.getenv("PERNA_SHARD_COUNT", "0"))
+
+# Cluster workers report their health every CLUSTER_HEALTH_INTERVAL seconds and are
+# restarted after CLUSTER_HEALTH_TIMEOUT seconds without a report
+CLUSTER_HEALTH_INTERVAL = 5.0
+CLUSTER_HEALTH_TIMEOUT = 60.0
+
+# Port for the /healthz and /metrics HTTP endpoint (0 disables it)
+HEALTH_PORT = int(os.getenv("PORT", "0"))
@@ -0,0 +1,290 @@
+"""Fuzzy resolution of typed player names to guild members.
+
+Each guild gets a trigram index over the accent-folded display names of its
+members, built in a worker thread when the guild becomes available (and on
+first use) and kept current from member events. A typed
+token resolves to a member when it matches a folded name exactly
+("joao" -> "João") or when enough of its trigrams match one name clearly
+better than any other ("mariq" -> "Maria"). A token that starts exactly one
+name also resolves to it ("pedr" -> "Pedro"). Members sharing a display name
+count as one name: "joao" resolves to "João" however many Joãos there are.
+"""
+
+import asyncio
+import logging
+import math
+import unicodedata
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import discord
+
+from .constants import FUZZY_MAX_POSTINGS, FUZZY_MIN_SCORE, FUZZY_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip accents ("João" -> "joao")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _trigrams(folded: str) -> Set[str]:
+    padded = f"  {folded} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Trigram index over the display names of one guild."""
+
+    def __init__(self, members: Iterable[Tuple[int, str]] = ()):
+        self._names: Dict[int, str] = {}
+        self._folded: Dict[int, str] = {}
+        # Folded name -> display names it folds from, with how many members use each
+        self._exact: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._sorted: List[Tuple[str, int]] = [(self._insert(member_id, name), member_id) for member_id, name in members]
+        self._sorted.sort()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, member_id: int, display_name: str):
+        """Index a member, or re-index them after a rename."""
+        if self._names.get(member_id) == display_name:
+            return
+        self.remove(member_id)
+        insort(self._sorted, (self._insert(member_id, display_name), member_id))
+
+    def _insert(self, member_id: int, display_name: str) -> str:
+        folded = fold_accents(display_name)
+        self._names[member_id] = display_name
+        self._folded[member_id] = folded
+        spellings = self._exact.setdefault(folded, {})
+        spellings[display_name] = spellings.get(display_name, 0) + 1
+        postings = self._postings
+        for gram in _trigrams(folded):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = {member_id}
+            else:
+                ids.add(member_id)
+        return folded
+
+    def remove(self, member_id: int):
+        folded = self._folded.pop(member_id, None)
+        if folded is None:
+            return
+        display_name = self._names.pop(member_id)
+        index = bisect_left(self._sorted, (folded, member_id))
+        if index < len(self._sorted) and self._sorted[index] == (folded, member_id):
+            del self._sorted[index]
+        spellings = self._exact[folded]
+        spellings[display_name] -= 1
+        if not spellings[display_name]:
+            del spellings[display_name]
+            if not spellings:
+                del self._exact[folded]
+        for gram in _trigrams(folded):
+            ids = self._postings[gram]
+            ids.discard(member_id)
+            if not ids:
+                del self._postings[gram]
+
+    def resolve(self, token: str) -> Optional[str]:
+        """Return the display name a typed token refers to, or None if unsure.
+
+        Args:
+            token: Name as typed
+
+        Returns:
+            Display name of the single best match scoring at least
+            FUZZY_MIN_SCORE (Dice coefficient over trigrams), or None
+        """
+        folded = fold_accents(token)
+        spellings = self._exact.get(folded)
+        if spellings:
+            return self._spelling(folded) if len(spellings) == 1 else None
+
+        if len(folded) >= 3:
+            match = self._unique_prefix(folded)
+            if match is not None:
+                return self._spelling(match)
+
+        grams = _trigrams(folded)
+        size = len(grams)
+        # Trigrams shared by too many names (" ma", "ia ") say little and cost a lot
+        postings = sorted(
+            (ids for ids in map(self._postings.get, grams) if ids and len(ids) <= FUZZY_MAX_POSTINGS), key=len
+        )
+        # A name scoring FUZZY_MIN_SCORE shares at least this many trigrams with the
+        # token, so it appears in at least one of the rarest len(postings) - needed + 1
+        needed = max(2, math.ceil(FUZZY_MIN_SCORE * size / (2 - FUZZY_MIN_SCORE)))
+        if needed > len(postings):
+            return None
+        candidates = set().union(*postings[:len(postings) - needed + 1])
+        # Names with too many or too few trigrams can't reach FUZZY_MIN_SCORE whatever they share
+        shortest = needed - 1
+        longest = size * (2 - FUZZY_MIN_SCORE) / FUZZY_MIN_SCORE - 1
+
+        best_name, best_score, runner_up = None, 0.0, 0.0
+        names = self._names
+        folded_names = self._folded
+        for member_id in candidates:
+            length = len(folded_names[member_id])
+            if length < shortest or length > longest:
+                continue
+            shared = 0
+            for ids in postings:
+                if member_id in ids:
+                    shared += 1
+            score = 2 * shared / (size + length + 1)
+            if score < FUZZY_MIN_SCORE or score <= runner_up:
+                continue
+            name = names[member_id]
+            if score > best_score:
+                if name != best_name:
+                    runner_up = best_score
+                best_name, best_score = name, score
+            elif name != best_name:
+                runner_up = score
+        if best_name is None or best_score == runner_up:
+            return None
+        return best_name
+
+    def _spelling(self, folded: str) -> Optional[str]:
+        """Return the display name all members folding to `folded` share, or None if they differ."""
+        spellings = self._exact[folded]
+        return next(iter(spellings)) if len(spellings) == 1 else None
+
+    def _unique_prefix(self, folded: str) -> Optional[str]:
+        """Return the only folded name starting with `folded`, or None if there are none or several."""
+        names = self._sorted
+        index = bisect_left(names, (folded,))
+        if index >= len(names) or not names[index][0].startswith(folded):
+            return None
+        match = names[index][0]
+        # Members sharing the folded name sit next to each other
+        index += sum(self._exact[match].values())
+        if index < len(names) and names[index][0].startswith(folded):
+            return None
+        return match
+
+    def resolver(self) -> Callable[[str], str]:
+        """Return a function mapping a typed name to a member's display name (or itself)."""
+        cache: Dict[str, str] = {}
+
+        def resolve(name: str) -> str:
+            resolved = cache.get(name)
+            if resolved is None:
+                resolved = cache[name] = self.resolve(name) or name
+            return resolved
+
+        return resolve
+
+
+def _index_members(members: Sequence[discord.Member]) -> TrigramIndex:
+    return TrigramIndex((member.id, member.display_name) for member in members if not member.bot)
+
+
+class FuzzyNameResolver:
+    """Per-guild trigram indexes, built off the event loop and updated from member events.
+
+    While a guild's index is rebuilt (after a reconnect or once its members
+    are cached), the previous one keeps serving, and member events are
+    replayed on the new one before it replaces it.
+
+    Args:
+        enabled: Build indexes ahead of time, when guilds become available
+    """
+
+    def __init__(self, enabled: bool = FUZZY_NAMES):
+        self.enabled = enabled
+        self._guilds: Dict[int, TrigramIndex] = {}
+        self._builds: Dict[int, "asyncio.Task[TrigramIndex]"] = {}
+        # Member updates (ID, new name or None if removed) seen during a build
+        self._backlog: Dict[int, List[Tuple[int, Optional[str]]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fuzzy")
+
+    def _build(self, guild: discord.Guild) -> "asyncio.Task[TrigramIndex]":
+        self._backlog[guild.id] = []
+        build = self._builds[guild.id] = asyncio.create_task(self._run_build(guild.id, guild.members))
+        return build
+
+    async def _run_build(self, guild_id: int, members: List[discord.Member]) -> TrigramIndex:
+        try:
+            index = await asyncio.get_running_loop().run_in_executor(self._executor, _index_members, members)
+        except Exception:
+            if self._builds.get(guild_id) is asyncio.current_task():
+                # Let the next `index()` start over; a previous index keeps serving
+                del self._builds[guild_id]
+                del self._backlog[guild_id]
+            raise
+        if self._builds.get(guild_id) is not asyncio.current_task():
+            # Superseded by a newer build, or the guild was dropped
+            return index
+        for member_id, name in self._backlog.pop(guild_id):
+            if name is None:
+                index.remove(member_id)
+            else:
+                index.add(member_id, name)
+        del self._builds[guild_id]
+        self._guilds[guild_id] = index
+        return index
+
+    def refresh(self, guild: discord.Guild):
+        """Rebuild a guild's index in the background (if enabled), e.g. after events may have been missed."""
+        if self.enabled:
+            self._build(guild)
+        else:
+            self.drop_guild(guild.id)
+
+    async def index(self, guild: discord.Guild) -> TrigramIndex:
+        """Return the guild's index, waiting for it to be built on first use."""
+        index = self._guilds.get(guild.id)
+        while index is None:
+            build = self._builds.get(guild.id) or self._build(guild)
+            await build
+            index = self._guilds.get(guild.id)
+        return index
+
+    async def resolver(self, guild: discord.Guild) -> Optional[Callable[[str], str]]:
+        """Return a function mapping a typed name to a member's display name (or itself).
+
+        Returns None if the guild's index could not be built, so names are
+        used as typed.
+        """
+        try:
+            index = await self.index(guild)
+        except Exception as e:
+            logger.warning("[FUZZY] Could not index the members of guild %s: %r", guild.id, e)
+            return None
+        return index.resolver()
+
+    def _update(self, guild_id: int, member_id: int, name: Optional[str]):
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            if name is None:
+                index.remove(member_id)
+            else:
+                index.add(member_id, name)
+        backlog = self._backlog.get(guild_id)
+        if backlog is not None:
+            backlog.append((member_id, name))
+
+    def add(self, member: discord.Member):
+        if not member.bot:
+            self._update(member.guild.id, member.id, member.display_name)
+
+    def remove(self, member: discord.Member):
+        self._update(member.guild.id, member.id, None)
+
+    def drop_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self._builds.pop(guild_id, None)
+        self._backlog.pop(guild_id, None)
+
+
+fuzzy_names = FuzzyNameResolver()
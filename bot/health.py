@@ -0,0 +1,126 @@
+"""Health check and metrics HTTP endpoint, served inside the bot's event loop."""
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from .metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+
+class HealthServer:
+    """Serve `/healthz` and `/metrics` for a bot.
+
+    `/healthz` answers 200 once the gateway connection is ready and 503
+    otherwise, so an orchestrator can tell a connecting or shutting down bot
+    from a healthy one.
+
+    Args:
+        bot: The running PernaBot
+        port: TCP port to listen on
+        host: Interface to bind
+    """
+
+    def __init__(self, bot, port: int, host: str = "0.0.0.0"):
+        self.bot = bot
+        self.port = port
+        self.host = host
+        self._runner: Optional[web.AppRunner] = None
+
+        app = web.Application()
+        app.router.add_get("/healthz", self.healthz)
+        app.router.add_get("/metrics", self.metrics)
+        self.app = app
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        bot = self.bot
+        ready = bot.is_ready() and not bot.is_closed() and not bot.inflight.closing
+        latency = bot.latency
+        body = {
+            "status": "ok" if ready else "unavailable",
+            "ready": bot.is_ready(),
+            "closing": bot.inflight.closing,
+            "latency": latency if latency == latency else None,  # NaN before the first heartbeat
+            "guilds": len(bot.guilds),
+        }
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info("[HTTP] Serving /healthz and /metrics on port %s", self.port)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class ClusterHealthServer(HealthServer):
+    """Serve `/healthz` and `/metrics` for a cluster launcher.
+
+    `/healthz` answers 200 once every cluster is alive and ready, and
+    `/metrics` merges the metrics reported by the workers, labelled with
+    their cluster.
+
+    Args:
+        launcher: The running ClusterLauncher
+        port: TCP port to listen on
+        host: Interface to bind
+    """
+
+    def __init__(self, launcher, port: int, host: str = "0.0.0.0"):
+        super().__init__(None, port, host)
+        self.launcher = launcher
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        body = self.launcher.health()
+        ready = not self.launcher.stopping and all(c["alive"] and c.get("ready") for c in body["clusters"])
+        body["status"] = "ok" if ready else "unavailable"
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.launcher.metrics(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+
+def register_bot_metrics(bot):
+    """Register the gauges computed from the bot state at scrape time."""
+    from .mixstore import mix_views
+    from .throttle import edit_scheduler
+
+    def latency() -> float:
+        value = bot.latency
+        return value if value == value else 0.0
+
+    registry.register(Gauge(
+        "perna_gateway_latency_seconds", "Gateway heartbeat latency.", callback=latency))
+    registry.register(Gauge(
+        "perna_event_loop_last_lag_seconds", "Most recent event loop lag probe.",
+        callback=lambda: bot.loop_lag.last_lag))
+    registry.register(Gauge(
+        "perna_cached_members", "Members held in the member cache.",
+        callback=lambda: sum(len(guild.members) for guild in bot.guilds)))
+    registry.register(Gauge(
+        "perna_guilds", "Guilds the bot is in.", callback=lambda: len(bot.guilds)))
+    registry.register(Gauge(
+        "perna_mix_views_active", "Mix views held in memory.", callback=lambda: len(mix_views)))
+    registry.register(Counter(
+        "perna_mix_views_evicted_total", "Mix views evicted from the in-memory cache.",
+        callback=lambda: mix_views.evictions))
+    registry.register(Gauge(
+        "perna_inflight_handlers", "Command and button handlers currently running.",
+        callback=lambda: bot.inflight.active))
+    registry.register(Counter(
+        "perna_reshuffle_clicks_total", "Reshuffle clicks received.",
+        callback=lambda: edit_scheduler.clicks))
+    registry.register(Counter(
+        "perna_reshuffle_clicks_merged_total", "Reshuffle clicks merged into an already pending edit.",
+        callback=lambda: edit_scheduler.merged_clicks))
@@ -0,0 +1,221 @@
+"""History of accepted mixes and how often each pair of players shared a team.
+
+Every split accepted through the "✅ Aceito" button is appended to a local
+SQLite store. Alongside the append-only match log, a per-guild pair table
+keeps how many times two players were teammates; it is updated in the same
+transaction, so loading a guild's matrix never replays the match log.
+
+The bot reads and writes through the async methods, which run the SQLite
+work in a worker thread and keep each loaded matrix cached in memory; the
+synchronous ones are for scripts and benchmarks.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .constants import HISTORY_STORE_PATH
+
+
+def _pairs(team: Iterable[str]) -> Iterable[Tuple[str, str]]:
+    """Unordered pairs of a team, normalized to lowercase and sorted."""
+    names = sorted({name.lower() for name in team})
+    return itertools.combinations(names, 2)
+
+
+class PairMatrix:
+    """How many times each pair of players was on the same team, for one guild."""
+
+    def __init__(self, counts: Optional[Dict[Tuple[str, str], int]] = None):
+        self.counts = counts or {}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add_team(self, team: Sequence[str]):
+        for pair in _pairs(team):
+            self.counts[pair] = self.counts.get(pair, 0) + 1
+
+    def team_penalty(self, team: Sequence[str]) -> int:
+        """Sum of past co-occurrences over every pair in the team."""
+        counts = self.counts
+        if not counts:
+            return 0
+        return sum(counts.get(pair, 0) for pair in _pairs(team))
+
+    def split_penalty(self, team_a: Sequence[str], team_b: Sequence[str]) -> int:
+        """Penalty of a split: how often its teammates already played together."""
+        return self.team_penalty(team_a) + self.team_penalty(team_b)
+
+
+class TeammateHistory:
+    """Append-only SQLite store of accepted splits, with per-guild pair matrices.
+
+    Args:
+        path: Path of the SQLite database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        # Loaded matrices, only changed from the event loop (or by the sync methods)
+        self._matrices: Dict[int, PairMatrix] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Used from the worker thread, or from the caller's thread by the sync methods
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS matches ("
+                "id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, teams TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pairs ("
+                "guild_id INTEGER NOT NULL, a TEXT NOT NULL, b TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (guild_id, a, b)) WITHOUT ROWID"
+            )
+            # Stores created before matches were keyed by their mix message
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(matches)")}
+            if "mix_id" not in columns:
+                self._conn.execute("ALTER TABLE matches ADD COLUMN mix_id INTEGER")
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS matches_mix_id ON matches (mix_id)")
+        return self._conn
+
+    def _load(self, guild_id: int) -> PairMatrix:
+        rows = self._connect().execute("SELECT a, b, count FROM pairs WHERE guild_id = ?", (guild_id,))
+        return PairMatrix({(a, b): count for a, b, count in rows})
+
+    def _apply(self, guild_id: int, increments: Dict[Tuple[str, str], int]):
+        """Add written pair counts to the guild's matrix, if it is loaded.
+
+        A matrix loaded later reads them from the store instead.
+        """
+        matrix = self._matrices.get(guild_id)
+        if matrix is not None:
+            for pair, count in increments.items():
+                matrix.counts[pair] = matrix.counts.get(pair, 0) + count
+
+    def matrix(self, guild_id: int) -> PairMatrix:
+        """Return the pair matrix of a guild, loading it on first use."""
+        matrix = self._matrices.get(guild_id)
+        if matrix is None:
+            matrix = self._matrices[guild_id] = self._load(guild_id)
+        return matrix
+
+    async def load_matrix(self, guild_id: int) -> PairMatrix:
+        """Like `matrix`, loading the matrix in the worker thread."""
+        matrix = self._matrices.get(guild_id)
+        if matrix is None:
+            loaded = await asyncio.get_running_loop().run_in_executor(self._executor, self._load, guild_id)
+            # Another coroutine may have loaded it meanwhile. Writes finishing
+            # after this load started only reach the matrix once it is cached,
+            # since their callbacks run in completion order
+            matrix = self._matrices.setdefault(guild_id, loaded)
+        return matrix
+
+    def _write_match(self, guild_id: int, teams: Sequence[Sequence[str]],
+                     mix_id: Optional[int]) -> Optional[Dict[Tuple[str, str], int]]:
+        if mix_id is not None and self.accepted_teams(mix_id) is not None:
+            return None
+        return self._write(guild_id, [teams], [mix_id])
+
+    def record(self, guild_id: int, teams: Sequence[Sequence[str]], mix_id: Optional[int] = None):
+        """Append an accepted split and count its teammates.
+
+        Args:
+            guild_id: Guild the mix was played in
+            teams: Players of each team
+            mix_id: ID of the mix message (a mix is only recorded once)
+        """
+        increments = self._write_match(guild_id, teams, mix_id)
+        if increments is not None:
+            self._apply(guild_id, increments)
+
+    async def add_match(self, guild_id: int, teams: Sequence[Sequence[str]], mix_id: Optional[int] = None) -> bool:
+        """Like `record`, writing in the worker thread.
+
+        Returns:
+            False if the mix was already recorded
+        """
+        increments = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._write_match, guild_id, teams, mix_id)
+        if increments is None:
+            return False
+        self._apply(guild_id, increments)
+        return True
+
+    def record_many(self, guild_id: int, matches: Sequence[Sequence[Sequence[str]]],
+                    mix_ids: Optional[Sequence[Optional[int]]] = None):
+        """Append several accepted splits in one transaction.
+
+        Args:
+            guild_id: Guild the mixes were played in
+            matches: Teams of each match
+            mix_ids: ID of each match's mix message, if known
+        """
+        self._apply(guild_id, self._write(guild_id, matches, mix_ids))
+
+    def _write(self, guild_id: int, matches: Sequence[Sequence[Sequence[str]]],
+               mix_ids: Optional[Sequence[Optional[int]]]) -> Dict[Tuple[str, str], int]:
+        """Write matches and their pair counts, returning the counts added."""
+        now = time.time()
+        increments: Dict[Tuple[str, str], int] = {}
+        for teams in matches:
+            for team in teams:
+                for pair in _pairs(team):
+                    increments[pair] = increments.get(pair, 0) + 1
+
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO matches (guild_id, teams, created_at, mix_id) VALUES (?, ?, ?, ?)",
+                [
+                    (guild_id, json.dumps([list(team) for team in teams], ensure_ascii=False), now, mix_id)
+                    for teams, mix_id in zip(matches, mix_ids or [None] * len(matches))
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO pairs (guild_id, a, b, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, a, b) DO UPDATE SET count = count + excluded.count",
+                [(guild_id, a, b, count) for (a, b), count in increments.items()],
+            )
+        return increments
+
+    def accepted_teams(self, mix_id: int) -> Optional[Tuple[List[str], ...]]:
+        """Return the teams of an accepted mix, or None if that mix was never accepted."""
+        row = self._connect().execute("SELECT teams FROM matches WHERE mix_id = ?", (mix_id,)).fetchone()
+        return tuple(json.loads(row[0])) if row else None
+
+    async def load_accepted_teams(self, mix_id: int) -> Optional[Tuple[List[str], ...]]:
+        """Like `accepted_teams`, reading in the worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.accepted_teams, mix_id)
+
+    def match_count(self, guild_id: int) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM matches WHERE guild_id = ?", (guild_id,)).fetchone()[0]
+
+
+def least_repeated(candidates: Iterable[Tuple[List[str], List[str], List[str]]],
+                   matrix: PairMatrix) -> Tuple[List[str], List[str], List[str]]:
+    """Pick the candidate split whose teammates played together the least (first one on ties)."""
+    best, best_penalty = None, None
+    for candidate in candidates:
+        penalty = matrix.split_penalty(candidate[0], candidate[1])
+        if best is None or penalty < best_penalty:
+            best, best_penalty = candidate, penalty
+            if penalty == 0:
+                break
+    return best
+
+
+teammate_history = TeammateHistory(HISTORY_STORE_PATH)
@@ -0,0 +1,89 @@
+"""Process lifecycle helpers: in-flight work tracking, shutdown hooks and retry backoff."""
+
+import asyncio
+import logging
+import random
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Coroutines writing pending data on shutdown, registered by the modules owning it
+_closers: List[Tuple[str, Callable[[], Awaitable[None]]]] = []
+
+
+class InflightTracker:
+    """Count command and interaction handlers that are still running.
+
+    Handlers run inside `track()`; on shutdown, `close()` stops new work from
+    being accepted and `drain()` waits for the running handlers to finish.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.closing = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self._idle.set()
+
+    def close(self):
+        """Stop accepting new work."""
+        self.closing = True
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no handler is running, up to `timeout` seconds.
+
+        Returns:
+            True if everything finished, False if the deadline was hit
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def on_close(name: str, closer: Callable[[], Awaitable[None]]):
+    """Have `run_closers()` await `closer` when the bot shuts down.
+
+    Modules keeping data in memory (possibly loaded lazily, on first use)
+    register here instead of the client importing them.
+
+    Args:
+        name: What is closed, for the logs
+        closer: Coroutine function to call
+    """
+    _closers.append((name, closer))
+
+
+async def run_closers():
+    """Await the registered closers in order; a failing one is logged and the others still run."""
+    for name, closer in _closers:
+        try:
+            await closer()
+        except Exception as e:
+            logger.warning("[SHUTDOWN] Could not close %s: %r", name, e)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Return a "full jitter" exponential backoff delay.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Delay scale for the first attempt, in seconds
+        cap: Maximum delay, in seconds
+
+    Returns:
+        Random delay between 0 and min(cap, base * 2 ** attempt)
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,181 @@
+"""Splitting one voice channel into several lobbies and moving the players."""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import discord
+
+from .constants import LOBBY_SIZE, MOVE_CONCURRENCY, MOVE_MAX_RETRIES, MOVE_RETRY_BASE_DELAY, MOVE_RETRY_MAX_DELAY
+from .lifecycle import backoff_delay
+from .teams import TeamLayout, assign_teams
+
+logger = logging.getLogger(__name__)
+
+
+class LobbyPlan(NamedTuple):
+    """Teams of each lobby and who stays in the original channel."""
+
+    lobbies: List[Tuple[List[str], List[str]]]
+    waitlist: List[str]
+
+
+class MoveReport(NamedTuple):
+    """Outcome of a batch of voice moves."""
+
+    moved: int
+    failed: List[str]
+    retries: int
+    elapsed: float
+
+
+def plan_lobbies(players: List[str], lobby_size: int = LOBBY_SIZE) -> LobbyPlan:
+    """Partition a voice roster into lobbies of two teams.
+
+    Every full group of `lobby_size` players becomes a lobby; with fewer
+    players than that, a single incomplete lobby is formed. Players that do
+    not fill a lobby stay out.
+
+    Args:
+        players: Display names in the voice channel
+        lobby_size: Players per lobby (both teams)
+
+    Returns:
+        The lobby plan
+    """
+    lobby_count = max(1, len(players) // lobby_size)
+    teams, waitlist = assign_teams(players, TeamLayout(lobby_count * 2, lobby_size // 2))
+    lobbies = [(teams[i], teams[i + 1]) for i in range(0, len(teams), 2)]
+    return LobbyPlan(lobbies, waitlist)
+
+
+def lobby_targets(source: discord.VoiceChannel) -> List[discord.VoiceChannel]:
+    """Voice channels players can be moved to: the other channels in the source's category."""
+    guild = source.guild
+    return [
+        channel for channel in guild.voice_channels
+        if channel.category_id == source.category_id and channel.id != source.id
+    ]
+
+
+def _retry_after(error: Union[discord.HTTPException, discord.RateLimited]) -> Optional[float]:
+    """Return how long Discord asked us to wait, if the error is retryable.
+
+    `discord.RateLimited` is not an HTTPException: discord.py raises it
+    instead of waiting when a rate limit is longer than `max_ratelimit_timeout`.
+    """
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    if error.status == 429:
+        header = getattr(error.response, "headers", {}).get("Retry-After")
+        return float(header) if header else 0.0
+    if error.status >= 500:
+        return 0.0
+    return None
+
+
+class VoiceMover:
+    """Move members between voice channels through a bounded task pool.
+
+    Member moves share one rate limit bucket per guild, so only
+    `concurrency` requests are in flight at a time. Rate-limited and
+    server-side failures are retried with jittered backoff, never waiting
+    less than the `Retry-After` Discord sent.
+    """
+
+    def __init__(self, concurrency: int = MOVE_CONCURRENCY, max_retries: int = MOVE_MAX_RETRIES,
+                 base_delay: float = MOVE_RETRY_BASE_DELAY, max_delay: float = MOVE_RETRY_MAX_DELAY,
+                 sleep: Callable[[float], "asyncio.Future"] = asyncio.sleep,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._clock = clock
+
+    async def _move(self, semaphore: asyncio.Semaphore, member: discord.Member,
+                    channel: discord.VoiceChannel, stats: Dict[str, int]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    await member.move_to(channel)
+                    return True
+                except (discord.HTTPException, discord.RateLimited) as e:
+                    retry_after = _retry_after(e)
+                    if retry_after is None or attempt == self.max_retries:
+                        logger.warning("[LOBBY] Could not move %s: %s", member.display_name, e)
+                        return False
+            # Wait outside the semaphore so other moves keep going
+            stats["retries"] += 1
+            await self._sleep(max(retry_after, backoff_delay(attempt, self.base_delay, self.max_delay)))
+        return False
+
+    async def move_all(self, moves: Sequence[Tuple[discord.Member, discord.VoiceChannel]]) -> MoveReport:
+        """Move every member to its target channel.
+
+        Args:
+            moves: (member, target channel) pairs
+
+        Returns:
+            Report with the number of members moved, who failed, retries and wall-clock time
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"retries": 0}
+        started = self._clock()
+        results = await asyncio.gather(
+            *(self._move(semaphore, member, channel, stats) for member, channel in moves), return_exceptions=True
+        )
+        elapsed = self._clock() - started
+        failed = []
+        for (member, _), result in zip(moves, results):
+            if isinstance(result, BaseException):
+                logger.error("[LOBBY] Error moving %s: %r", member.display_name, result)
+            if result is not True:
+                failed.append(member.display_name)
+        return MoveReport(len(moves) - len(failed), failed, stats["retries"], elapsed)
+
+
+def _members_by_name(members: Sequence[discord.Member]) -> Dict[str, List[discord.Member]]:
+    """Map display names back to voice members (names may repeat)."""
+    by_name: Dict[str, List[discord.Member]] = {}
+    for member in members:
+        if not member.bot:
+            by_name.setdefault(member.display_name, []).append(member)
+    return by_name
+
+
+def plan_moves(plan: LobbyPlan, members: Sequence[discord.Member],
+               targets: Sequence[discord.VoiceChannel]) -> List[Tuple[discord.Member, discord.VoiceChannel]]:
+    """Pair each lobby player with the voice channel of their team.
+
+    Team A of lobby N goes to `targets[2N]` and team B to `targets[2N + 1]`.
+    """
+    by_name = _members_by_name(members)
+    moves = []
+    channels = iter(targets)
+    for team_a, team_b in plan.lobbies:
+        for team in (team_a, team_b):
+            channel = next(channels)
+            for name in team:
+                candidates = by_name.get(name)
+                if candidates:
+                    moves.append((candidates.pop(), channel))
+    return moves
+
+
+def format_lobby_message(plan: LobbyPlan, targets: Sequence[discord.VoiceChannel]) -> List[str]:
+    """Format the lobby plan, one block per lobby (see `teams.paginate`)."""
+    blocks = []
+    channels = iter(targets)
+    for index, (team_a, team_b) in enumerate(plan.lobbies, start=1):
+        channel_a, channel_b = next(channels), next(channels)
+        blocks.append(
+            f"# Sala {index} 🎮\n"
+            f"**Time A** → {channel_a.mention}\n {', '.join(team_a)}\n"
+            f"**Time B** → {channel_b.mention}\n {', '.join(team_b)}"
+        )
+    if plan.waitlist:
+        blocks.append(f"# Lista de Espera ⏳\n {', '.join(plan.waitlist)}")
+    return blocks
@@ -0,0 +1,150 @@
+"""Logging setup: the classic stream handler, or JSON lines written by a background thread.
+
+In "json" mode every record goes through a queue to a `QueueListener`
+thread, which formats it and writes it, so the event loop only pays for
+creating the record and putting it on the queue. Messages use lazy
+%-formatting, so arguments are only rendered on the listener thread, and
+noisy loggers can be sampled before they even reach the queue.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import warnings
+from typing import Any, Dict, Optional
+
+from .constants import LOG_MODE, LOG_SAMPLING
+
+# Structured fields that may be attached with `extra=`
+STRUCTURED_FIELDS = ("guild", "channel", "command", "latency_ms")
+
+_PLAIN_FORMAT = '%(asctime)s - {prefix}%(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Args:
+        fields: Fields added to every line (e.g. the cluster ID)
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.fields = fields or {}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            **self.fields,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records below WARNING from some loggers.
+
+    Args:
+        rates: Logger name -> fraction of records kept (0-1); child loggers inherit the rate
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, Optional[float]] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        rate = self._resolved.get(name, False)
+        if rate is False:
+            rate = None
+            parts = name.split(".")
+            for end in range(len(parts), 0, -1):
+                rate = self.rates.get(".".join(parts[:end]))
+                if rate is not None:
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock `prepare` renders the message on the calling thread; records
+    are only shared between threads of this process here, so they can be
+    queued as they are.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """Parse "logger=rate,logger=rate" (e.g. "discord.gateway=0.1")."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(mode: str = LOG_MODE, sampling: str = LOG_SAMPLING, stream=None,
+                  cluster: Optional[int] = None) -> Optional[logging.handlers.QueueListener]:
+    """Configure the root logger, replacing any handler already set.
+
+    Args:
+        mode: "plain" for the classic stream handler, "json" for queued JSON lines
+        sampling: Per-logger sampling rates (see `parse_sampling`)
+        stream: Output stream (defaults to stderr)
+        cluster: ID of the cluster worker logging, shown on every line
+
+    Returns:
+        The started queue listener in "json" mode (stop it on exit), else None
+    """
+    stream = stream or sys.stderr
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+
+    if mode != "json":
+        handler = logging.StreamHandler(stream)
+        prefix = f"cluster {cluster} - " if cluster is not None else ""
+        handler.setFormatter(logging.Formatter(_PLAIN_FORMAT.format(prefix=prefix)))
+        listener = None
+    else:
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter({"cluster": cluster} if cluster is not None else None))
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _DeferredQueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, output)
+        listener.start()
+
+    rates = parse_sampling(sampling)
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+    root.addHandler(handler)
+
+    # Set discord.py logging to INFO to see connection issues
+    for name in ("discord", "discord.gateway", "discord.client"):
+        logging.getLogger(name).setLevel(logging.INFO)
+    # Filter out ResourceWarning about unclosed sockets (these are managed by discord.py)
+    warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed.*")
+    return listener
@@ -0,0 +1,180 @@
+"""Minimal Prometheus-style metrics registry.
+
+Only what the bot needs: counters, gauges (optionally computed at scrape
+time) and histograms, each with optional labels, rendered in the Prometheus
+text exposition format.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self, extra: str = "") -> List[str]:
+        """Render the metric; `extra` is a label pair added to every sample (e.g. 'cluster="0"')."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter, incremented in code or read from a callback at scrape time."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self, extra: str = "") -> List[str]:
+        values = {(): self.callback()} if self.callback else self._values
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labels, key, extra)} {value}" for key, value in values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed bucket upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            # Per-bucket counts, then +Inf count and sum
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, extra: str = "") -> List[str]:
+        lines = self._header()
+        for key, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                bucket_labels = _format_labels(self.labels, key, f"{extra},{le}" if extra else le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key, extra)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key, extra)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self, extra: str = "") -> Dict[str, List[str]]:
+        """Render every metric separately, keyed by name (see `merge_collected`)."""
+        return {name: metric.render(extra) for name, metric in self._metrics.items()}
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def merge_collected(collections: Iterable[Dict[str, List[str]]]) -> str:
+    """Render metrics collected by several registries (e.g. one per process) as one exposition.
+
+    The samples must already be told apart by a label (see `Registry.collect`):
+    each metric keeps the HELP/TYPE header of its first collection, followed by
+    the samples of every collection.
+    """
+    merged: Dict[str, List[str]] = {}
+    for collected in collections:
+        for name, lines in collected.items():
+            if name in merged:
+                merged[name].extend(lines[2:])
+            else:
+                merged[name] = list(lines)
+    return "\n".join(line for lines in merged.values() for line in lines) + "\n"
+
+
+registry = Registry()
+
+COMMAND_LATENCY = registry.register(Histogram(
+    "perna_command_duration_seconds", "Time spent handling a command.", ["command"]))
+INTERACTION_ACK_LATENCY = registry.register(Histogram(
+    "perna_interaction_ack_seconds", "Time from receiving a button click to acknowledging it.", ["button"]))
+EVENT_LOOP_LAG = registry.register(Histogram(
+    "perna_event_loop_lag_seconds", "Delay of a periodic event loop wake-up beyond its schedule."))
+
+
+class LoopLagMonitor:
+    """Measure event loop lag by scheduling a wake-up every `interval` seconds.
+
+    Args:
+        interval: Seconds between probes
+        on_lag: Called with each measured lag (defaults to the lag histogram)
+    """
+
+    def __init__(self, interval: float = 0.5, on_lag: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_lag = on_lag or EVENT_LOOP_LAG.observe
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, time.perf_counter() - expected)
+            self.on_lag(self.last_lag)
@@ -0,0 +1,174 @@
+"""Storage for `!mix` state: a local roster store and an in-memory view cache.
+
+Rosters are stored content-addressed (the key is a hash of the roster), so
+the button custom_ids only need to carry the key and the split stream
+position. That keeps every posted mix clickable after a restart while only
+a bounded number of views stay in memory. Rosters not posted again within
+the retention period are deleted.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .constants import MIX_RETENTION, MIX_STORE_PATH, MIX_SWEEP_INTERVAL, MIX_VIEW_CACHE_SIZE
+
+
+class MixRoster(NamedTuple):
+    """Roster of a posted `!mix`."""
+
+    users: List[str]
+    groups: Optional[List[List[str]]]
+    weights: Optional[Dict[str, float]]
+
+
+class MixStore:
+    """Content-addressed SQLite store of mix rosters.
+
+    The bot goes through `store` and `load`, which run the SQLite work in a
+    worker thread; `put` and `get` are their synchronous versions.
+
+    Args:
+        path: Path of the SQLite database file
+        retention: Seconds a roster is kept after it was last stored
+        sweep_interval: Seconds between deletions of the expired rosters
+    """
+
+    def __init__(self, path: str, retention: float = MIX_RETENTION, sweep_interval: float = MIX_SWEEP_INTERVAL):
+        self.path = path
+        self.retention = retention
+        self.sweep_interval = sweep_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mixes")
+        self._swept_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Used from the worker thread, or from the caller's thread by `put` and `get`
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS mixes ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS mixes_created_at ON mixes (created_at)")
+        return self._conn
+
+    @staticmethod
+    def _encode(roster: MixRoster) -> Tuple[str, str]:
+        """Return the (key, payload) of a roster."""
+        payload = json.dumps(roster._asdict(), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()[:16], payload
+
+    def _write(self, key: str, payload: str):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            # Posting the same roster again keeps its older buttons alive too
+            conn.execute(
+                "INSERT INTO mixes (key, payload, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET created_at = excluded.created_at",
+                (key, payload, now),
+            )
+        if now - self._swept_at >= self.sweep_interval:
+            self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Delete the rosters stored more than `retention` seconds ago.
+
+        Returns:
+            Number of rosters deleted
+        """
+        now = time.time() if now is None else now
+        self._swept_at = now
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM mixes WHERE created_at < ?", (now - self.retention,)).rowcount
+
+    def put(self, roster: MixRoster) -> str:
+        """Store a roster and return its key.
+
+        Args:
+            roster: Roster to store
+
+        Returns:
+            Hex key derived from the roster content
+        """
+        key, payload = self._encode(roster)
+        self._write(key, payload)
+        return key
+
+    async def store(self, roster: MixRoster) -> str:
+        """Like `put`, writing in the worker thread."""
+        key, payload = self._encode(roster)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write, key, payload)
+        return key
+
+    def get(self, key: str) -> Optional[MixRoster]:
+        """Load a roster by key.
+
+        Args:
+            key: Key returned by `put`
+
+        Returns:
+            The stored roster, or None if the key is unknown
+        """
+        row = self._connect().execute("SELECT payload FROM mixes WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return MixRoster(**json.loads(row[0]))
+
+    async def load(self, key: str) -> Optional[MixRoster]:
+        """Like `get`, reading in the worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key)
+
+
+class MixViewCache:
+    """LRU cache of live mix views, keyed by message ID.
+
+    Args:
+        max_size: Maximum number of views kept in memory
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
+        self._views: "OrderedDict[int, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def get(self, message_id: int) -> Optional[Any]:
+        view = self._views.get(message_id)
+        if view is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._views.move_to_end(message_id)
+        return view
+
+    def put(self, message_id: int, view: Any):
+        self._views[message_id] = view
+        self._views.move_to_end(message_id)
+        while len(self._views) > self.max_size:
+            self._views.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, message_id: int) -> Optional[Any]:
+        return self._views.pop(message_id, None)
+
+
+mix_store = MixStore(MIX_STORE_PATH)
+mix_views = MixViewCache(MIX_VIEW_CACHE_SIZE)
@@ -0,0 +1,90 @@
+"""Sorted per-guild index of member display names, for slash command autocomplete."""
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+import discord
+
+
+def fold_name(name: str) -> str:
+    """Normalize a name for lookups."""
+    return name.casefold()
+
+
+class GuildNameIndex:
+    """Display names of one guild, sorted by folded name for prefix search."""
+
+    def __init__(self, members: Iterable[Tuple[int, str]] = ()):
+        self._names: Dict[int, str] = dict(members)
+        self._keys: List[Tuple[str, int]] = sorted((fold_name(name), member_id) for member_id, name in self._names.items())
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, member_id: int, display_name: str):
+        """Add a member, or rename them if already indexed."""
+        old = self._names.get(member_id)
+        if old == display_name:
+            return
+        if old is not None:
+            self.remove(member_id)
+        self._names[member_id] = display_name
+        insort(self._keys, (fold_name(display_name), member_id))
+
+    def remove(self, member_id: int):
+        name = self._names.pop(member_id, None)
+        if name is None:
+            return
+        key = (fold_name(name), member_id)
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        """Display names starting with `prefix` (case-insensitive), in sorted order."""
+        folded = fold_name(prefix)
+        keys = self._keys
+        index = bisect_left(keys, (folded,))
+        matches = []
+        while index < len(keys) and len(matches) < limit:
+            key, member_id = keys[index]
+            if not key.startswith(folded):
+                break
+            matches.append(self._names[member_id])
+            index += 1
+        return matches
+
+
+class MemberNameIndex:
+    """Per-guild display name indexes, kept current from member events."""
+
+    def __init__(self):
+        self._guilds: Dict[int, GuildNameIndex] = {}
+
+    def seed_guild(self, guild: discord.Guild):
+        """(Re)build a guild's index from its cached members."""
+        self._guilds[guild.id] = GuildNameIndex(
+            (member.id, member.display_name) for member in guild.members if not member.bot
+        )
+
+    def drop_guild(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    def add(self, member: discord.Member):
+        if member.bot:
+            return
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.add(member.id, member.display_name)
+
+    def remove(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.remove(member.id)
+
+    def search(self, guild_id: int, prefix: str, limit: int) -> List[str]:
+        index = self._guilds.get(guild_id)
+        return index.search(prefix, limit) if index is not None else []
+
+
+member_names = MemberNameIndex()
@@ -0,0 +1,78 @@
+"""Outbox for bot announcements (startup/shutdown messages)."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Set
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class AnnouncementOutbox:
+    """Queue of announcements sent in order by a background task.
+
+    Each announcement has a key and is sent at most once per session, so a
+    reconnect that fires `on_ready` again does not post a second "ONLINE".
+
+    Args:
+        resolve_channel: Coroutine returning the channel to send to
+    """
+
+    def __init__(self, resolve_channel: Callable[[], Awaitable[discord.abc.Messageable]]):
+        self.resolve_channel = resolve_channel
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._sent_keys: Set[str] = set()
+        self._worker: Optional[asyncio.Task] = None
+
+    def post(self, key: str, content: str) -> bool:
+        """Queue an announcement unless one with the same key was already posted.
+
+        Args:
+            key: Deduplication key (e.g. "online")
+            content: Message content
+
+        Returns:
+            True if the announcement was queued
+        """
+        if key in self._sent_keys:
+            return False
+        self._sent_keys.add(key)
+        self._queue.put_nowait(content)
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self):
+        while True:
+            content = await self._queue.get()
+            try:
+                channel = await self.resolve_channel()
+                await channel.send(content)
+            except discord.errors.NotFound:
+                logger.warning("[DISCORD] Notification channel not found")
+            except discord.errors.Forbidden:
+                logger.warning("[DISCORD] No permission to access notification channel")
+            except Exception as e:
+                logger.warning("[DISCORD] Error sending announcement: %s", e)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until every queued announcement was sent, up to `timeout` seconds.
+
+        Returns:
+            True if the outbox is empty, False if the deadline was hit
+        """
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("[DISCORD] %s announcement(s) not sent after %ss", self._queue.qsize(), timeout)
+            return False
+
+    def close(self):
+        """Stop the background task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
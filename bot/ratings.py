@@ -0,0 +1,288 @@
+"""Player ratings from `!resultado`: an Elo engine with a write-behind store.
+
+Ratings live in memory per guild. Results are applied in batches (team Elo:
+each side is rated by its average, every player moves by the same delta) and
+the changed ratings are written to SQLite by a background flush that runs in
+a worker thread, so the event loop never waits on disk.
+
+Backfill historical results (one JSON object per line with "winner" and
+"loser" player lists):
+    python -m bot.ratings --guild 123 results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .constants import RATING_FLUSH_INTERVAL, RATING_INITIAL, RATING_K, RATING_STORE_PATH
+from .lifecycle import on_close
+
+logger = logging.getLogger(__name__)
+
+
+class MatchResult(NamedTuple):
+    """Winning and losing team of a match, and the mix message it was scored from."""
+
+    winner: Sequence[str]
+    loser: Sequence[str]
+    mix_id: Optional[int] = None
+
+
+class RatingStore:
+    """SQLite store of player ratings and of every recorded result.
+
+    The connection is used from one worker thread at a time (see `RatingBook`).
+
+    Args:
+        path: Path of the SQLite database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratings ("
+                "guild_id INTEGER NOT NULL, player TEXT NOT NULL, rating REAL NOT NULL, games INTEGER NOT NULL, "
+                "PRIMARY KEY (guild_id, player)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, winner TEXT NOT NULL, loser TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            # Stores created before results were keyed by their mix message
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(results)")}
+            if "mix_id" not in columns:
+                self._conn.execute("ALTER TABLE results ADD COLUMN mix_id INTEGER")
+            self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS results_mix_id ON results (mix_id)")
+        return self._conn
+
+    def load(self, guild_id: int) -> Dict[str, List[float]]:
+        """Return {player: [rating, games]} for a guild."""
+        rows = self._connect().execute("SELECT player, rating, games FROM ratings WHERE guild_id = ?", (guild_id,))
+        return {player: [rating, games] for player, rating, games in rows}
+
+    def is_scored(self, mix_id: int) -> bool:
+        """Check whether a result was already recorded for a mix."""
+        return self._connect().execute("SELECT 1 FROM results WHERE mix_id = ?", (mix_id,)).fetchone() is not None
+
+    def write(self, ratings: List[Tuple[int, str, float, int]], results: List[Tuple[int, MatchResult, float]]):
+        """Upsert ratings and append results in one transaction."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO results (guild_id, winner, loser, created_at, mix_id) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (guild_id, json.dumps(list(result.winner), ensure_ascii=False),
+                     json.dumps(list(result.loser), ensure_ascii=False), created_at, result.mix_id)
+                    for guild_id, result, created_at in results
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO ratings (guild_id, player, rating, games) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, player) DO UPDATE SET rating = excluded.rating, games = excluded.games",
+                ratings,
+            )
+
+
+def apply_results(table: Dict[str, List[float]], results: Iterable[MatchResult],
+                  k: float = RATING_K, initial: float = RATING_INITIAL) -> Set[str]:
+    """Apply match results to a rating table, in order.
+
+    Args:
+        table: {lowercase player: [rating, games]}, updated in place
+        results: Results to apply
+        k: Elo K-factor
+        initial: Rating of players seen for the first time
+
+    Returns:
+        Lowercase names of every player whose rating changed
+    """
+    touched = set()
+    get = table.get
+    for winner, loser, _ in results:
+        rows_w = [get(name) or table.setdefault(name, [initial, 0]) for name in map(str.lower, winner)]
+        rows_l = [get(name) or table.setdefault(name, [initial, 0]) for name in map(str.lower, loser)]
+        if not rows_w or not rows_l:
+            continue
+        mean_w = sum(row[0] for row in rows_w) / len(rows_w)
+        mean_l = sum(row[0] for row in rows_l) / len(rows_l)
+        delta = k * (1.0 - 1.0 / (1.0 + 10.0 ** ((mean_l - mean_w) / 400.0)))
+        for row in rows_w:
+            row[0] += delta
+            row[1] += 1
+        for row in rows_l:
+            row[0] -= delta
+            row[1] += 1
+        touched.update(map(str.lower, winner))
+        touched.update(map(str.lower, loser))
+    return touched
+
+
+class RatingBook:
+    """In-memory ratings per guild, written behind to a `RatingStore`.
+
+    Args:
+        store: Where ratings and results are persisted
+        flush_interval: Seconds between background flushes
+    """
+
+    def __init__(self, store: RatingStore, flush_interval: float = RATING_FLUSH_INTERVAL):
+        self.store = store
+        self.flush_interval = flush_interval
+        self._tables: Dict[int, Dict[str, List[float]]] = {}
+        self._dirty: Dict[int, Set[str]] = {}
+        self._results: List[Tuple[int, MatchResult, float]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ratings")
+        self._flusher: Optional[asyncio.Task] = None
+        # Mixes scored by this process, or found scored in the store
+        self._scored: Set[int] = set()
+        self.updates = 0
+        self.flushes = 0
+
+    async def table(self, guild_id: int) -> Dict[str, List[float]]:
+        """Return the rating table of a guild, loading it in the worker thread on first use."""
+        table = self._tables.get(guild_id)
+        if table is None:
+            loaded = await asyncio.get_running_loop().run_in_executor(self._executor, self.store.load, guild_id)
+            # Another coroutine may have loaded it meanwhile
+            table = self._tables.setdefault(guild_id, loaded)
+        return table
+
+    async def claim(self, mix_id: int) -> bool:
+        """Reserve a mix for scoring, so each mix gets a single result (also across restarts).
+
+        Returns:
+            True if the mix was not scored yet and the caller should record its result
+        """
+        if mix_id in self._scored:
+            return False
+        self._scored.add(mix_id)
+        return not await asyncio.get_running_loop().run_in_executor(self._executor, self.store.is_scored, mix_id)
+
+    async def record(self, guild_id: int, results: Sequence[MatchResult]) -> Dict[str, float]:
+        """Apply results and schedule them to be written.
+
+        Args:
+            guild_id: Guild the matches were played in
+            results: Results to apply, in order
+
+        Returns:
+            New rating of every player in the results, keyed by lowercase name
+        """
+        table = await self.table(guild_id)
+        touched = apply_results(table, results)
+        self._dirty.setdefault(guild_id, set()).update(touched)
+        now = time.time()
+        self._results.extend((guild_id, result, now) for result in results)
+        self.updates += len(results)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+        return {name: table[name][0] for name in touched}
+
+    def _take_pending(self):
+        ratings = [
+            (guild_id, name, *self._tables[guild_id][name])
+            for guild_id, names in self._dirty.items()
+            for name in names
+        ]
+        results, self._results = self._results, []
+        self._dirty = {}
+        return ratings, results
+
+    def _restore_pending(self, ratings, results):
+        """Put back a batch that could not be written, ahead of what was recorded meanwhile."""
+        for guild_id, name, *_ in ratings:
+            # The table holds the latest rating: only the name needs to be marked again
+            self._dirty.setdefault(guild_id, set()).add(name)
+        self._results[:0] = results
+
+    async def flush(self):
+        """Write every pending rating and result now.
+
+        If the write fails the batch stays pending for the next flush.
+        """
+        ratings, results = self._take_pending()
+        if not ratings and not results:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.store.write, ratings, results)
+        except BaseException:
+            self._restore_pending(ratings, results)
+            raise
+        self.flushes += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("[RATINGS] Error writing ratings: %s", e)
+
+    async def close(self):
+        """Stop the background flush and write what is pending."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+def backfill(store: RatingStore, guild_id: int, results: Sequence[MatchResult]) -> int:
+    """Replay historical results into the store in a single transaction.
+
+    Args:
+        store: Rating store to write to
+        guild_id: Guild the results belong to
+        results: Results in chronological order
+
+    Returns:
+        Number of players rated
+    """
+    table = store.load(guild_id)
+    touched = apply_results(table, results)
+    now = time.time()
+    store.write(
+        [(guild_id, name, *table[name]) for name in touched],
+        [(guild_id, result, now) for result in results],
+    )
+    return len(touched)
+
+
+rating_book = RatingBook(RatingStore(RATING_STORE_PATH))
+# Only loaded by `!resultado`: nothing to write on shutdown if it never ran
+on_close("ratings", rating_book.close)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill player ratings from historical results.")
+    parser.add_argument("results", help="JSON lines file with \"winner\" and \"loser\" player lists")
+    parser.add_argument("--guild", type=int, required=True, help="Guild ID the results belong to")
+    args = parser.parse_args()
+
+    with open(args.results, encoding="utf-8") as f:
+        results = [MatchResult(**json.loads(line)) for line in f if line.strip()]
+
+    started = time.perf_counter()
+    players = backfill(rating_book.store, args.guild, results)
+    elapsed = time.perf_counter() - started
+    print(f"{len(results)} results, {players} players rated in {elapsed:.2f}s ({len(results) / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Moderation reports from `!report`: a write-behind queue and moderator digests.
+
+Each reported player becomes a `Report` (reporter, channel and a link to the
+report message) pushed onto an in-process queue; the command handler never
+touches the disk. A background task takes the queued reports in batches and
+appends them to a JSON lines log in a worker thread, with a single fsync per
+batch, so a flood of reports costs one write per batch instead of one per
+report.
+
+Repeated reports of the same player by the same reporter within
+`REPORT_DEDUPE_WINDOW` are dropped. Reports by different people are kept,
+but the moderators get one digest every `REPORT_DIGEST_INTERVAL` seconds
+with one line per reported player instead of one message per report.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import discord
+
+from .constants import (
+    REPORT_BATCH_SIZE, REPORT_DEDUPE_WINDOW, REPORT_DIGEST_INTERVAL, REPORT_FLUSH_INTERVAL, REPORT_LOG_PATH,
+    REPORT_QUEUE_SIZE, SHUTDOWN_ANNOUNCE_TIMEOUT
+)
+from .lifecycle import on_close
+from .metrics import Counter, registry
+from .teams import paginate
+
+logger = logging.getLogger(__name__)
+
+REPORTS = registry.register(Counter(
+    "perna_reports_total", "Player reports received, by outcome (queued, duplicate, dropped).", ("outcome",)))
+
+
+class Report(NamedTuple):
+    """One reported player."""
+
+    guild_id: Optional[int]
+    channel_id: int
+    reporter_id: int
+    reporter: str
+    target: str
+    message_url: str
+    created_at: float
+
+
+class ReportLog:
+    """Append-only JSON lines log of reports.
+
+    Only used from the `ReportQueue` worker thread. Each batch is written
+    with a single O_APPEND write, so cluster workers sharing the log don't
+    interleave their lines.
+
+    Args:
+        path: Path of the log file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self.fsyncs = 0
+
+    def _open(self) -> int:
+        if self._fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def append(self, reports: Sequence[Report]):
+        """Append reports and fsync once for the whole batch."""
+        fd = self._open()
+        data = "".join(json.dumps(report._asdict(), ensure_ascii=False) + "\n" for report in reports).encode()
+        while data:
+            data = data[os.write(fd, data):]
+        os.fsync(fd)
+        self.fsyncs += 1
+
+    def read(self) -> Iterator[Report]:
+        """Yield every report in the log, oldest first."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield Report(**json.loads(line))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class _DigestEntry:
+    """Reports of one player since the last digest."""
+
+    __slots__ = ("target", "reporters", "count", "message_url")
+
+    def __init__(self, report: Report):
+        self.target = report.target
+        self.reporters: Dict[int, str] = {}
+        self.count = 0
+        self.message_url = report.message_url
+
+    def add(self, report: Report):
+        self.reporters.setdefault(report.reporter_id, report.reporter)
+        self.count += 1
+
+
+def format_digest(entries: Sequence[_DigestEntry], interval: float) -> List[str]:
+    """Format a moderator digest, most reported players first.
+
+    Returns:
+        Message contents, split under Discord's length limit
+    """
+    minutes = max(1, round(interval / 60))
+    blocks = [f"🚨 **Reportes dos últimos {minutes} min** ({sum(e.count for e in entries)} reporte(s))"]
+    for entry in sorted(entries, key=lambda e: -e.count):
+        reporters = ", ".join(entry.reporters.values())
+        blocks.append(f"• **{entry.target}**: {entry.count} reporte(s) por {reporters}\n  {entry.message_url}")
+    return paginate(blocks)
+
+
+class ReportQueue:
+    """Write-behind queue of reports with deduplication and moderator digests.
+
+    Args:
+        log: Where reports are persisted
+        flush_interval: Seconds to gather reports into one batch
+        batch_size: Maximum reports per write
+        dedupe_window: Seconds in which a reporter's repeated report of a player is dropped
+        digest_interval: Seconds between moderator digests
+        maxsize: Maximum reports waiting to be written (more are dropped)
+    """
+
+    def __init__(self, log: ReportLog, flush_interval: float = REPORT_FLUSH_INTERVAL,
+                 batch_size: int = REPORT_BATCH_SIZE, dedupe_window: float = REPORT_DEDUPE_WINDOW,
+                 digest_interval: float = REPORT_DIGEST_INTERVAL, maxsize: int = REPORT_QUEUE_SIZE):
+        self.log = log
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dedupe_window = dedupe_window
+        self.digest_interval = digest_interval
+        self.maxsize = maxsize
+        self._queue: Optional["asyncio.Queue[Report]"] = None
+        # Reports the writer took off the queue and has not started writing yet
+        self._held: List[Report] = []
+        self._seen: "OrderedDict[Tuple[Optional[int], str, int], float]" = OrderedDict()
+        self._digest: Dict[Tuple[Optional[int], str], _DigestEntry] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reports")
+        self._writer: Optional[asyncio.Task] = None
+        self._digester: Optional[asyncio.Task] = None
+        self._resolve_channel: Optional[Callable[[], Awaitable[discord.abc.Messageable]]] = None
+        self.written = 0
+        self._overflowing = False
+
+    def submit(self, report: Report) -> bool:
+        """Queue a report without waiting for it to be written.
+
+        Returns:
+            True if the report was queued, False if it was a duplicate or the queue is full
+        """
+        now = report.created_at
+        seen = self._seen
+        # Keys are inserted in time order, so the expired ones are at the front
+        while seen:
+            if now - next(iter(seen.values())) < self.dedupe_window:
+                break
+            seen.popitem(last=False)
+
+        target_key = report.target.casefold()
+        key = (report.guild_id, target_key, report.reporter_id)
+        if key in seen:
+            REPORTS.inc(1, "duplicate")
+            return False
+
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+        try:
+            self._queue.put_nowait(report)
+        except asyncio.QueueFull:
+            REPORTS.inc(1, "dropped")
+            if not self._overflowing:
+                self._overflowing = True
+                logger.warning("[REPORT] Queue full (%s reports), dropping new reports", self.maxsize)
+            return False
+
+        seen[key] = now
+        if self._resolve_channel is not None:
+            entry = self._digest.get((report.guild_id, target_key))
+            if entry is None:
+                entry = self._digest[report.guild_id, target_key] = _DigestEntry(report)
+            entry.add(report)
+        REPORTS.inc(1, "queued")
+        return True
+
+    def pending(self) -> int:
+        """Reports queued but not written yet."""
+        return len(self._held) + (self._queue.qsize() if self._queue is not None else 0)
+
+    def _take_batch(self) -> List[Report]:
+        """Take the held reports and then queued ones, up to `batch_size`."""
+        batch, self._held = self._held, []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _write(self, batch: List[Report]):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.log.append, batch)
+        self.written += len(batch)
+        self._overflowing = False
+
+    async def _run(self):
+        while True:
+            # Held where `flush` finds it if we are cancelled while waiting
+            self._held.append(await self._queue.get())
+            # Let a burst pile up so it is written (and fsynced) once
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            batch = self._take_batch()
+            if not batch:
+                continue
+            try:
+                # Shielded: a batch taken off the queue is written even if `close` cancels us
+                await asyncio.shield(self._write(batch))
+            except Exception as e:
+                logger.error("[REPORT] Error writing %s report(s): %s", len(batch), e)
+
+    def start_digests(self, resolve_channel: Callable[[], Awaitable[discord.abc.Messageable]]):
+        """Send moderator digests to the channel returned by `resolve_channel`."""
+        self._resolve_channel = resolve_channel
+        if self._digester is None:
+            self._digester = asyncio.create_task(self._run_digests())
+
+    async def send_digest(self) -> int:
+        """Send the reports received since the last digest.
+
+        Returns:
+            Number of reported players in the digest
+        """
+        if not self._digest or self._resolve_channel is None:
+            return 0
+        entries, self._digest = list(self._digest.values()), {}
+        channel = await self._resolve_channel()
+        for content in format_digest(entries, self.digest_interval):
+            await channel.send(content, allowed_mentions=discord.AllowedMentions.none())
+        return len(entries)
+
+    async def _run_digests(self):
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            try:
+                await self.send_digest()
+            except Exception as e:
+                logger.warning("[REPORT] Error sending moderator digest: %s", e)
+
+    async def flush(self):
+        """Write every queued report now."""
+        if self._queue is None:
+            return
+        while self._held or not self._queue.empty():
+            await self._write(self._take_batch())
+
+    async def close(self, digest_timeout: float = SHUTDOWN_ANNOUNCE_TIMEOUT):
+        """Stop the background tasks, write what is queued and send a last digest.
+
+        Args:
+            digest_timeout: Maximum time (seconds) to wait for the last digest
+        """
+        for task in (self._writer, self._digester):
+            if task is not None:
+                task.cancel()
+        self._writer = self._digester = None
+        await self.flush()
+        try:
+            await asyncio.wait_for(self.send_digest(), digest_timeout)
+        except Exception as e:
+            logger.warning("[REPORT] Error sending moderator digest: %s", e)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.log.close)
+
+
+report_queue = ReportQueue(ReportLog(REPORT_LOG_PATH))
+on_close("reports", report_queue.close)
@@ -0,0 +1,127 @@
+"""Table-driven command routing for incoming messages."""
+
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+import discord
+
+from .metrics import COMMAND_LATENCY
+
+logger = logging.getLogger(__name__)
+
+CommandHandler = Callable[[discord.Message, str], Awaitable[None]]
+
+# A command is the prefix character followed by a word, e.g. "!mix" in "!mix(João, Maria)"
+_COMMAND_TOKEN_RE = re.compile(r'\S\w*')
+
+
+class Command(NamedTuple):
+    """A registered command."""
+
+    name: str
+    handler: CommandHandler
+    channels: Optional[frozenset]
+
+
+class CommandRouter:
+    """Route messages to command handlers by their first token.
+
+    Messages that do not start with the prefix character are rejected after
+    looking at a single character; everything else is one dict lookup (plus,
+    on a miss, a check of the few commands accepting arguments glued to their
+    name, like "!mix4x5").
+
+    Args:
+        prefix: Character every command starts with
+    """
+
+    def __init__(self, prefix: str = "!"):
+        self.prefix = prefix
+        self._routes: Dict[str, Command] = {}
+        # Names matched as a prefix of the first token, longest first
+        self._prefix_routes: List[Tuple[str, Command]] = []
+
+    def register(self, name: str, handler: CommandHandler, aliases: Collection[str] = (),
+                 channels: Optional[Collection[int]] = None, glued_args: bool = False):
+        """Register a handler under a command name and its aliases.
+
+        Args:
+            name: Command name including the prefix (e.g. "!mix")
+            handler: Coroutine called with the message and the text after the command
+            aliases: Other names for the same command
+            channels: Optional channel IDs the command is restricted to
+            glued_args: Also match when the arguments follow the name without a
+                space ("!mixJoão", "!mix4x5")
+        """
+        command = Command(name, handler, frozenset(channels) if channels else None)
+        for key in (name, *aliases):
+            if not key.startswith(self.prefix):
+                raise ValueError(f"Command {key!r} must start with {self.prefix!r}")
+            self._routes[key.lower()] = command
+            if glued_args:
+                self._prefix_routes.append((key.lower(), command))
+        self._prefix_routes.sort(key=lambda route: -len(route[0]))
+
+    def command(self, name: str, aliases: Collection[str] = (), channels: Optional[Collection[int]] = None,
+                glued_args: bool = False) -> Callable[[CommandHandler], CommandHandler]:
+        """Decorator form of `register`."""
+        def decorator(handler: CommandHandler) -> CommandHandler:
+            self.register(name, handler, aliases, channels, glued_args)
+            return handler
+        return decorator
+
+    def resolve(self, content: str) -> Optional[Tuple[Command, str]]:
+        """Find the command for a message content.
+
+        Args:
+            content: Message content
+
+        Returns:
+            (command, arguments text) or None if the message is not a command
+        """
+        if not content or content[0] != self.prefix:
+            return None
+        token = _COMMAND_TOKEN_RE.match(content).group()
+        command = self._routes.get(token.lower())
+        if command is not None:
+            return command, content[len(token):]
+        folded = token.lower()
+        for key, command in self._prefix_routes:
+            if folded.startswith(key):
+                return command, content[len(key):]
+        return None
+
+    async def dispatch(self, message: discord.Message, resolved: Optional[Tuple[Command, str]] = None) -> bool:
+        """Run the handler for a message, if it is an allowed command.
+
+        Args:
+            message: Discord message
+            resolved: Optional result of `resolve` for this message
+
+        Returns:
+            True if a handler ran
+        """
+        resolved = resolved or self.resolve(message.content)
+        if resolved is None:
+            return False
+        command, args = resolved
+        if command.channels is not None and message.channel.id not in command.channels:
+            return False
+        start = time.perf_counter()
+        try:
+            await command.handler(message, args)
+        finally:
+            elapsed = time.perf_counter() - start
+            COMMAND_LATENCY.observe(elapsed, command.handler.__name__)
+            logger.info(
+                "[COMMAND] %s took %.1f ms", command.name, elapsed * 1000,
+                extra={
+                    "guild": message.guild.id if message.guild else None,
+                    "channel": message.channel.id,
+                    "command": command.name,
+                    "latency_ms": round(elapsed * 1000, 2),
+                },
+            )
+        return True
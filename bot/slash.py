@@ -0,0 +1,108 @@
+"""Slash commands (`/mix`, `/report`), alongside the `!` text commands.
+
+Player lists are comma-separated only, so names with spaces or hyphens are
+kept intact, and each name autocompletes from the guild's member names.
+Otherwise they are parsed like the text commands: `/mix` accepts groups and
+`name:weight`, and `/report` resolves mentions.
+"""
+
+import logging
+from typing import List
+
+import discord
+from discord import app_commands
+
+from .commands import MixView, guild_history, submit_reports
+from .constants import AUTOCOMPLETE_LIMIT, FUZZY_NAMES, REPORT_MESSAGE, SLASH_MIX_COMMAND, SLASH_REPORT_COMMAND
+from .fuzzy import fuzzy_names
+from .mixstore import mix_views
+from .names import member_names
+from .utils import parse_report_targets, parse_roster, resolve_guild_mentions, voice_channel_members_of
+from .watchdog import watchdog
+
+logger = logging.getLogger(__name__)
+
+# Discord's limit for an autocomplete choice name/value
+_CHOICE_MAX_LENGTH = 100
+
+
+def split_player_list(text: str) -> List[str]:
+    """Split a slash command player list on commas."""
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+
+async def autocomplete_players(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+    """Complete the last name of a comma-separated player list from the guild's members."""
+    if interaction.guild_id is None:
+        return []
+    head, _, last = current.rpartition(",")
+    typed = {name.casefold() for name in split_player_list(head)}
+    prefix = head + ", " if head else ""
+
+    choices = []
+    for name in member_names.search(interaction.guild_id, last.strip(), AUTOCOMPLETE_LIMIT + len(typed)):
+        value = prefix + name
+        if name.casefold() in typed or len(value) > _CHOICE_MAX_LENGTH:
+            continue
+        choices.append(app_commands.Choice(name=value, value=value))
+        if len(choices) == AUTOCOMPLETE_LIMIT:
+            break
+    return choices
+
+
+@app_commands.command(name=SLASH_MIX_COMMAND, description="Sorteia dois times com os jogadores informados")
+@app_commands.describe(jogadores="Jogadores separados por vírgula (vazio = seu canal de voz)")
+@app_commands.autocomplete(jogadores=autocomplete_players)
+async def mix_slash_command(interaction: discord.Interaction, jogadores: str = ""):
+    """Handle /mix: same as !mix, with a comma-separated player list."""
+    with interaction.client.inflight.track(), watchdog.track("/mix", len(jogadores)):
+        guild = interaction.guild
+        groups = weights = None
+        if jogadores.strip():
+            mention_names = await resolve_guild_mentions(jogadores, guild) if guild else {}
+            resolve_name = await fuzzy_names.resolver(guild) if FUZZY_NAMES and guild else None
+            users, groups, weights = parse_roster(jogadores, None, mention_names, resolve_name,
+                                                  comma_separated=True)
+            groups = groups or None
+            weights = weights or None
+        else:
+            users = voice_channel_members_of(interaction.user) or []
+        if len(users) < 2:
+            await interaction.response.send_message(
+                "🚨 Precisa de pelo menos 2 jogadores (separados por vírgula) ou estar em um canal de voz! 😒",
+                ephemeral=True,
+            )
+            return
+
+        view = await MixView.build(users, groups, weights, await guild_history(interaction.guild_id))
+        await interaction.response.send_message(content=view.next_message(), view=view)
+        sent = await interaction.original_response()
+        mix_views.put(sent.id, view)
+
+
+@app_commands.command(name=SLASH_REPORT_COMMAND, description="Reporta jogadores tóxicos para a moderação")
+@app_commands.describe(jogadores="Jogadores separados por vírgula")
+@app_commands.autocomplete(jogadores=autocomplete_players)
+async def report_slash_command(interaction: discord.Interaction, jogadores: str):
+    """Handle /report: same as !report, linking the reply (a slash command has no message of its own)."""
+    with interaction.client.inflight.track(), watchdog.track("/report", len(jogadores)):
+        mention_names = await resolve_guild_mentions(jogadores, interaction.guild) if interaction.guild else {}
+        targets = parse_report_targets(jogadores.strip(), mention_names)
+        if not targets:
+            await interaction.response.send_message(
+                "🚨 Você precisa informar o nome dos jogadores, separados por vírgula! Não é tão difícil, basta ler.",
+                ephemeral=True,
+            )
+            return
+
+        # discord.py < 2.5 returns None instead of the callback response
+        response = await interaction.response.send_message(REPORT_MESSAGE)
+        resource = getattr(response, "resource", None)
+        message_url = getattr(resource, "jump_url", None) or interaction.channel.jump_url
+        submit_reports(interaction.guild_id, interaction.channel_id, interaction.user, targets, message_url)
+
+
+def register_app_commands(tree: app_commands.CommandTree):
+    """Add the slash commands to the client's command tree."""
+    tree.add_command(mix_slash_command)
+    tree.add_command(report_slash_command)
@@ -0,0 +1,301 @@
+"""Lazy stream of distinct team splits for reshuffling.
+
+Each `!mix` owns a `SplitStream` that hands out every canonical split of the
+roster at most once: the same teams with A and B swapped count as one split,
+and splits that break an anti-panela group are skipped. Unweighted rosters are
+walked in a pseudo-random order given by a keyed permutation over the split
+indices, so large rosters are never materialized; weighted rosters are walked
+from the fairest split to the least fair one, starting with the answer of the
+exact solver in `balancer`.
+"""
+
+import random
+from math import comb
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balancer import find_balanced_split, is_split_allowed, rank_splits, resolve_weights
+
+MAX_PLAYING = 10
+
+# Upper bound on splits rejected by the group rule in a single draw (and
+# when checking that the groups can be satisfied at all)
+_MAX_SKIPS_PER_DRAW = 2_000
+
+# Index spaces up to this size are shuffled outright (every roster of up to 10 players)
+_SHUFFLED_ORDER_MAX = 256
+
+_FEISTEL_ROUNDS = 8
+_MASK64 = (1 << 64) - 1
+
+
+class TeamSplit(NamedTuple):
+    """One assignment of the roster to Time A, Time B and the waitlist."""
+
+    team_a: List[str]
+    team_b: List[str]
+    waitlist: List[str]
+
+
+def unrank_combination(n: int, k: int, rank: int) -> List[int]:
+    """Return the `rank`-th k-combination of range(n) in lexicographic order."""
+    chosen = []
+    for i in range(n):
+        if k == 0:
+            break
+        count = comb(n - i - 1, k - 1)
+        if rank < count:
+            chosen.append(i)
+            k -= 1
+        else:
+            rank -= count
+    return chosen
+
+
+class _IndexPermutation:
+    """Keyed bijection over range(size).
+
+    Small index spaces are shuffled outright, which is exactly uniform. Larger
+    ones keep O(1) memory: a Feistel network with a splitmix64 round function
+    permutes the next even power of two and cycle-walking folds the result
+    back into range(size).
+    """
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.order = rng.sample(range(size), size) if size <= _SHUFFLED_ORDER_MAX else None
+        bits = max(2, size.bit_length())
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [rng.getrandbits(64) for _ in range(_FEISTEL_ROUNDS)] if self.order is None else []
+
+    def _round(self, value: int, key: int) -> int:
+        value = (value + key) & _MASK64
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return (value ^ (value >> 31)) & self.half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, index: int) -> int:
+        if self.order is not None:
+            return self.order[index]
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+class SplitStream:
+    """Non-repeating stream of team splits for one roster.
+
+    Args:
+        users: List of player names
+        groups: Optional list of player groups that must be separated
+        weights: Optional player weights keyed by lowercase player name
+        seed: Seed for the split order (random if not given)
+        cursor: Position to resume from (see `state`)
+        produced: Number of splits already handed out (see `state`)
+    """
+
+    def __init__(self, users: List[str], groups: Optional[List[List[str]]] = None,
+                 weights: Optional[Dict[str, float]] = None, seed: Optional[int] = None,
+                 cursor: int = 0, produced: int = 0):
+        self.users = users
+        self.groups = groups
+        self.weights = weights
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.produced = produced
+        self.exhausted = False
+
+        n = len(users)
+        self.playing_count = min(n, MAX_PLAYING)
+        self.waitlist_count = n - self.playing_count
+        self.team_a_size = (self.playing_count + 1) // 2
+        # With equal team sizes, fixing the first playing player on team A
+        # removes the mirrored (A <-> B) duplicate of every split
+        self.mirrored = self.team_a_size * 2 == self.playing_count and self.playing_count > 0
+
+        rng = random.Random(self.seed)
+        self._index = {user.lower(): i for i, user in enumerate(users)}
+        self._masks: Optional[List[int]] = None
+        self._cursor = cursor
+
+        if weights:
+            # Weighted rosters keep a fixed waitlist and are walked by fairness:
+            # the solver picks the first split, and the others are only ranked
+            # once a reshuffle asks for them
+            waitlist = sorted(rng.sample(range(n), self.waitlist_count))
+            self._fixed_waitlist = waitlist
+            benched = set(waitlist)
+            self._playing = [i for i in range(n) if i not in benched]
+            player_weights = resolve_weights(users, weights)
+            self._weights = [player_weights[i] for i in self._playing]
+            self._local_groups = self._playing_groups()
+            self.waitlist_choices = 1
+            self.splits_per_waitlist = self._count_splits()
+            self.total = self.splits_per_waitlist
+            self._first = self._canonical(
+                find_balanced_split(self._weights, self.team_a_size, self._local_groups, rng))
+            self._rank_seed = rng.getrandbits(64)
+            self._ranked: Optional[List[int]] = None
+        else:
+            self._fixed_waitlist = None
+            self.waitlist_choices = comb(n, self.waitlist_count)
+            self.splits_per_waitlist = self._count_splits()
+            self.total = self.waitlist_choices * self.splits_per_waitlist
+            self._permutation = _IndexPermutation(self.total, rng)
+            if self.groups and not self._groups_satisfiable():
+                # Decided from the seed alone, so a restored stream makes the same call
+                self.groups = None
+
+    def state(self) -> Tuple[int, int, int]:
+        """Return (seed, cursor, produced), enough to resume this stream later."""
+        return self.seed, self._cursor, self.produced
+
+    def seek(self, cursor: int, produced: int):
+        """Go back to an earlier position, handing out again the splits drawn after it."""
+        self._cursor = cursor
+        self.produced = produced
+        self.exhausted = False
+
+    def _count_splits(self) -> int:
+        if self.mirrored:
+            return comb(self.playing_count - 1, self.team_a_size - 1)
+        return comb(self.playing_count, self.team_a_size)
+
+    def _decode(self, index: int) -> List[List[int]]:
+        """Decode a split index (a team-A mask over the playing players when
+        weighted) into (team A, team B, waitlist) player indices."""
+        if self._fixed_waitlist is not None:
+            team_a = [p for bit, p in enumerate(self._playing) if index >> bit & 1]
+            team_b = [p for bit, p in enumerate(self._playing) if not index >> bit & 1]
+            return [team_a, team_b, list(self._fixed_waitlist)]
+
+        waitlist_rank, split_rank = divmod(index, self.splits_per_waitlist)
+        waitlist = unrank_combination(len(self.users), self.waitlist_count, waitlist_rank)
+
+        out = set(waitlist)
+        playing = [i for i in range(len(self.users)) if i not in out]
+
+        if self.mirrored:
+            picked = [0] + [p + 1 for p in unrank_combination(
+                self.playing_count - 1, self.team_a_size - 1, split_rank)]
+        else:
+            picked = unrank_combination(self.playing_count, self.team_a_size, split_rank)
+
+        on_a = set(picked)
+        team_a = [playing[i] for i in picked]
+        team_b = [p for i, p in enumerate(playing) if i not in on_a]
+        return [team_a, team_b, waitlist]
+
+    def _group_masks(self) -> List[int]:
+        """Group bitmasks over all players (built once per stream)."""
+        if self._masks is None:
+            self._masks = []
+            for group in self.groups or []:
+                mask = 0
+                for player in group:
+                    i = self._index.get(player.lower())
+                    if i is not None:
+                        mask |= 1 << i
+                if mask.bit_count() > 1:
+                    self._masks.append(mask)
+        return self._masks
+
+    def _is_allowed(self, team_a: Sequence[int], team_b: Sequence[int]) -> bool:
+        if not self.groups:
+            return True
+        mask = 0
+        for i in team_a:
+            mask |= 1 << i
+        playing = mask
+        for i in team_b:
+            playing |= 1 << i
+        # Waitlisted members do not count towards their group
+        return is_split_allowed(mask, [group & playing for group in self._group_masks()])
+
+    def _groups_satisfiable(self) -> bool:
+        """Check that the stream has a split keeping every group apart.
+
+        Small rosters are walked in full; larger ones only up to
+        `_MAX_SKIPS_PER_DRAW` splits, so groups that are satisfiable but
+        almost never are treated as unsatisfiable.
+        """
+        for position in range(min(self.total, _MAX_SKIPS_PER_DRAW)):
+            team_a, team_b, _ = self._decode(self._permutation[position])
+            if self._is_allowed(team_a, team_b):
+                return True
+        return False
+
+    def _playing_groups(self) -> List[List[int]]:
+        """Groups as positions in `_playing` (weighted rosters)."""
+        position = {player: i for i, player in enumerate(self._playing)}
+        groups = []
+        for group in self.groups or []:
+            members = [position.get(self._index.get(player.lower())) for player in group]
+            groups.append([i for i in members if i is not None])
+        return groups
+
+    def _canonical(self, mask: int) -> int:
+        """Put the first playing player on team A when the teams are mirrored."""
+        if self.mirrored and not mask & 1:
+            mask ^= (1 << self.playing_count) - 1
+        return mask
+
+    def _draw_index(self) -> Optional[int]:
+        if self._fixed_waitlist is not None:
+            if self._cursor == 0:
+                self._cursor = 1
+                return self._first
+            if self._ranked is None:
+                ranked = rank_splits(self._weights, self.team_a_size, self._local_groups,
+                                     random.Random(self._rank_seed))
+                # The solver's split comes first; mirrored masks are the same split
+                self._ranked = [self._first] + [
+                    mask for mask in ranked if mask != self._first and (not self.mirrored or mask & 1)]
+            if self._cursor >= len(self._ranked):
+                return None
+            index = self._ranked[self._cursor]
+            self._cursor += 1
+            return index
+
+        skipped = 0
+        while self._cursor < self.total:
+            index = self._permutation[self._cursor]
+            self._cursor += 1
+            team_a, team_b, _ = self._decode(index)
+            if self._is_allowed(team_a, team_b):
+                return index
+            skipped += 1
+            if skipped >= _MAX_SKIPS_PER_DRAW:
+                # The allowed splits left are too sparse to look for on the event loop
+                break
+        return None
+
+    def next(self) -> Optional[TeamSplit]:
+        """Return the next unseen split, or None when every split was shown."""
+        index = self._draw_index()
+        if index is None:
+            self.exhausted = True
+            return None
+
+        self.produced += 1
+        team_a, team_b, waitlist = self._decode(index)
+
+        # Presentation only: shuffle within teams and pick which side is "A"
+        display = random.Random(self.seed ^ index)
+        display.shuffle(team_a)
+        display.shuffle(team_b)
+        display.shuffle(waitlist)
+        if self.mirrored and display.random() < 0.5:
+            team_a, team_b = team_b, team_a
+
+        return TeamSplit(
+            [self.users[i] for i in team_a],
+            [self.users[i] for i in team_b],
+            [self.users[i] for i in waitlist],
+        )
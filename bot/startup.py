@@ -0,0 +1,144 @@
+"""Startup profile: how long a cold start takes, and where the time goes.
+
+With `PERNA_STARTUP_PROFILE=1`, `main.py` times every module imported while
+it loads the bot, and the client marks each startup milestone (login,
+gateway READY, `on_ready`, member cache filled, first `!mix` served). Times
+are seconds since `main.py` started. Without it, marks cost a single check.
+
+This module only imports the standard library, so it can be loaded before
+anything it measures.
+"""
+
+import importlib.abc
+import logging
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .constants import STARTUP_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Modules listed in the import report
+_TOP_MODULES = 15
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader to time its execution."""
+
+    def __init__(self, loader, timer: "ImportTimer"):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Downstream code (importlib.resources, pickling) must see the real loader
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        self.timer.enter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.leave(module.__name__)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path hook recording the time spent executing each imported module.
+
+    Self time excludes the modules imported while it ran (like `python -X importtime`).
+    """
+
+    def __init__(self):
+        self.times: Dict[str, Tuple[float, float]] = {}
+        self._stack: List[List[float]] = []
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def enter(self):
+        # [start, time spent in nested imports]
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name: str):
+        started, nested = self._stack.pop()
+        total = time.perf_counter() - started
+        self.times[name] = (total - nested, total)
+        if self._stack:
+            self._stack[-1][1] += total
+
+    def by_package(self) -> Dict[str, float]:
+        """Self time summed per top-level package."""
+        packages: Dict[str, float] = {}
+        for name, (self_time, _) in self.times.items():
+            package = name.partition(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_time
+        return packages
+
+
+class StartupProfile:
+    """Startup milestones and import times.
+
+    Args:
+        enabled: Record and log the profile
+    """
+
+    def __init__(self, enabled: bool = STARTUP_PROFILE):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.imports: Optional[ImportTimer] = None
+
+    def time_imports(self):
+        """Start timing imports (call before importing what should be measured)."""
+        if self.enabled and self.imports is None:
+            self.imports = ImportTimer()
+            self.imports.install()
+
+    def report_imports(self):
+        """Stop timing imports and log the slowest modules and the total per package."""
+        if self.imports is None:
+            return
+        self.imports.uninstall()
+        self.mark("imports")
+        packages = sorted(self.imports.by_package().items(), key=lambda item: -item[1])
+        logger.info("[STARTUP] Imports by package: %s",
+                    ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in packages[:_TOP_MODULES]))
+        slowest = sorted(self.imports.times.items(), key=lambda item: -item[1][0])[:_TOP_MODULES]
+        for name, (self_time, total) in slowest:
+            logger.info("[STARTUP] import %-40s self %7.1fms  cumulative %7.1fms", name, self_time * 1000,
+                        total * 1000)
+
+    def mark(self, milestone: str) -> Optional[float]:
+        """Record the first time a milestone is reached and log it.
+
+        Returns:
+            Seconds since startup, or None if disabled or already recorded
+        """
+        if not self.enabled or milestone in self.marks:
+            return None
+        elapsed = self.marks[milestone] = time.perf_counter() - self.started
+        logger.info("[STARTUP] %s after %.3fs", milestone, elapsed)
+        return elapsed
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,158 @@
+"""Supervised bot runner: retries, signal handling and graceful shutdown."""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Callable
+
+import discord
+
+from .client import PernaBot
+from .constants import RETRY_BASE_DELAY, RETRY_MAX_DELAY, SHUTDOWN_DRAIN_TIMEOUT
+from .lifecycle import backoff_delay
+from .throttle import edit_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class BotSupervisor:
+    """Run the bot with retries and shut it down gracefully.
+
+    Every connection attempt uses a fresh client, retries wait a jittered
+    and capped exponential backoff, and shutdown drains the commands and
+    button clicks still running before closing the connection.
+
+    Args:
+        token: Discord bot token
+        max_retries: Maximum number of connection attempts
+        bot_factory: Creates the client for each attempt
+    """
+
+    def __init__(self, token: str, max_retries: int = 5, bot_factory: Callable[[], PernaBot] = PernaBot):
+        self.token = token
+        self.max_retries = max_retries
+        self.bot_factory = bot_factory
+        self.bot = None
+        self.stopping = False
+        self._stopped = asyncio.Event()
+
+    async def _retry_or_raise(self, attempt: int, reason: str, error: Exception):
+        """Wait before the next attempt, or re-raise if it was the last one."""
+        if attempt >= self.max_retries - 1 or self.stopping:
+            logger.error("[DISCORD] Max retries reached. Could not connect.")
+            raise error
+        delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+        logger.warning("[DISCORD] %s. Retrying in %.1fs...", reason, delay)
+        try:
+            # Wake up early if a shutdown is requested while waiting
+            await asyncio.wait_for(self._stopped.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self):
+        """Connect and run the bot until it is closed."""
+        for attempt in range(self.max_retries):
+            if self.stopping:
+                return
+            self.bot = self.bot_factory()
+            try:
+                logger.info("[DISCORD] Attempting to connect (attempt %s/%s)...", attempt + 1, self.max_retries)
+                await self.bot.start(self.token)
+                return  # Closed on purpose
+            except discord.HTTPException as e:
+                await self.bot.close()
+                if e.status == 429 or "rate limit" in str(e).lower():
+                    await self._retry_or_raise(attempt, "Rate limited", e)
+                else:
+                    logger.error("[DISCORD] HTTP Exception: %s", e, exc_info=True)
+                    raise
+            except discord.LoginFailure as e:
+                await self.bot.close()
+                logger.error("[DISCORD] Login failed - invalid token: %s", e, exc_info=True)
+                raise
+            except discord.ConnectionClosed as e:
+                await self.bot.close()
+                logger.error("[DISCORD] Connection closed unexpectedly: %s", e, exc_info=True)
+                await self._retry_or_raise(attempt, "Connection closed", e)
+            except Exception as e:
+                await self.bot.close()
+                logger.error("[DISCORD] Unexpected error: %s: %s", type(e).__name__, e, exc_info=True)
+                await self._retry_or_raise(attempt, "Unexpected error", e)
+
+    async def shutdown(self):
+        """Drain in-flight work, announce the shutdown and close the bot."""
+        self.stopping = True
+        self._stopped.set()
+        started = time.monotonic()
+        bot = self.bot
+
+        if bot is not None and not bot.is_closed():
+            bot.inflight.close()
+            logger.info("[SHUTDOWN] Draining %s in-flight handler(s)...", bot.inflight.active)
+            if not await bot.inflight.drain(SHUTDOWN_DRAIN_TIMEOUT):
+                logger.warning(
+                    "[SHUTDOWN] %s handler(s) still running after %ss", bot.inflight.active, SHUTDOWN_DRAIN_TIMEOUT
+                )
+            remaining = max(0.0, SHUTDOWN_DRAIN_TIMEOUT - (time.monotonic() - started))
+            await edit_scheduler.drain(remaining)
+
+            if bot.is_ready():
+                logger.info("[DISCORD] Sending shutdown message...")
+                await bot.send_shutdown_message()
+
+            logger.info("[DISCORD] Closing bot connection...")
+            await bot.close()
+
+        logger.info("[SHUTDOWN] Time to shutdown: %.2fs", time.monotonic() - started)
+
+
+async def run_until_signal(supervisor: BotSupervisor):
+    """Run a supervised bot until it stops or SIGINT/SIGTERM is received.
+
+    Args:
+        supervisor: Supervisor of the bot to run
+    """
+    # Setup shutdown handler
+    shutdown_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def signal_handler(sig):
+        """Handle shutdown signals."""
+        logger.info("[SHUTDOWN] Received signal %s, initiating shutdown...", sig.name)
+        shutdown_event.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, signal_handler, sig)
+        except NotImplementedError:
+            # Windows event loops do not support add_signal_handler
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(signal_handler, signal.Signals(signum)))
+
+    # Start bot with retry logic
+    bot_task = asyncio.create_task(supervisor.run())
+    shutdown_task = asyncio.create_task(shutdown_event.wait())
+
+    # Wait for shutdown signal or bot to stop
+    try:
+        await asyncio.wait([bot_task, shutdown_task], return_when=asyncio.FIRST_COMPLETED)
+
+        if shutdown_event.is_set():
+            logger.info("[SHUTDOWN] Processing shutdown...")
+            await supervisor.shutdown()
+
+        # Surface errors from the bot task (it finishes once the bot is closed)
+        await bot_task
+
+    except Exception as e:
+        logger.error("[ERROR] Main loop error: %s: %s", type(e).__name__, e, exc_info=True)
+    finally:
+        shutdown_task.cancel()
+
+        # Ensure bot is closed
+        bot = supervisor.bot
+        if bot and not bot.is_closed():
+            logger.info("[DISCORD] Ensuring bot connection is closed...")
+            await bot.close()
+
+        logger.info("[SHUTDOWN] Shutdown complete")
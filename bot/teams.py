@@ -0,0 +1,220 @@
+"""N-team splits for large in-house events (`!mix 4x5 ...`)."""
+
+import heapq
+import random
+import re
+import string
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balancer import resolve_weights
+from .constants import MAX_TEAM_COUNT, MAX_TEAM_SIZE, MESSAGE_CHAR_LIMIT
+
+# Team layout at the start of the !mix arguments: `<teams>x<players per team>`
+_LAYOUT_RE = re.compile(r'\s*(\d{1,3})\s*[xX×]\s*(\d{1,3})(?=\s|$)')
+
+
+class TeamLayout(NamedTuple):
+    """Number of teams and players per team."""
+
+    team_count: int
+    team_size: int
+
+    @property
+    def slots(self) -> int:
+        return self.team_count * self.team_size
+
+
+def parse_team_layout(text: str) -> Tuple[Optional[TeamLayout], str]:
+    """Split a leading team layout (e.g. `4x5`) off the !mix arguments.
+
+    Args:
+        text: Text after the command
+
+    Returns:
+        Tuple of (layout or None if absent or out of range, remaining text)
+    """
+    match = _LAYOUT_RE.match(text)
+    if not match:
+        return None, text
+    layout = TeamLayout(int(match.group(1)), int(match.group(2)))
+    if not (2 <= layout.team_count <= MAX_TEAM_COUNT and 1 <= layout.team_size <= MAX_TEAM_SIZE):
+        return None, text
+    return layout, text[match.end():]
+
+
+def team_name(index: int) -> str:
+    """Name of the team at `index`: Time A..Z, then Time 27, 28..."""
+    if index < len(string.ascii_uppercase):
+        return f"Time {string.ascii_uppercase[index]}"
+    return f"Time {index + 1}"
+
+
+def assign_teams(players: List[str], layout: TeamLayout, groups: Optional[List[List[str]]] = None,
+                 weights: Optional[Dict[str, float]] = None,
+                 rng: Optional[random.Random] = None) -> Tuple[List[List[str]], List[str]]:
+    """Split players into `layout.team_count` teams of up to `layout.team_size`.
+
+    Who plays is drawn at random; the rest go to the waitlist. Without
+    weights, grouped players are dealt first, round-robin over the teams that
+    still have room, so members of a group land on different teams whenever
+    the group is not larger than the team count; everyone else is dealt
+    after them the same way. With weights, players are placed heaviest first
+    on the lightest team with room that has no one from their group yet,
+    grouped players before everyone else (placed last, a grouped player
+    could find room only next to a groupmate).
+
+    Args:
+        players: List of all player names
+        layout: Number of teams and players per team
+        groups: Optional anti-panela groups
+        weights: Optional player weights keyed by lowercase player name
+        rng: Random source (defaults to the `random` module)
+
+    Returns:
+        Tuple of (teams, waitlist)
+    """
+    rng = rng or random
+    order = list(players)
+    rng.shuffle(order)
+    playing, waitlist = order[:layout.slots], order[layout.slots:]
+
+    group_of = {}
+    for index, group in enumerate(groups or []):
+        for name in group:
+            group_of.setdefault(name.lower(), index)
+
+    teams: List[List[str]] = [[] for _ in range(layout.team_count)]
+    if weights:
+        _assign_by_weight(playing, teams, layout.team_size, group_of, weights)
+    else:
+        grouped = [name for name in playing if name.lower() in group_of]
+        grouped.sort(key=lambda name: group_of[name.lower()])
+        ungrouped = [name for name in playing if name.lower() not in group_of]
+        _deal(grouped + ungrouped, teams, layout.team_size, rng.randrange(layout.team_count))
+    return teams, waitlist
+
+
+def _deal(players: Sequence[str], teams: List[List[str]], team_size: int, start: int):
+    """Deal players round-robin over the teams that still have room."""
+    open_teams = list(range(start, len(teams))) + list(range(start))
+    position = 0
+    for name in players:
+        if position >= len(open_teams):
+            position = 0
+        index = open_teams[position]
+        teams[index].append(name)
+        if len(teams[index]) >= team_size:
+            # The slot now holds the next team, so don't advance
+            del open_teams[position]
+        else:
+            position += 1
+
+
+def _assign_by_weight(players: List[str], teams: List[List[str]], team_size: int,
+                      group_of: Dict[str, int], weights: Dict[str, float]):
+    """Place grouped players, then the others, heaviest first on the lightest team with room."""
+    player_weights = dict(zip(players, resolve_weights(players, weights)))
+    team_groups = [set() for _ in teams]
+    heap = [(0.0, 0, index) for index in range(len(teams))]
+
+    for name in sorted(players, key=lambda name: (name.lower() not in group_of, -player_weights[name])):
+        group = group_of.get(name.lower())
+        skipped = []
+        entry = heapq.heappop(heap)
+        # Look for the lightest team without a groupmate; fall back to the lightest one
+        while group is not None and group in team_groups[entry[2]] and heap:
+            skipped.append(entry)
+            entry = heapq.heappop(heap)
+        if group is not None and group in team_groups[entry[2]] and skipped:
+            skipped.append(entry)
+            entry = skipped.pop(0)
+        for other in skipped:
+            heapq.heappush(heap, other)
+
+        total, count, index = entry
+        teams[index].append(name)
+        if group is not None:
+            team_groups[index].add(group)
+        if count + 1 < team_size:
+            heapq.heappush(heap, (total + player_weights[name], count + 1, index))
+
+
+def format_teams(teams: List[List[str]], team_size: int, waitlist: Optional[List[str]] = None,
+                 weights: Optional[Dict[str, float]] = None) -> List[str]:
+    """Format an N-team assignment, one block per team.
+
+    Args:
+        teams: Players on each team
+        team_size: Players per full team
+        waitlist: Optional players that stay out
+        weights: Optional player weights keyed by lowercase player name
+
+    Returns:
+        Message blocks (one per team, plus the waitlist)
+    """
+    blocks = []
+    for index, team in enumerate(teams):
+        header = f"# {team_name(index)} 🔫"
+        if weights:
+            header += f" (⚖️ {sum(resolve_weights(team, weights)):g})"
+        block = f"{header}\n {', '.join(team)}"
+        missing = team_size - len(team)
+        if missing > 0:
+            block += f" (+{missing} para completar)"
+        blocks.append(block)
+    if waitlist:
+        blocks.append(f"# Lista de Espera ⏳\n {', '.join(waitlist)}")
+    return blocks
+
+
+def paginate(blocks: List[str], limit: int = MESSAGE_CHAR_LIMIT) -> List[str]:
+    """Join blocks into as few messages as possible under Discord's length limit.
+
+    Blocks are never split unless a single block is longer than the limit,
+    in which case it is cut at the last comma that fits.
+
+    Args:
+        blocks: Message blocks, in order
+        limit: Maximum characters per message
+
+    Returns:
+        List of message contents
+    """
+    pages = []
+    current: List[str] = []
+    length = 0
+    for block in blocks:
+        while len(block) > limit:
+            cut = block.rfind(", ", 0, limit)
+            cut = cut + 1 if cut > 0 else limit
+            head, block = block[:cut], block[cut:].lstrip()
+            if current:
+                pages.append("\n\n".join(current))
+                current, length = [], 0
+            pages.append(head)
+        added = len(block) + (2 if current else 0)
+        if current and length + added > limit:
+            pages.append("\n\n".join(current))
+            current, length, added = [], 0, len(block)
+        current.append(block)
+        length += added
+    if current:
+        pages.append("\n\n".join(current))
+    return pages
+
+
+def create_multi_team_messages(users: List[str], layout: TeamLayout, groups: Optional[List[List[str]]] = None,
+                               weights: Optional[Dict[str, float]] = None) -> List[str]:
+    """Create the messages for an N-team assignment.
+
+    Args:
+        users: List of user names
+        layout: Number of teams and players per team
+        groups: Optional anti-panela groups
+        weights: Optional player weights keyed by lowercase player name
+
+    Returns:
+        Message contents, each within Discord's length limit
+    """
+    teams, waitlist = assign_teams(users, layout, groups, weights)
+    return paginate(format_teams(teams, layout.team_size, waitlist, weights))
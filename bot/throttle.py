@@ -0,0 +1,180 @@
+"""Click coalescing and per-channel edit throttling for button interactions.
+
+Every click is acknowledged right away (deferred update), but the message
+edit itself waits for a short window: clicks on the same message that land
+inside the window are merged into a single edit. Edits are then paced by a
+token bucket per channel so a lobby spamming a button does not run into
+Discord's per-channel rate limits.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import discord
+
+from .constants import CHANNEL_EDIT_BURST, CHANNEL_EDIT_RATE, CLICK_COALESCE_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Builds the final (content, view) of an edit; called once per coalesced batch
+RenderEdit = Callable[[], Tuple[str, Optional[discord.ui.View]]]
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum number of stored tokens (burst size)
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def reserve(self) -> float:
+        """Take one token, returning how long to wait before using it."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class _PendingEdit:
+    __slots__ = ("interaction", "render", "clicks", "task")
+
+    def __init__(self, interaction: discord.Interaction, render: RenderEdit):
+        self.interaction = interaction
+        self.render = render
+        self.clicks = 1
+        self.task: Optional[asyncio.Task] = None
+
+
+class EditScheduler:
+    """Coalesce clicks per message and throttle edits per channel.
+
+    Args:
+        window: Seconds to wait for more clicks before editing
+        rate: Edits per second allowed per channel
+        burst: Edits allowed back to back per channel
+        clock: Monotonic clock, injectable for tests
+        sleep: Sleep coroutine, injectable for tests
+    """
+
+    def __init__(self, window: float = CLICK_COALESCE_WINDOW, rate: float = CHANNEL_EDIT_RATE,
+                 burst: float = CHANNEL_EDIT_BURST, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._pending: Dict[int, _PendingEdit] = {}
+        # Edits past their window, being rendered and sent
+        self._sending: Dict[int, asyncio.Task] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.clicks = 0
+        self.merged_clicks = 0
+        self.edits = 0
+        self.throttled_edits = 0
+
+    def _bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self._buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._buckets[channel_id] = TokenBucket(self.rate, self.burst, self.clock)
+        return bucket
+
+    async def submit(self, interaction: discord.Interaction, render: RenderEdit):
+        """Acknowledge a click and schedule (or join) the edit of its message.
+
+        Args:
+            interaction: Button interaction
+            render: Builds the final content and view when the edit runs
+        """
+        self.clicks += 1
+        await interaction.response.defer()
+
+        message_id = interaction.message.id
+        pending = self._pending.get(message_id)
+        if pending is not None:
+            # Same message, edit not sent yet: the newest click wins
+            pending.clicks += 1
+            pending.interaction = interaction
+            pending.render = render
+            self.merged_clicks += 1
+            return
+
+        pending = self._pending[message_id] = _PendingEdit(interaction, render)
+        pending.task = asyncio.create_task(self._flush(message_id, pending))
+        self._tasks.add(pending.task)
+        pending.task.add_done_callback(self._tasks.discard)
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait for every pending edit to be sent, up to `timeout` seconds.
+
+        Returns:
+            True if no edit is pending anymore
+        """
+        if not self._tasks:
+            return True
+        _, not_done = await asyncio.wait(self._tasks, timeout=timeout)
+        return not not_done
+
+    async def cancel(self, message_id: int) -> Optional[str]:
+        """Drop the pending edit of a message (e.g. after the mix was accepted).
+
+        An edit already being sent cannot be called back, so it is waited
+        for: the caller's own edit of the message then lands after it.
+
+        Returns:
+            Content the message was just edited to, or None if it was not edited
+        """
+        pending = self._pending.pop(message_id, None)
+        if pending is not None and pending.task is not None:
+            pending.task.cancel()
+        sending = self._sending.get(message_id)
+        if sending is None:
+            return None
+        # Shielded: the edit must finish even if the caller is cancelled
+        return await asyncio.shield(sending)
+
+    async def _flush(self, message_id: int, pending: _PendingEdit) -> Optional[str]:
+        try:
+            await self.sleep(self.window)
+
+            wait = self._bucket(pending.interaction.channel_id).reserve()
+            if wait > 0:
+                self.throttled_edits += 1
+                await self.sleep(wait)
+        finally:
+            # Clicks arriving from now on start a new batch
+            if self._pending.get(message_id) is pending:
+                del self._pending[message_id]
+
+        # From here on `cancel` waits for the edit instead of dropping it
+        self._sending[message_id] = pending.task
+        try:
+            content, view = pending.render()
+            await pending.interaction.edit_original_response(content=content, view=view)
+            self.edits += 1
+            return content
+        except discord.HTTPException as e:
+            logger.warning("[DISCORD] Failed to edit message %s: %s", message_id, e)
+            return None
+        finally:
+            if self._sending.get(message_id) is pending.task:
+                del self._sending[message_id]
+
+
+edit_scheduler = EditScheduler()
@@ -3,125 +3,271 @@
 import re
 import random
 import discord
-from typing import List, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
+from .balancer import find_balanced_split, resolve_weights
+from .constants import HISTORY_CANDIDATES
+from .history import PairMatrix, least_repeated
+from .voice import voice_rosters
 
-def _replace_mentions_with_display_names(text: str, message: discord.Message) -> str:
-    """Replace Discord mentions with display names.
+
+# Single-pass roster tokenizer: a mention, an opening/closing bracket, a run of
+# separators (comma, semicolon, whitespace, hyphen) or a run of name characters.
+_ROSTER_TOKEN_RE = re.compile(
+    r'<@!?(?P<mention>\d+)>'
+    r'|(?P<open>[(\[{])'
+    r'|(?P<close>[)\]}])'
+    r'|(?P<sep>[,;\s-]+)'
+    r'|(?P<word>[^,;\s\-()\[\]{}<]+|<)'
+)
+
+# Same tokens for comma-separated lists (slash commands): spaces and hyphens
+# belong to the names
+_LIST_TOKEN_RE = re.compile(
+    r'<@!?(?P<mention>\d+)>'
+    r'|(?P<open>[(\[{])'
+    r'|(?P<close>[)\]}])'
+    r'|(?P<sep>[,;]+)'
+    r'|(?P<word>[^,;()\[\]{}<]+|<)'
+)
+
+_BRACKET_PAIRS = {'(': ')', '[': ']', '{': '}'}
+
+# Optional per-player weight suffix, e.g. "João:3" or "Maria:2.5"
+_WEIGHT_SUFFIX_RE = re.compile(r'^(?P<name>.*?)\s*:(?P<weight>\d+(?:\.\d+)?)$')
+
+
+class ParsedRoster(NamedTuple):
+    """Result of tokenizing a `!mix` argument string."""
+
+    players: List[str]
+    groups: List[List[str]]
+    weights: Dict[str, float]
+
+
+def _build_mention_table(message: discord.Message) -> Dict[str, str]:
+    """Build a mention ID -> display name lookup from the message mentions.
+
+    Args:
+        message: Discord message object to access mentions
+
+    Returns:
+        Dict mapping the mentioned user ID (as text) to its display name
+    """
+    return {str(user.id): user.display_name for user in message.mentions}
+
+
+_MENTION_RE = re.compile(r'<@!?(\d+)>')
+
+
+async def resolve_mentions(text: str, message: discord.Message) -> Dict[str, str]:
+    """Build the mention lookup table, fetching members missing from the cache.
+
+    Mentions normally come with their member data in `message.mentions`. With
+    the lean gateway profile the member cache is sparse, so any mentioned ID
+    that is neither in the message nor in the cache is fetched on demand.
 
     Args:
         text: Text containing mentions (<@id> or <@!id>)
         message: Discord message object to access mentions
 
     Returns:
-        Text with mentions replaced by display names
+        Dict mapping the mentioned user ID (as text) to its display name
+    """
+    names = _build_mention_table(message)
+    if not message.guild:
+        return names
+    return await resolve_guild_mentions(text, message.guild, names)
+
+
+async def resolve_guild_mentions(text: str, guild: discord.Guild,
+                                 names: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Resolve the mentions in a text from the member cache, fetching the missing members.
+
+    Args:
+        text: Text containing mentions (<@id> or <@!id>)
+        guild: Guild the mentioned members belong to
+        names: Mentions already resolved (left untouched)
+
+    Returns:
+        Dict mapping the mentioned user ID (as text) to its display name
     """
-    mention_pattern = r'<@!?(\d+)>'
-    mentions = re.findall(mention_pattern, text)
+    names = {} if names is None else names
+    if '<@' not in text:
+        return names
 
-    for user_id in mentions:
-        member = message.guild.get_member(int(user_id)) if message.guild else None
-        if member:
-            text = re.sub(f'<@!?{user_id}>', member.display_name, text)
+    for user_id in {m.group(1) for m in _MENTION_RE.finditer(text)} - names.keys():
+        member = guild.get_member(int(user_id))
+        if member is None:
+            try:
+                member = await guild.fetch_member(int(user_id))
+            except discord.HTTPException:
+                continue
+        names[user_id] = member.display_name
 
-    return text
+    return names
 
 
-def parse_players(text: str, message: discord.Message) -> List[str]:
-    """Parse player names from text input, handling multiple formats.
+def parse_roster(text: str, message: Optional[discord.Message],
+                 mention_names: Optional[Dict[str, str]] = None,
+                 resolve_name: Optional[Callable[[str], str]] = None,
+                 comma_separated: bool = False) -> ParsedRoster:
+    """Parse players and anti-panela groups from text in a single pass.
 
     Supports:
-    - Multiple separators: comma, hyphen, space, newline
-    - Discord mentions (@user, <@id>, <@!id>)
-    - Extracts display names from mentions
-    - Removes extra spaces and empty entries
-    - Removes duplicates
+    - Multiple separators: comma, semicolon, hyphen, space, newline (only
+      comma and semicolon with `comma_separated`)
+    - Discord mentions (<@id>, <@!id>), resolved to display names
+    - Groups delimited by (), [] or {} (nested brackets are flattened)
+    - Optional player weights with a `name:weight` suffix (e.g. `João:3`)
+    - Removes extra spaces, empty entries and duplicates (case-insensitive)
 
     Args:
         text: Raw text input from user
-        message: Discord message object to access mentions
+        message: Discord message object to access mentions (None for a slash command)
+        mention_names: Optional prebuilt mention lookup (see `resolve_mentions`)
+        resolve_name: Optional mapping of each name to a canonical one (see `fuzzy.FuzzyNameResolver`),
+            applied before deduplication
+        comma_separated: Keep spaces and hyphens inside names (slash command lists)
 
     Returns:
-        List of cleaned player names
+        ParsedRoster with the deduplicated player list, the groups and the
+        weights (keyed by lowercase player name)
     """
     if not text:
-        return []
+        return ParsedRoster([], [], {})
 
-    # Replace Discord mentions with display names
-    text = _replace_mentions_with_display_names(text, message)
+    if mention_names is None:
+        mention_names = _build_mention_table(message) if message is not None else {}
+    guild = message.guild if message is not None else None
+    token_re = _LIST_TOKEN_RE if comma_separated else _ROSTER_TOKEN_RE
 
-    # Remove brackets so they don't interfere with player name parsing
-    text = re.sub(r'[()[\]{}]', ' ', text)
+    players = []
+    seen = set()
+    groups = []
+    weights = {}
+    group = None
+    group_closer = None
+    parts = []
+
+    def flush():
+        if not parts:
+            return
+        name = ' '.join(''.join(parts).split())
+        parts.clear()
+        weight = None
+        weighted = _WEIGHT_SUFFIX_RE.match(name)
+        if weighted and weighted.group('name'):
+            name = weighted.group('name')
+            weight = float(weighted.group('weight'))
+        if not name:
+            return
+        if resolve_name is not None:
+            name = resolve_name(name)
+        name_lower = name.lower()
+        if name_lower not in seen:
+            seen.add(name_lower)
+            players.append(name)
+        if weight is not None:
+            weights.setdefault(name_lower, weight)
+        if group is not None:
+            group.append(name)
+
+    for match in token_re.finditer(text):
+        kind = match.lastgroup
+
+        if kind == 'word':
+            parts.append(match.group())
+
+        elif kind == 'mention':
+            user_id = match.group('mention')
+            name = mention_names.get(user_id)
+            if name is None and guild:
+                member = guild.get_member(int(user_id))
+                if member:
+                    name = member.display_name
+                    mention_names[user_id] = name
+            parts.append(name if name is not None else match.group())
+
+        elif kind == 'sep':
+            flush()
+
+        elif kind == 'open':
+            flush()
+            if group is None:
+                group = []
+                group_closer = _BRACKET_PAIRS[match.group()]
+
+        else:  # close
+            flush()
+            if group is not None and match.group() == group_closer:
+                if group:
+                    groups.append(group)
+                group = None
+                group_closer = None
+
+    flush()
+
+    return ParsedRoster(players, groups, weights)
 
-    # Note: @username format (not a real mention) will be handled by separator logic
-    # The @ symbol will be part of the name or treated as separator depending on context
 
-    # Split by multiple separators: comma, hyphen, space, newline
-    # Use regex to split on any of these separators
-    # Note: hyphen must be at start/end of character class or escaped
-    separators = r'[,;\s\n-]+'
-    players = re.split(separators, text)
+def parse_players(text: str, message: discord.Message) -> List[str]:
+    """Parse player names from text input, handling multiple formats.
 
-    # Clean up players
-    cleaned_players = []
-    seen = set()
+    See `parse_roster` for the accepted formats.
 
-    for player in players:
-        player = player.strip()
-        # Remove empty strings
-        if player:
-            # Normalize: remove extra spaces, convert to lowercase for duplicate check
-            normalized = ' '.join(player.split())
-            normalized_lower = normalized.lower()
+    Args:
+        text: Raw text input from user
+        message: Discord message object to access mentions
 
-            # Check for duplicates (case-insensitive)
-            if normalized_lower not in seen:
-                seen.add(normalized_lower)
-                cleaned_players.append(normalized)
+    Returns:
+        List of cleaned player names
+    """
+    return parse_roster(text, message).players
 
-    return cleaned_players
 
+def parse_report_targets(text: str, mention_names: Dict[str, str]) -> List[str]:
+    """Parse the players of a `!report`, separated by commas.
 
-def extract_groups_from_text(text: str, message: discord.Message) -> List[List[str]]:
-    """Extract player groups from text using (), [] or {} brackets.
+    Names may contain spaces; mentions are resolved to display names, and a
+    part made only of mentions (`@João @Maria`) counts as one player each.
 
     Args:
-        text: Raw text input from user
-        message: Discord message object to access mentions
+        text: Text after the command
+        mention_names: Mention lookup (see `resolve_mentions`)
 
     Returns:
-        List of groups, where each group is a list of player names
+        Reported player names, without duplicates (case-insensitive)
     """
-    if not text:
-        return []
+    targets = []
+    seen = set()
+    for part in text.split(","):
+        mentions = _MENTION_RE.findall(part)
+        if mentions and not _MENTION_RE.sub("", part).strip():
+            names = [mention_names.get(user_id, f"<@{user_id}>") for user_id in mentions]
+        else:
+            names = [_MENTION_RE.sub(lambda m: mention_names.get(m.group(1), m.group(0)), part).strip()]
+        for name in names:
+            if name and name.casefold() not in seen:
+                seen.add(name.casefold())
+                targets.append(name)
+    return targets
 
-    # Replace Discord mentions with display names
-    text = _replace_mentions_with_display_names(text, message)
 
-    groups = []
+def extract_groups_from_text(text: str, message: discord.Message) -> List[List[str]]:
+    """Extract player groups from text using (), [] or {} brackets.
 
-    patterns = [
-        r'\(([^()]+)\)',
-        r'\[([^\[\]]+)\]',
-        r'\{([^{}]+)\}',
-    ]
+    See `parse_roster` for the accepted formats.
 
-    for pattern in patterns:
-        matches = re.finditer(pattern, text)
-        for match in matches:
-            group_content = match.group(1)
-            separators = r'[,;\s\n-]+'
-            group_players = [p.strip() for p in re.split(
-                separators, group_content) if p.strip()]
-            cleaned_group = []
-            for player in group_players:
-                normalized = ' '.join(player.split())
-                if normalized:
-                    cleaned_group.append(normalized)
-            if cleaned_group:
-                groups.append(cleaned_group)
+    Args:
+        text: Raw text input from user
+        message: Discord message object to access mentions
 
-    return groups
+    Returns:
+        List of groups, where each group is a list of player names
+    """
+    return parse_roster(text, message).groups
 
 
 def balance_teams_with_groups(players: List[str], groups: List[List[str]]) -> List[str]:
@@ -193,6 +339,37 @@ def balance_teams_with_groups(players: List[str], groups: List[List[str]]) -> Li
     return team_a + team_b
 
 
+def balance_teams_by_weight(players: List[str], groups: Optional[List[List[str]]],
+                            weights: Dict[str, float]) -> List[str]:
+    """Split players into the two teams with the closest total weight.
+
+    Groups are a hard constraint: each group is split as evenly as possible
+    between the teams. Ties between equally fair splits are broken randomly.
+
+    Args:
+        players: List of all player names
+        groups: Optional list of groups, where each group is a list of player names
+        weights: Explicit weights keyed by lowercase player name
+
+    Returns:
+        List of players ordered for team distribution (first (n + 1) // 2 = team A, rest = team B)
+    """
+    shuffled = players.copy()
+    random.shuffle(shuffled)
+
+    index = {player.lower(): i for i, player in enumerate(shuffled)}
+    group_indices = [
+        [index[p.lower()] for p in group if p.lower() in index]
+        for group in groups or []
+    ]
+
+    mask = find_balanced_split(resolve_weights(shuffled, weights), (len(shuffled) + 1) // 2, group_indices)
+
+    team_a = [p for i, p in enumerate(shuffled) if mask >> i & 1]
+    team_b = [p for i, p in enumerate(shuffled) if not mask >> i & 1]
+    return team_a + team_b
+
+
 def get_voice_channel_members(message: discord.Message) -> Optional[List[str]]:
     """Get display names of all members in the author's voice channel.
 
@@ -202,10 +379,45 @@ def get_voice_channel_members(message: discord.Message) -> Optional[List[str]]:
     Returns:
         List of display names (excluding bots), or None if author is not in a voice channel
     """
-    if not message.author.voice or not message.author.voice.channel:
+    return voice_channel_members_of(message.author)
+
+
+def voice_channel_members_of(member: discord.Member) -> Optional[List[str]]:
+    """Get display names of all members in a member's voice channel.
+
+    Reads the incremental voice roster index when it tracks the guild, and
+    falls back to scanning the channel members otherwise.
+
+    Args:
+        member: Member whose voice channel is used (users outside a guild have none)
+
+    Returns:
+        List of display names (excluding bots), or None if the member is not in a voice channel
+    """
+    voice = getattr(member, "voice", None)
+    if not voice or not voice.channel:
         return None
 
-    voice_channel = message.author.voice.channel
+    voice_channel = voice.channel
+    if voice_rosters.is_tracking(member.guild.id):
+        members = voice_rosters.names(voice_channel.id)
+    else:
+        members = scan_voice_channel_members(voice_channel)
+
+    return members if members else None
+
+
+def scan_voice_channel_members(voice_channel: discord.VoiceChannel) -> List[str]:
+    """Get display names of the non-bot members in a voice channel by walking its members.
+
+    This is the slow path behind `voice_rosters`, also used to check it.
+
+    Args:
+        voice_channel: Voice channel to scan
+
+    Returns:
+        List of display names (excluding bots)
+    """
     members = []
 
     for member in voice_channel.members:
@@ -213,29 +425,105 @@ def get_voice_channel_members(message: discord.Message) -> Optional[List[str]]:
         if not member.bot:
             members.append(member.display_name)
 
-    return members if members else None
+    return members
 
 
-def create_team_message(users: List[str], groups: Optional[List[List[str]]] = None) -> str:
-    """Create team assignment message from list of users.
+_TEAM_HEADER_RE = re.compile(r'^# Time ([AB]) 🔫')
+_MISSING_PLAYERS_RE = re.compile(r' \(\+\d+ para completar\)$')
 
-    Handles different player counts:
-    - > 10: Randomly selects who stays out (groups don't affect this), then balances remaining 10
-    - = 10: Normal division into 2 teams of 5 (with group balancing if applicable)
-    - < 10: Divides equally and indicates how many are missing to complete 5 per team
 
-    If groups are provided, uses balanced distribution for team assignment (not for selection of who stays out).
+def _team_header(name: str, team: List[str], weights: Optional[Dict[str, float]]) -> str:
+    """Format a team header, including the team weight when weights are in use."""
+    if not weights:
+        return f"# {name} 🔫"
+    total = sum(resolve_weights(team, weights))
+    return f"# {name} 🔫 (⚖️ {total:g})"
+
+
+def format_team_message(team_a: List[str], team_b: List[str], waitlist: Optional[List[str]] = None,
+                        weights: Optional[Dict[str, float]] = None) -> str:
+    """Format a team assignment message.
+
+    Teams with less than 5 players indicate how many are missing to complete them.
 
     Args:
-        users: List of user names
-        groups: Optional list of player groups for balanced distribution
+        team_a: Players on Time A
+        team_b: Players on Time B
+        waitlist: Optional players that stay out
+        weights: Optional player weights keyed by lowercase player name
 
     Returns:
         Formatted message with team assignments
     """
-    if not users:
-        return "Nenhum jogador encontrado."
+    missing_a = 5 - len(team_a)
+    missing_b = 5 - len(team_b)
+
+    response = f"{_team_header('Time A', team_a, weights)}\n {', '.join(team_a)}"
+    if missing_a > 0:
+        response += f" (+{missing_a} para completar)"
+
+    response += f"\n\n{_team_header('Time B', team_b, weights)}\n {', '.join(team_b)}"
+    if missing_b > 0:
+        response += f" (+{missing_b} para completar)"
+
+    if waitlist:
+        response += f"\n\n# Lista de Espera ⏳\n {', '.join(waitlist)}"
+
+    return response
+
+
+def _split_names(text: str, names: Sequence[str]) -> Optional[List[str]]:
+    """Split ", "-joined names back into the names, which may contain ", " themselves."""
+    ordered = sorted(set(names), key=len, reverse=True)
+
+    @lru_cache(maxsize=None)
+    def split_from(start: int) -> Optional[Tuple[str, ...]]:
+        if start == len(text):
+            return ()
+        for name in ordered:
+            end = start + len(name)
+            if text.startswith(name, start) and (end == len(text) or text.startswith(", ", end)):
+                rest = split_from(end if end == len(text) else end + 2)
+                if rest is not None:
+                    return (name, *rest)
+        return None
+
+    split = split_from(0) if text else ()
+    return list(split) if split is not None else None
 
+
+def parse_team_message(content: str, players: Sequence[str]) -> Optional[Tuple[List[str], List[str]]]:
+    """Read the teams back from a message built by `format_team_message`.
+
+    Args:
+        content: Message content
+        players: Roster the message was built from (names may contain ", ")
+
+    Returns:
+        Tuple of (Time A players, Time B players), or None if the message has
+        no teams or they are not made of roster players
+    """
+    teams = {}
+    lines = content.split("\n")
+    for header, players_line in zip(lines, lines[1:]):
+        match = _TEAM_HEADER_RE.match(header)
+        if match:
+            team = _split_names(_MISSING_PLAYERS_RE.sub("", players_line[1:]), players)
+            if team is None:
+                return None
+            teams[match.group(1)] = team
+    if "A" not in teams or "B" not in teams:
+        return None
+    return teams["A"], teams["B"]
+
+
+def _draw_teams(users: List[str], groups: Optional[List[List[str]]],
+                weights: Optional[Dict[str, float]]) -> Tuple[List[str], List[str], List[str]]:
+    """Draw one random split of `users` (see `create_team_message`).
+
+    Returns:
+        Tuple of (Time A players, Time B players, waitlist)
+    """
     if len(users) > 10:
         shuffled_all = users.copy()
         random.shuffle(shuffled_all)
@@ -255,51 +543,63 @@ def create_team_message(users: List[str], groups: Optional[List[List[str]]] = No
             if not filtered_groups:
                 filtered_groups = None
 
-        if filtered_groups:
+        if weights:
+            balanced_players = balance_teams_by_weight(
+                playing_players, filtered_groups, weights)
+        elif filtered_groups:
             balanced_players = balance_teams_with_groups(
                 playing_players, filtered_groups)
         else:
             balanced_players = playing_players.copy()
             random.shuffle(balanced_players)
 
-        team_a = balanced_players[:5]
-        team_b = balanced_players[5:10]
-
-        response = f"# Time A 🔫\n {', '.join(team_a)}\n\n# Time B 🔫\n {', '.join(team_b)}"
-        response += f"\n\n# Lista de Espera ⏳\n {', '.join(out_players)}"
-
-        return response
+        return balanced_players[:5], balanced_players[5:10], out_players
 
-    if groups:
+    if weights:
+        shuffled = balance_teams_by_weight(users, groups, weights)
+    elif groups:
         shuffled = balance_teams_with_groups(users, groups)
     else:
         shuffled = users.copy()
         random.shuffle(shuffled)
 
-    if len(shuffled) == 10:
-        team_a = shuffled[:5]
-        team_b = shuffled[5:10]
-
-        response = f"# Time A 🔫\n {', '.join(team_a)}\n\n# Time B 🔫\n {', '.join(team_b)}"
-        return response
-
-    # Less than 10 players: divide equally and indicate missing
     # Divide as equally as possible
     # For odd numbers, first team gets the extra player
     half = (len(shuffled) + 1) // 2
-    team_a = shuffled[:half]
-    team_b = shuffled[half:]
+    return shuffled[:half], shuffled[half:], []
 
-    # Calculate how many are missing to complete 5 per team
-    missing_a = 5 - len(team_a)
-    missing_b = 5 - len(team_b)
 
-    response = f"# Time A 🔫\n {', '.join(team_a)}"
-    if missing_a > 0:
-        response += f" (+{missing_a} para completar)"
+def create_team_message(users: List[str], groups: Optional[List[List[str]]] = None,
+                        weights: Optional[Dict[str, float]] = None,
+                        history: Optional[PairMatrix] = None) -> str:
+    """Create team assignment message from list of users.
 
-    response += f"\n\n# Time B 🔫\n {', '.join(team_b)}"
-    if missing_b > 0:
-        response += f" (+{missing_b} para completar)"
+    Handles different player counts:
+    - > 10: Randomly selects who stays out (groups don't affect this), then balances remaining 10
+    - = 10: Normal division into 2 teams of 5 (with group balancing if applicable)
+    - < 10: Divides equally and indicates how many are missing to complete 5 per team
 
-    return response
+    If groups are provided, uses balanced distribution for team assignment (not for selection of who stays out).
+    If weights are provided, picks the split with the smallest weight difference between the teams.
+    If a teammate history is provided (and no weights), draws several splits and keeps the one whose
+    players were teammates the least in accepted mixes.
+
+    Args:
+        users: List of user names
+        groups: Optional list of player groups for balanced distribution
+        weights: Optional player weights keyed by lowercase player name
+        history: Optional pair matrix of the guild's accepted mixes
+
+    Returns:
+        Formatted message with team assignments
+    """
+    if not users:
+        return "Nenhum jogador encontrado."
+
+    if history and not weights:
+        team_a, team_b, waitlist = least_repeated(
+            (_draw_teams(users, groups, weights) for _ in range(HISTORY_CANDIDATES)), history
+        )
+    else:
+        team_a, team_b, waitlist = _draw_teams(users, groups, weights)
+    return format_team_message(team_a, team_b, waitlist or None, weights)
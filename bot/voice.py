@@ -0,0 +1,111 @@
+"""Incremental index of who is in each voice channel."""
+
+from typing import Dict, Iterable, List, Tuple
+
+import discord
+
+
+class VoiceRosterIndex:
+    """Non-bot display names per voice channel, in join order.
+
+    Kept up to date from voice state updates, so reading a channel roster
+    does not walk `voice_channel.members` or depend on the member cache.
+    """
+
+    def __init__(self):
+        # channel ID -> {member ID: display name}, in join order
+        self._channels: Dict[int, Dict[int, str]] = {}
+        self._member_channel: Dict[Tuple[int, int], int] = {}
+        self._names: Dict[int, Tuple[str, ...]] = {}
+        self._guilds = set()
+
+    def _remove(self, guild_id: int, member_id: int):
+        channel_id = self._member_channel.pop((guild_id, member_id), None)
+        if channel_id is None:
+            return
+        members = self._channels.get(channel_id)
+        if members is not None:
+            members.pop(member_id, None)
+            if not members:
+                del self._channels[channel_id]
+        self._names.pop(channel_id, None)
+
+    def _add(self, guild_id: int, channel_id: int, member_id: int, display_name: str):
+        self._channels.setdefault(channel_id, {})[member_id] = display_name
+        self._member_channel[(guild_id, member_id)] = channel_id
+        self._names.pop(channel_id, None)
+
+    def seed_guild(self, guild: discord.Guild):
+        """(Re)build the rosters of a guild from its current voice states."""
+        self.drop_guild(guild.id)
+        for channel in (*guild.voice_channels, *guild.stage_channels):
+            for member in channel.members:
+                if not member.bot:
+                    self._add(guild.id, channel.id, member.id, member.display_name)
+        self._guilds.add(guild.id)
+
+    def drop_guild(self, guild_id: int):
+        """Forget every roster of a guild."""
+        for key in [key for key in self._member_channel if key[0] == guild_id]:
+            self._remove(*key)
+        self._guilds.discard(guild_id)
+
+    def is_tracking(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+
+    def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState,
+                              after: discord.VoiceState):
+        """Apply a voice state update (join, leave, move)."""
+        if member.bot:
+            return
+        before_id = before.channel.id if before.channel else None
+        after_id = after.channel.id if after.channel else None
+        if before_id == after_id:
+            # Mute/deafen changes: only refresh the name
+            if after_id is not None:
+                self._channels.get(after_id, {})[member.id] = member.display_name
+                self._names.pop(after_id, None)
+            return
+        self._remove(member.guild.id, member.id)
+        if after_id is not None:
+            self._add(member.guild.id, after_id, member.id, member.display_name)
+
+    def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Follow display name changes of members sitting in voice."""
+        if before.display_name == after.display_name:
+            return
+        channel_id = self._member_channel.get((after.guild.id, after.id))
+        if channel_id is not None:
+            self._channels[channel_id][after.id] = after.display_name
+            self._names.pop(channel_id, None)
+
+    def names(self, channel_id: int) -> List[str]:
+        """Display names in a voice channel, in join order."""
+        names = self._names.get(channel_id)
+        if names is None:
+            names = self._names[channel_id] = tuple(self._channels.get(channel_id, {}).values())
+        return list(names)
+
+    def names_in(self, channel_ids: Iterable[int]) -> List[str]:
+        """Display names across several voice channels (e.g. a channel and its lobby)."""
+        names = []
+        for channel_id in channel_ids:
+            names.extend(self.names(channel_id))
+        return names
+
+    def mismatches(self, guild: discord.Guild) -> Dict[int, Tuple[List[str], List[str]]]:
+        """Compare the index against a full scan of the guild voice channels.
+
+        Returns:
+            channel ID -> (indexed names, scanned names) for every channel that differs
+        """
+        differences = {}
+        for channel in (*guild.voice_channels, *guild.stage_channels):
+            indexed = sorted(self.names(channel.id))
+            scanned = sorted(m.display_name for m in channel.members if not m.bot)
+            if indexed != scanned:
+                differences[channel.id] = (indexed, scanned)
+        return differences
+
+
+voice_rosters = VoiceRosterIndex()
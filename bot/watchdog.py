@@ -0,0 +1,192 @@
+"""Event loop stall watchdog and CPU offload hook.
+
+When enabled, a background thread watches the event loop heartbeat (fed by
+`LoopLagMonitor`). If the loop stops ticking for longer than the threshold,
+the thread samples the loop thread's stack and records it together with the
+handlers running at that moment (command and input size). Handlers are also
+timed, and slow ones are logged with the samples taken while they ran.
+
+Disabled, `track()` is a shared no-op context manager, so the hot path only
+pays for one attribute lookup and a `with` block.
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+
+from .constants import OFFLOAD_CPU, OFFLOAD_MIN_SIZE, WATCHDOG_INTERVAL, WATCHDOG_SAMPLES, WATCHDOG_THRESHOLD
+from .metrics import EVENT_LOOP_LAG, Counter, registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EVENT_LOOP_STALLS = registry.register(Counter(
+    "perna_event_loop_stalls_total", "Event loop stalls longer than the watchdog threshold."))
+SLOW_HANDLERS = registry.register(Counter(
+    "perna_slow_handlers_total", "Handlers that ran longer than the watchdog threshold.", ("handler",)))
+
+
+class StallSample(NamedTuple):
+    """Stack of the event loop thread captured during a stall."""
+
+    blocked_for: float
+    handlers: List[Tuple[str, int]]
+    stack: str
+
+
+class _NullTrack:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TRACK = _NullTrack()
+
+
+class _Track:
+    __slots__ = ("watchdog", "label", "size", "key", "started", "samples")
+
+    def __init__(self, watchdog: "StallWatchdog", label: str, size: int):
+        self.watchdog = watchdog
+        self.label = label
+        self.size = size
+        # Stall samples taken while the handler ran (appended by the watchdog thread)
+        self.samples: List[StallSample] = []
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.key = next(self.watchdog._keys)
+        self.watchdog._active[self.key] = self
+        return self
+
+    def __exit__(self, *exc_info):
+        watchdog = self.watchdog
+        del watchdog._active[self.key]
+        elapsed = time.perf_counter() - self.started
+        if elapsed >= watchdog.threshold:
+            watchdog._slow_handler(self, elapsed)
+        return False
+
+
+class StallWatchdog:
+    """Detect event loop stalls and slow handlers.
+
+    Args:
+        threshold: Seconds without a loop heartbeat (or of handler run time) that count as a stall
+        interval: Seconds between heartbeat checks by the watchdog thread
+        max_samples: Number of stall samples kept in memory
+    """
+
+    def __init__(self, threshold: float = WATCHDOG_THRESHOLD, interval: float = WATCHDOG_INTERVAL,
+                 max_samples: int = WATCHDOG_SAMPLES):
+        self.threshold = threshold
+        self.interval = interval
+        self.samples: Deque[StallSample] = deque(maxlen=max_samples)
+        self.enabled = False
+        self._active: Dict[int, _Track] = {}
+        self._keys = itertools.count()
+        self._last_beat = time.perf_counter()
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def track(self, label: str, size: int = 0):
+        """Time a handler run (no-op unless the watchdog is running).
+
+        Args:
+            label: Command or interaction name
+            size: Input size (e.g. message length or roster size)
+        """
+        if not self.enabled:
+            return _NULL_TRACK
+        return _Track(self, label, size)
+
+    def on_lag(self, lag: float):
+        """Heartbeat from `LoopLagMonitor`: records the lag and that the loop is alive."""
+        self._last_beat = time.perf_counter()
+        EVENT_LOOP_LAG.observe(lag)
+
+    def start(self):
+        """Start watching the running event loop from a background thread."""
+        if self._thread is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self.enabled = True
+        self._thread = threading.Thread(target=self._watch, name="perna-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("[WATCHDOG] Watching the event loop (threshold %.0f ms)", self.threshold * 1000)
+
+    def stop(self):
+        self.enabled = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _watch(self):
+        sampled_beat = None
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            # The heartbeat itself is expected every `interval` seconds
+            blocked_for = time.perf_counter() - beat - self.interval
+            if blocked_for < self.threshold or beat == sampled_beat:
+                continue
+            sampled_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            tracks = list(self._active.values())
+            handlers = [(track.label, track.size) for track in tracks]
+            sample = StallSample(blocked_for, handlers, stack)
+            self.samples.append(sample)
+            for track in tracks:
+                track.samples.append(sample)
+            EVENT_LOOP_STALLS.inc()
+            running = ", ".join(f"{label} (input {size})" for label, size in handlers) or "no tracked handler"
+            logger.warning(
+                "[WATCHDOG] Event loop blocked for %.0f ms in %s\n%s", blocked_for * 1000, running, stack,
+            )
+
+    def _slow_handler(self, track: _Track, elapsed: float):
+        SLOW_HANDLERS.inc(1.0, track.label)
+        # A handler can be slow without blocking the loop (e.g. waiting on Discord): then nothing was sampled
+        samples = "".join(
+            f"\n-- event loop blocked for {sample.blocked_for * 1000:.0f} ms --\n{sample.stack}"
+            for sample in list(track.samples)
+        )
+        logger.warning(
+            "[WATCHDOG] Slow handler %s took %.0f ms (input %s), %s stall sample(s)%s",
+            track.label, elapsed * 1000, track.size, len(track.samples), samples,
+        )
+
+
+watchdog = StallWatchdog()
+
+
+async def offload(func: Callable[..., T], *args, size: int = 0, **kwargs) -> T:
+    """Run CPU-heavy work in the default executor when enabled and the input is large.
+
+    With PERNA_OFFLOAD_CPU off (or `size` below OFFLOAD_MIN_SIZE) the function
+    simply runs inline, so results are identical either way.
+
+    Args:
+        func: Function to run (must not touch the event loop)
+        size: Input size used to decide whether offloading is worth it
+
+    Returns:
+        The function's result
+    """
+    if not OFFLOAD_CPU or size < OFFLOAD_MIN_SIZE:
+        return func(*args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
@@ -1,145 +1,72 @@
 """Main entry point for Perna Mix Bot."""
 
 import asyncio
+import atexit
 import logging
 import os
-import signal
 import sys
-import warnings
-import discord
 
-from bot.client import PernaBot
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Loaded first so PERNA_STARTUP_PROFILE=1 can time every import below
+from bot.startup import startup_profile
+if __name__ == "__main__":
+    startup_profile.time_imports()
 
-# Set discord.py logging to INFO to see connection issues
-logging.getLogger('discord').setLevel(logging.INFO)
-logging.getLogger('discord.gateway').setLevel(logging.INFO)
-logging.getLogger('discord.client').setLevel(logging.INFO)
+from bot.client import AutoShardedPernaBot, PernaBot
+from bot.constants import AUTO_SHARD, CLUSTER_COUNT, SHARD_COUNT
+from bot.logs import setup_logging
+from bot.supervisor import BotSupervisor, run_until_signal
 
-# Filter out ResourceWarning about unclosed sockets (these are managed by discord.py)
-warnings.filterwarnings('ignore', category=ResourceWarning, message='unclosed.*')
+logger = logging.getLogger(__name__)
 
 
-async def start_bot_with_retry(token: str, max_retries: int = 5):
-    """Start bot with exponential backoff retry logic.
+def configure_logging():
+    """Configure logging for this process.
 
-    Args:
-        token: Discord bot token
-        max_retries: Maximum number of retry attempts
+    Only run when started as a script: cluster workers import this module
+    again (as `__mp_main__`) and configure their own logging.
     """
-    bot = PernaBot()
-    retry_delay = 5  # Initial delay in seconds
-
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"[DISCORD] Attempting to connect (attempt {attempt + 1}/{max_retries})...")
-            await bot.start(token)
-            break  # Successfully started
-        except discord.HTTPException as e:
-            if e.status == 429 or "rate limit" in str(e).lower():
-                if attempt < max_retries - 1:
-                    logger.warning(f"[DISCORD] Rate limited. Waiting {retry_delay}s before retry...")
-                    await asyncio.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    logger.error("[DISCORD] Max retries reached. Could not connect.")
-                    raise
-            else:
-                logger.error(f"[DISCORD] HTTP Exception: {e}", exc_info=True)
-                raise
-        except discord.LoginFailure as e:
-            logger.error(f"[DISCORD] Login failed - invalid token: {e}", exc_info=True)
-            raise
-        except discord.ConnectionClosed as e:
-            logger.error(f"[DISCORD] Connection closed unexpectedly: {e}", exc_info=True)
-            if attempt < max_retries - 1:
-                logger.info(f"[DISCORD] Retrying in {retry_delay}s...")
-                await asyncio.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                raise
-        except Exception as e:
-            logger.error(f"[DISCORD] Unexpected error: {type(e).__name__}: {e}", exc_info=True)
-            if attempt < max_retries - 1:
-                logger.info(f"[DISCORD] Retrying in {retry_delay}s...")
-                await asyncio.sleep(retry_delay)
-                retry_delay *= 2
-            else:
-                raise
-
-    return bot
+    # PERNA_LOG_MODE=json writes JSON lines from a background thread
+    log_listener = setup_logging()
+    if log_listener is not None:
+        atexit.register(log_listener.stop)
 
 
-async def main():
-    """Main application entry point."""
-    # Get Discord token from environment
+def get_token() -> str:
+    """Get Discord token from environment, exiting if it is missing."""
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         logger.error("[STARTUP] DISCORD_TOKEN environment variable not set")
         sys.exit(1)
+    return token
+
+
+async def main():
+    """Main application entry point."""
+    token = get_token()
 
     logger.info("[STARTUP] Starting Perna Mix Bot...")
 
-    # Setup shutdown handler
-    shutdown_event = asyncio.Event()
-
-    def signal_handler(sig, frame):
-        """Handle shutdown signals."""
-        logger.info(f"[SHUTDOWN] Received signal {sig}, initiating shutdown...")
-        shutdown_event.set()
-
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
-    # Start bot with retry logic
-    bot_task = asyncio.create_task(start_bot_with_retry(token))
-
-    # Wait for shutdown signal or bot to stop
-    bot = None
-    try:
-        done, pending = await asyncio.wait(
-            [bot_task, asyncio.create_task(shutdown_event.wait())],
-            return_when=asyncio.FIRST_COMPLETED
-        )
-
-        if shutdown_event.is_set():
-            logger.info("[SHUTDOWN] Processing shutdown...")
-            # Get bot instance from completed task
-            if bot_task.done() and not bot_task.exception():
-                bot = bot_task.result()
-                # Send shutdown message
-                logger.info("[DISCORD] Sending shutdown message...")
-                await bot.send_shutdown_message()
-                await asyncio.sleep(2)  # Give time for message to be sent
-
-                # Close bot
-                logger.info("[DISCORD] Closing bot connection...")
-                await bot.close()
-
-        # Cancel any pending tasks
-        for task in pending:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
-
-    except Exception as e:
-        logger.error(f"[ERROR] Main loop error: {type(e).__name__}: {e}", exc_info=True)
-    finally:
-        # Ensure bot is closed
-        if bot and not bot.is_closed():
-            logger.info("[DISCORD] Ensuring bot connection is closed...")
-            await bot.close()
-
-        logger.info("[SHUTDOWN] Shutdown complete")
+    bot_factory = AutoShardedPernaBot if AUTO_SHARD else PernaBot
+    await run_until_signal(BotSupervisor(token, bot_factory=bot_factory))
+
+
+def main_cluster():
+    """Cluster entry point: run the shards across PERNA_CLUSTERS worker processes."""
+    from bot.cluster import ClusterLauncher, fetch_recommended_shard_count
+
+    token = get_token()
+    shard_count = SHARD_COUNT or asyncio.run(fetch_recommended_shard_count(token))
+
+    logger.info("[STARTUP] Starting Perna Mix Bot with %s shards in %s clusters...", shard_count, CLUSTER_COUNT)
+
+    ClusterLauncher(shard_count, CLUSTER_COUNT).run()
+    logger.info("[SHUTDOWN] Shutdown complete")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    configure_logging()
+    startup_profile.report_imports()
+    if CLUSTER_COUNT > 0:
+        main_cluster()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,17 @@
+import pytest
+
+from bot.history import teammate_history
+from bot.mixstore import mix_store
+from bot.ratings import rating_book
+from bot.reports import report_queue
+
+
+@pytest.fixture(autouse=True, scope="session")
+def data_dir(tmp_path_factory):
+    """Keep everything the handlers store out of the real data dir."""
+    directory = tmp_path_factory.mktemp("data")
+    mix_store.path = str(directory / "mixes.sqlite3")
+    teammate_history.path = str(directory / "history.sqlite3")
+    rating_book.store.path = str(directory / "ratings.sqlite3")
+    report_queue.log.path = str(directory / "reports.jsonl")
+    return directory
@@ -0,0 +1,55 @@
+import random
+from itertools import combinations
+from math import comb
+
+from bot.balancer import find_balanced_split, rank_splits, resolve_weights
+
+
+def _gap(weights, mask):
+    team_a = sum(w for i, w in enumerate(weights) if mask >> i & 1)
+    return abs(sum(weights) - 2 * team_a)
+
+
+def test_splits_are_ranked_from_the_most_balanced():
+    weights = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+
+    ranked = rank_splits(weights, 5, rng=random.Random(1))
+
+    gaps = [_gap(weights, mask) for mask in ranked]
+    assert len(ranked) == len(set(ranked)) == comb(10, 5)
+    assert gaps == sorted(gaps)
+    assert all(mask.bit_count() == 5 for mask in ranked)
+    best = min(_gap(weights, sum(1 << i for i in team)) for team in combinations(range(10), 5))
+    assert _gap(weights, find_balanced_split(weights, 5, rng=random.Random(2))) == best == gaps[0]
+
+
+def test_groups_are_split_evenly_between_the_teams():
+    weights = [5, 5, 5, 1, 1, 1, 3, 3]
+    # The three heavy players can't all be on one team; the pair must be split
+    groups = [[0, 1, 2], [6, 7]]
+
+    ranked = rank_splits(weights, 4, groups, random.Random(3))
+    best = find_balanced_split(weights, 4, groups, random.Random(4))
+
+    for mask in [best, *ranked]:
+        assert (mask & 0b111).bit_count() in (1, 2)
+        assert (mask >> 6 & 1) != (mask >> 7 & 1)
+    assert _gap(weights, best) == _gap(weights, ranked[0])
+
+
+def test_unsatisfiable_groups_are_ignored():
+    # Three players who must all be on different teams of a 2v2
+    weights = [1, 2, 3, 4]
+    groups = [[0, 1], [0, 2], [1, 2]]
+
+    ranked = rank_splits(weights, 2, groups, random.Random(5))
+
+    assert len(ranked) == comb(4, 2)
+    assert _gap(weights, find_balanced_split(weights, 2, groups, random.Random(6))) == 0
+
+
+def test_players_without_a_weight_count_as_the_average():
+    weights = {"joão": 4.0, "maria": 2.0}
+
+    assert resolve_weights(["João", "Pedro", "Maria"], weights) == [4.0, 3.0, 2.0]
+    assert resolve_weights(["Ana", "Bia"], {}) == [1.0, 1.0]
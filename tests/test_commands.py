@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeMessage
+from bot import commands
+from bot.commands import AcceptButton, MixButtonState, MixView
+from bot.mixstore import mix_views
+
+
+@pytest.mark.parametrize("restarted", [False, True])
+def test_accept_records_the_teams_shown_even_with_commas_in_names(restarted):
+    users = ["Silva, João", "Ana", "Bia, a Brava", "Caio"]
+
+    async def run():
+        view = await MixView.build(users)
+        message = FakeMessage(view.next_message(), guild=FakeGuild())
+        mix_views.put(message.id, view)
+        if restarted:
+            mix_views.pop(message.id)
+        state = MixButtonState(view.key, *view.splits.state(), view.shown)
+        await AcceptButton(state).callback(FakeInteraction(message))
+        return view.teams, message
+
+    teams, message = asyncio.run(run())
+
+    assert sorted(teams[0] + teams[1]) == sorted(users)
+    assert commands.last_accepted[message.channel.id] == (message.id, teams)
+    assert message.edits == [{"view": None}]
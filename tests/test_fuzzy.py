@@ -0,0 +1,58 @@
+import asyncio
+
+from benchmarks.fakes import FakeGuild, FakeMember
+from bot.fuzzy import FuzzyNameResolver, TrigramIndex
+
+
+class BrokenGuild(FakeGuild):
+    """Guild whose member list can't be read the first `failures` times."""
+
+    failures = 1
+
+    @property
+    def members(self):
+        if self.failures:
+            self.failures -= 1
+            return [None]
+        return super().members
+
+
+def test_accents_prefixes_and_typos_resolve():
+    index = TrigramIndex(enumerate(["João", "Maria", "Pedro", "Gabriel", "Beatriz"]))
+
+    assert index.resolve("joao") == "João"
+    assert index.resolve("pedr") == "Pedro"
+    assert index.resolve("mariq") == "Maria"
+    assert index.resolve("beatrix") == "Beatriz"
+    assert index.resolve("Desconhecido") is None
+
+
+def test_members_sharing_a_display_name_count_as_one():
+    index = TrigramIndex(enumerate(["João", "João", "Joãozinho", "Ana123", "Ana123", "Ana", "ANA"]))
+
+    assert index.resolve("joao") == "João"
+    assert index.resolve("ana12") == "Ana123"
+    # Different display names folding to the same text stay ambiguous
+    assert index.resolve("ana") is None
+
+    index.remove(5)
+    assert index.resolve("ana") == "ANA"
+    index.add(0, "Joana")
+    assert index.resolve("joao") == "João"
+    index.remove(1)
+    assert index.resolve("joao") == "Joãozinho"
+
+
+def test_failed_build_is_retried_and_names_stay_as_typed_meanwhile():
+    async def run():
+        resolver = FuzzyNameResolver(enabled=True)
+        guild = BrokenGuild([FakeMember("João"), FakeMember("Maria")])
+        first = await resolver.resolver(guild)
+        second = await resolver.resolver(guild)
+        return first, second, resolver
+
+    first, second, resolver = asyncio.run(run())
+
+    assert first is None
+    assert second("joao") == "João"
+    assert resolver._builds == {} and resolver._backlog == {}
@@ -0,0 +1,41 @@
+import asyncio
+
+from bot.history import PairMatrix, TeammateHistory, least_repeated
+
+
+def test_accepted_match_updates_the_cached_matrix(tmp_path):
+    history = TeammateHistory(str(tmp_path / "history.sqlite3"))
+
+    async def run():
+        matrix = await history.load_matrix(1)
+        assert await history.add_match(1, (["Ana", "Bia"], ["Caio", "Duda"]), mix_id=10)
+        # Same mix accepted twice (e.g. two clicks): counted once
+        assert not await history.add_match(1, (["Ana", "Bia"], ["Caio", "Duda"]), mix_id=10)
+        return matrix, await history.load_matrix(1), await history.load_accepted_teams(10)
+
+    matrix, again, teams = asyncio.run(run())
+
+    assert again is matrix
+    assert matrix.counts == {("ana", "bia"): 1, ("caio", "duda"): 1}
+    assert teams == (["Ana", "Bia"], ["Caio", "Duda"])
+
+
+def test_matrix_loaded_later_reads_the_store(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    TeammateHistory(path).record_many(1, [(["Ana", "Bia", "Caio"], ["Duda", "Edu"])] * 2)
+
+    matrix = asyncio.run(TeammateHistory(path).load_matrix(1))
+
+    assert matrix.team_penalty(["ana", "BIA", "caio"]) == 6
+    assert matrix.split_penalty(["Ana", "Duda"], ["Bia", "Edu"]) == 0
+
+
+def test_least_repeated_prefers_new_teammates():
+    matrix = PairMatrix({("ana", "bia"): 3, ("caio", "duda"): 1})
+    candidates = [
+        (["Ana", "Bia"], ["Caio", "Duda"], []),
+        (["Ana", "Caio"], ["Bia", "Duda"], []),
+        (["Ana", "Duda"], ["Bia", "Caio"], []),
+    ]
+
+    assert least_repeated(candidates, matrix) == candidates[1]
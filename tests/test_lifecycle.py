@@ -0,0 +1,21 @@
+import asyncio
+
+from bot import lifecycle
+
+
+def test_a_failing_closer_does_not_stop_the_others(monkeypatch):
+    closed = []
+
+    async def broken():
+        raise OSError("disk full")
+
+    async def working():
+        closed.append("reports")
+
+    monkeypatch.setattr(lifecycle, "_closers", [])
+    lifecycle.on_close("ratings", broken)
+    lifecycle.on_close("reports", working)
+
+    asyncio.run(lifecycle.run_closers())
+
+    assert closed == ["reports"]
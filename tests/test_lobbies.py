@@ -0,0 +1,68 @@
+import asyncio
+
+import discord
+
+from benchmarks.fakes import FakeMember, FakeVoiceChannel, make_voice_guild
+from bot.lobbies import VoiceMover
+
+
+class RateLimitedMember(FakeMember):
+    """Member whose first move fails with discord.py's long rate limit error."""
+
+    async def move_to(self, channel):
+        if not getattr(self, "limited", False):
+            self.limited = True
+            raise discord.RateLimited(0.01)
+        await super().move_to(channel)
+
+
+class BrokenMember(FakeMember):
+    async def move_to(self, channel):
+        raise RuntimeError("boom")
+
+
+def _mover(**options) -> VoiceMover:
+    return VoiceMover(**{"concurrency": 3, "base_delay": 0.001, "max_delay": 0.01, **options})
+
+
+def test_moves_are_retried_after_429s():
+    guild = make_voice_guild([8], bot_ratio=0, move_rate_limit=3, move_window=0.05)
+    members = list(guild.voice_channels[0].members)
+    target = FakeVoiceChannel(guild=guild)
+
+    report = asyncio.run(_mover().move_all([(member, target) for member in members]))
+
+    assert report.moved == 8 and report.failed == []
+    assert guild.rate_limited_moves > 0
+    assert report.retries >= guild.rate_limited_moves
+    assert sorted(m.id for m in target.members) == sorted(m.id for m in members)
+
+
+def test_moves_still_limited_after_the_last_retry_fail():
+    guild = make_voice_guild([5], bot_ratio=0, move_rate_limit=2, move_window=10.0)
+    members = list(guild.voice_channels[0].members)
+    target = FakeVoiceChannel(guild=guild)
+
+    # Retry right away: the window is still full when the retries run
+    mover = _mover(max_retries=1, sleep=lambda delay: asyncio.sleep(0))
+    report = asyncio.run(mover.move_all([(member, target) for member in members]))
+
+    assert report.moved == 2
+    assert len(report.failed) == 3
+    assert report.retries == 3
+    assert {m.display_name for m in target.members}.isdisjoint(report.failed)
+
+
+def test_rate_limited_errors_are_retried_and_other_errors_reported():
+    guild = make_voice_guild([2], bot_ratio=0)
+    target = FakeVoiceChannel(guild=guild)
+    limited = RateLimitedMember("Limitado", guild=guild)
+    broken = BrokenMember("Quebrado", guild=guild)
+    moves = [(member, target) for member in (*guild.voice_channels[0].members, limited, broken)]
+
+    report = asyncio.run(_mover().move_all(moves))
+
+    assert report.moved == 3
+    assert report.failed == ["Quebrado"]
+    assert report.retries == 1
+    assert limited in target.members
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from bot.mixstore import MixRoster, MixStore, MixViewCache
+
+ROSTER = MixRoster(["Ana", "Bia", "Caio", "Duda"], [["Ana", "Bia"]], {"ana": 2.0})
+
+
+def test_roster_round_trip(tmp_path):
+    store = MixStore(str(tmp_path / "mixes.sqlite3"))
+
+    async def run():
+        key = await store.store(ROSTER)
+        return key, await store.load(key), await store.load("0" * 16)
+
+    key, loaded, missing = asyncio.run(run())
+
+    assert key == store.put(MixRoster(*ROSTER))
+    assert loaded == ROSTER
+    assert missing is None
+
+
+def test_sweep_deletes_rosters_past_the_retention(tmp_path):
+    store = MixStore(str(tmp_path / "mixes.sqlite3"), retention=60.0)
+    old = store.put(ROSTER)
+    fresh = store.put(MixRoster(["Edu", "Fabi"], None, None))
+
+    assert store.sweep(time.time() + 30) == 0
+    store._connect().execute("UPDATE mixes SET created_at = created_at - 90")
+    # Posted again: its buttons are kept alive for another retention period
+    store.put(MixRoster(["Edu", "Fabi"], None, None))
+
+    assert store.sweep() == 1
+    assert store.get(old) is None
+    assert store.get(fresh) is not None
+
+
+def test_view_cache_evicts_the_least_recently_used():
+    cache = MixViewCache(max_size=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    cache.get(1)
+    cache.put(3, "c")
+
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == ("a", "c")
+    assert cache.evictions == 1
@@ -0,0 +1,57 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from bot.ratings import MatchResult, RatingBook, RatingStore
+
+
+class FlakyStore(RatingStore):
+    """Store whose first write fails, like a locked database."""
+
+    failures = 1
+
+    def write(self, ratings, results):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        super().write(ratings, results)
+
+
+def test_a_mix_is_scored_only_once_also_after_a_restart(tmp_path):
+    path = str(tmp_path / "ratings.sqlite3")
+
+    async def run():
+        book = RatingBook(RatingStore(path), flush_interval=3600)
+        claims = [await book.claim(1), await book.claim(1)]
+        await book.record(1, [MatchResult(["Ana"], ["Bia"], mix_id=1)])
+        await book.close()
+
+        restarted = RatingBook(RatingStore(path), flush_interval=3600)
+        return claims, await restarted.claim(1), await restarted.claim(2)
+
+    claims, after_restart, other_mix = asyncio.run(run())
+
+    assert claims == [True, False]
+    assert after_restart is False
+    assert other_mix is True
+
+
+def test_a_failed_flush_keeps_the_batch_pending(tmp_path):
+    store = FlakyStore(str(tmp_path / "ratings.sqlite3"))
+
+    async def run():
+        book = RatingBook(store, flush_interval=3600)
+        first = await book.record(1, [MatchResult(["Ana"], ["Bia"], mix_id=1)])
+        with pytest.raises(sqlite3.OperationalError):
+            await book.flush()
+        second = await book.record(1, [MatchResult(["Ana"], ["Caio"], mix_id=2)])
+        await book.close()
+        return book, first, second
+
+    book, first, second = asyncio.run(run())
+
+    assert first["ana"] < second["ana"]
+    assert book.flushes == 1
+    assert store.load(1) == {"ana": [second["ana"], 2], "bia": [first["bia"], 1], "caio": [second["caio"], 1]}
+    assert store.is_scored(1) and store.is_scored(2)
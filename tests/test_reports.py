@@ -0,0 +1,64 @@
+import asyncio
+
+from benchmarks.fakes import FakeTextChannel
+from bot.constants import MESSAGE_CHAR_LIMIT
+from bot.reports import Report, ReportLog, ReportQueue
+
+
+def _report(target: str, reporter_id: int = 1, at: float = 0.0, guild_id: int = 1) -> Report:
+    return Report(guild_id, 2, reporter_id, f"Reporter {reporter_id}", target,
+                  "https://discord.com/channels/1/2/3", at)
+
+
+def _queue(tmp_path, **options) -> ReportQueue:
+    return ReportQueue(ReportLog(str(tmp_path / "reports.jsonl")), flush_interval=0.0, **options)
+
+
+def test_repeated_reports_are_dropped_within_the_window(tmp_path):
+    queue = _queue(tmp_path, dedupe_window=60.0)
+
+    async def run():
+        accepted = [
+            queue.submit(_report("Fulano", at=0.0)),
+            queue.submit(_report("FULANO", at=30.0)),
+            queue.submit(_report("Fulano", reporter_id=2, at=30.0)),
+            queue.submit(_report("Fulano", guild_id=3, at=30.0)),
+            queue.submit(_report("fulano", at=61.0)),
+        ]
+        await queue.close()
+        return accepted
+
+    accepted = asyncio.run(run())
+
+    assert accepted == [True, False, True, True, True]
+    assert queue.written == 4
+    assert len(list(queue.log.read())) == 4
+
+
+def test_digest_is_paginated_under_the_message_limit(tmp_path):
+    queue = _queue(tmp_path, digest_interval=3600.0)
+    channel = FakeTextChannel()
+    targets = [f"Jogador com um nome bem comprido {i}" for i in range(200)]
+
+    async def resolve_channel():
+        return channel
+
+    async def run():
+        queue.start_digests(resolve_channel)
+        for i, target in enumerate(targets):
+            for reporter_id in range(1 + i % 3):
+                queue.submit(_report(target, reporter_id=reporter_id))
+        reported = await queue.send_digest()
+        await queue.close()
+        return reported
+
+    reported = asyncio.run(run())
+
+    pages = [sent["content"] for sent in channel.sent]
+    assert reported == len(targets)
+    assert len(pages) > 1
+    assert all(len(page) <= MESSAGE_CHAR_LIMIT for page in pages)
+    text = "\n".join(pages)
+    assert all(text.count(f"**{target}**") == 1 for target in targets)
+    # Most reported players first
+    assert text.index("3 reporte(s) por") < text.index("1 reporte(s) por")
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeMessage, FakeTextChannel
+from bot.commands import router as bot_router
+from bot.router import CommandRouter
+
+
+def _router(channels=None):
+    calls = []
+    router = CommandRouter("!")
+
+    async def mix(message, args):
+        calls.append(("mix", args))
+
+    async def help_(message, args):
+        calls.append(("help", args))
+
+    router.register("!mix", mix, aliases=("!sortear",), glued_args=True)
+    router.register("!help", help_, aliases=("!ajuda",), channels=channels)
+    return router, calls
+
+
+def test_aliases_route_to_the_same_handler_with_the_arguments():
+    router, calls = _router()
+
+    for content in ("!mix Ana Bia", "!SORTEAR Ana Bia", "!mix(Ana, Bia)", "!ajuda"):
+        assert asyncio.run(router.dispatch(FakeMessage(content)))
+
+    assert calls == [("mix", " Ana Bia"), ("mix", " Ana Bia"), ("mix", "(Ana, Bia)"), ("help", "")]
+
+
+def test_arguments_glued_to_the_name_only_route_commands_accepting_them():
+    router, calls = _router()
+
+    assert router.resolve("!mix4x5 Ana Bia")[1] == "4x5 Ana Bia"
+    assert router.resolve("!mixJoão Maria")[1] == "João Maria"
+    assert router.resolve("!sortearAna")[1] == "Ana"
+    assert router.resolve("!helpme") is None
+
+
+@pytest.mark.parametrize("content", ["", "mix Ana", "?mix", "!", "!mi", "! mix", "!unknown Ana"])
+def test_non_commands_are_rejected(content):
+    router, calls = _router()
+
+    assert router.resolve(content) is None
+    assert not asyncio.run(router.dispatch(FakeMessage(content)))
+
+
+def test_commands_only_run_in_their_allowed_channels():
+    allowed = FakeTextChannel()
+    router, calls = _router(channels=[allowed.id])
+
+    assert asyncio.run(router.dispatch(FakeMessage("!help", channel=allowed)))
+    assert not asyncio.run(router.dispatch(FakeMessage("!help")))
+    # Commands without a channel list run everywhere
+    assert asyncio.run(router.dispatch(FakeMessage("!mix Ana")))
+    assert calls == [("help", ""), ("mix", " Ana")]
+
+
+def test_bot_routes_glued_mix_and_report_arguments():
+    assert bot_router.resolve("!mix4x5 Ana")[0].name == "!mix"
+    assert bot_router.resolve("!reportarFulano")[1] == "Fulano"
+    assert bot_router.resolve("!resultadoA") is None
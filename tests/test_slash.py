@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeMember, FakeMessage
+from bot import commands
+from bot.reports import ReportLog, ReportQueue
+from bot.slash import mix_slash_command, report_slash_command
+
+
+@pytest.fixture
+def reports(tmp_path, monkeypatch):
+    queue = ReportQueue(ReportLog(str(tmp_path / "reports.jsonl")), flush_interval=0.0)
+    monkeypatch.setattr(commands, "report_queue", queue)
+    return queue
+
+
+def _interaction(*members: FakeMember) -> FakeInteraction:
+    return FakeInteraction(FakeMessage("", guild=FakeGuild(list(members))))
+
+
+def test_mix_parses_the_roster_like_the_text_command():
+    member = FakeMember("Zé Maria")
+    interaction = _interaction(member)
+
+    asyncio.run(mix_slash_command.callback(
+        interaction, f"João Silva:3, joão silva, (Ana-Paula, Bia), Bia, <@{member.id}>, Caio"))
+
+    content = interaction.sent[0]["content"]
+    for name in ("João Silva", "Ana-Paula", "Bia", "Zé Maria", "Caio"):
+        assert content.count(name) == 1
+    team_a, team_b = content.split("# Time B")
+    assert ("Ana-Paula" in team_a) != ("Bia" in team_a)
+    # Only weighted rosters show the team weight
+    assert "⚖️" in content
+
+
+def test_report_rejects_an_empty_list(reports):
+    interaction = _interaction()
+
+    asyncio.run(report_slash_command.callback(interaction, " , "))
+
+    assert interaction.sent[0]["ephemeral"] is True
+    assert reports.pending() == 0
+
+
+def test_report_submits_every_player_when_the_response_has_no_resource(reports):
+    member = FakeMember("Zé Maria")
+    interaction = _interaction(member)
+
+    async def run():
+        # The fake send_message returns None, like discord.py < 2.5
+        await report_slash_command.callback(interaction, f"Fulano, fulano, <@{member.id}>")
+        await reports.close()
+
+    asyncio.run(run())
+
+    assert [report.target for report in reports.log.read()] == ["Fulano", "Zé Maria"]
+    assert {report.message_url for report in reports.log.read()} == {interaction.channel.jump_url}
@@ -0,0 +1,101 @@
+from itertools import combinations
+from math import comb
+
+from bot.splits import SplitStream
+
+
+def _drain(stream: SplitStream):
+    splits = []
+    while (split := stream.next()) is not None:
+        splits.append(split)
+    return splits
+
+
+def _key(split):
+    return frozenset((frozenset(split.team_a), frozenset(split.team_b))), frozenset(split.waitlist)
+
+
+def test_every_split_is_handed_out_once():
+    users = [f"P{i}" for i in range(8)]
+    stream = SplitStream(users, seed=1)
+
+    splits = _drain(stream)
+
+    # Mirrored teams count once
+    assert len(splits) == stream.total == comb(7, 3)
+    assert len({_key(split) for split in splits}) == len(splits)
+    assert all(len(split.team_a) == len(split.team_b) == 4 for split in splits)
+    assert stream.exhausted
+
+
+def test_waitlist_splits_are_unique():
+    users = [f"P{i}" for i in range(11)]
+    stream = SplitStream(users, seed=2)
+
+    splits = _drain(stream)
+
+    assert len(splits) == stream.total == 11 * comb(9, 4)
+    assert len({_key(split) for split in splits}) == len(splits)
+    assert all(len(split.waitlist) == 1 for split in splits)
+
+
+def test_restored_stream_continues_the_sequence():
+    users = [f"P{i}" for i in range(10)]
+    stream = SplitStream(users, seed=3)
+    for _ in range(5):
+        stream.next()
+
+    restored = SplitStream(users, seed=stream.state()[0], cursor=stream.state()[1], produced=stream.state()[2])
+
+    assert [_key(restored.next()) for _ in range(5)] == [_key(stream.next()) for _ in range(5)]
+    assert restored.produced == stream.produced == 10
+
+
+def test_seek_hands_out_the_same_splits_again():
+    stream = SplitStream([f"P{i}" for i in range(10)], seed=4)
+    _, cursor, produced = stream.state()
+    first = [_key(stream.next()) for _ in range(3)]
+
+    stream.seek(cursor, produced)
+
+    assert [_key(stream.next()) for _ in range(3)] == first
+    assert stream.produced == 3
+
+
+def test_groups_are_kept_apart():
+    users = ["Ana", "Bia", "Caio", "Duda", "Edu", "Fabi"]
+    stream = SplitStream(users, groups=[["ana", "bia"]], seed=5)
+
+    splits = _drain(stream)
+
+    assert splits
+    for split in splits:
+        assert ("Ana" in split.team_a) != ("Bia" in split.team_a)
+
+
+def test_unsatisfiable_groups_are_dropped():
+    # Three players who must all be on different teams of a 2v2
+    users = ["Ana", "Bia", "Caio", "Duda"]
+    stream = SplitStream(users, groups=[["Ana", "Bia"], ["Ana", "Caio"], ["Bia", "Caio"]], seed=6)
+
+    splits = _drain(stream)
+
+    assert stream.groups is None
+    assert len(splits) == stream.total == 3
+
+
+def test_weighted_stream_starts_with_the_most_balanced_split():
+    users = [f"P{i}" for i in range(8)]
+    weights = {f"p{i}": float(w) for i, w in enumerate([1, 2, 3, 5, 8, 13, 21, 34])}
+    stream = SplitStream(users, weights=weights, seed=7)
+
+    first = stream.next()
+    rest = _drain(stream)
+
+    def gap(team_a):
+        return abs(2 * sum(weights[p.lower()] for p in team_a) - sum(weights.values()))
+
+    best = min(gap(team) for team in combinations(users, 4))
+    assert gap(first.team_a) == best
+    assert len(rest) + 1 == stream.total
+    assert len({_key(split) for split in [first, *rest]}) == stream.total
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from bot.teams import TeamLayout, assign_teams, create_multi_team_messages, paginate, parse_team_layout
+
+
+def _players(count):
+    return [f"P{i}" for i in range(count)]
+
+
+@pytest.mark.parametrize("text, layout, rest", [
+    ("4x5 Ana Bia", TeamLayout(4, 5), " Ana Bia"),
+    (" 3 × 2", TeamLayout(3, 2), ""),
+    ("1x5 Ana", None, "1x5 Ana"),
+    ("4x5Ana", None, "4x5Ana"),
+    ("Ana 4x5", None, "Ana 4x5"),
+])
+def test_layout_is_split_off_the_arguments(text, layout, rest):
+    assert parse_team_layout(text) == (layout, rest)
+
+
+@pytest.mark.parametrize("count", [7, 10, 12, 15])
+def test_uneven_rosters_fill_teams_evenly_and_wait_the_rest(count):
+    layout = TeamLayout(4, 3)
+
+    teams, waitlist = assign_teams(_players(count), layout, rng=random.Random(count))
+
+    sizes = [len(team) for team in teams]
+    assert max(sizes) <= 3 and max(sizes) - min(sizes) <= 1
+    assert len(waitlist) == max(0, count - layout.slots)
+    assert sorted(sum(teams, waitlist)) == sorted(_players(count))
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_groups_are_spread_over_the_teams(weighted):
+    players = _players(12)
+    groups = [["P0", "P1", "P2", "P3"], ["p4", "p5"]]
+    weights = {name.lower(): float(i % 5 + 1) for i, name in enumerate(players)} if weighted else None
+
+    for seed in range(20):
+        teams, _ = assign_teams(players, TeamLayout(4, 3), groups, weights, random.Random(seed))
+        for group in groups:
+            members = {name.lower() for name in group}
+            assert all(len(members & {name.lower() for name in team}) <= 1 for team in teams)
+
+
+def test_weighted_teams_are_balanced():
+    players = _players(8)
+    weights = {p.lower(): w for p, w in zip(players, [8, 7, 6, 5, 4, 3, 2, 1])}
+
+    teams, _ = assign_teams(players, TeamLayout(4, 2), weights=weights, rng=random.Random(1))
+
+    assert sorted(sum(weights[p.lower()] for p in team) for team in teams) == [9, 9, 9, 9]
+
+
+def test_pages_stay_under_the_limit_without_splitting_blocks():
+    blocks = [f"# Time {i}\n " + ", ".join(_players(10)) for i in range(20)]
+
+    pages = paginate(blocks, limit=200)
+
+    assert all(len(page) <= 200 for page in pages)
+    assert "\n\n".join(pages) == "\n\n".join(blocks)
+    assert len(create_multi_team_messages(_players(500), TeamLayout(50, 10))) > 1
+
+
+def test_a_block_longer_than_the_limit_is_cut_at_a_comma():
+    block = ", ".join(_players(100))
+
+    pages = paginate(["# Time A", block], limit=100)
+
+    assert all(len(page) <= 100 for page in pages)
+    assert all(page.endswith(",") for page in pages[1:-1])
+    assert ", ".join(page.rstrip(",") for page in pages[1:]) == block
@@ -0,0 +1,91 @@
+import asyncio
+
+from benchmarks.fakes import FakeInteraction, FakeMessage, FakeTextChannel
+from bot.throttle import EditScheduler, TokenBucket
+
+
+class SlowEditInteraction(FakeInteraction):
+    """Interaction whose message edit takes a while, like a real REST call."""
+
+    delay = 0.05
+
+    async def edit_original_response(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        await super().edit_original_response(**kwargs)
+
+
+def _render(content: str):
+    return lambda: (content, None)
+
+
+def test_token_bucket_waits_once_the_burst_is_spent():
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0])
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.5
+    now[0] = 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_clicks_on_a_message_are_merged_into_one_edit():
+    async def run():
+        scheduler = EditScheduler(window=0.02, rate=100.0, burst=10.0)
+        message = FakeMessage("mix")
+        for i in range(3):
+            await scheduler.submit(FakeInteraction(message), _render(f"split {i}"))
+        assert await scheduler.drain(1.0)
+        return scheduler, message
+
+    scheduler, message = asyncio.run(run())
+
+    assert message.edits == [{"content": "split 2", "view": None}]
+    assert (scheduler.clicks, scheduler.merged_clicks, scheduler.edits) == (3, 2, 1)
+
+
+def test_edits_are_throttled_per_channel():
+    async def run():
+        scheduler = EditScheduler(window=0.0, rate=50.0, burst=1.0)
+        channel = FakeTextChannel()
+        other = FakeTextChannel()
+        for target in (channel, channel, other):
+            await scheduler.submit(FakeInteraction(FakeMessage("mix", channel=target)), _render("split"))
+        assert await scheduler.drain(1.0)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+
+    assert scheduler.edits == 3
+    assert scheduler.throttled_edits == 1
+
+
+def test_cancel_drops_a_pending_edit():
+    async def run():
+        scheduler = EditScheduler(window=0.05)
+        message = FakeMessage("mix")
+        await scheduler.submit(FakeInteraction(message), _render("split"))
+        content = await scheduler.cancel(message.id)
+        await scheduler.drain(1.0)
+        return content, message
+
+    content, message = asyncio.run(run())
+
+    assert content is None
+    assert message.edits == []
+
+
+def test_cancel_waits_for_an_edit_being_sent():
+    async def run():
+        scheduler = EditScheduler(window=0.0)
+        message = FakeMessage("mix")
+        await scheduler.submit(SlowEditInteraction(message), _render("split 1"))
+        # Let the edit start: it can no longer be called back
+        await asyncio.sleep(SlowEditInteraction.delay / 2)
+        content = await scheduler.cancel(message.id)
+        return content, message
+
+    content, message = asyncio.run(run())
+
+    assert content == "split 1"
+    assert message.content == "split 1"
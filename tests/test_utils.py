@@ -0,0 +1,40 @@
+from bot.utils import format_team_message, parse_roster, parse_team_message
+
+
+def test_roster_separators_can_be_mixed():
+    roster = parse_roster("Ana, Bia; Caio - Duda\nEdu  Fabi", None)
+
+    assert roster.players == ["Ana", "Bia", "Caio", "Duda", "Edu", "Fabi"]
+
+
+def test_nested_groups_are_flattened_and_unbalanced_brackets_ignored():
+    assert parse_roster("(Ana [Bia Caio]) Duda", None).groups == [["Ana", "Bia", "Caio"]]
+    assert parse_roster("{Ana, (Bia)} Caio", None).groups == [["Ana", "Bia"]]
+    # An unclosed group keeps its players, without separating them
+    assert parse_roster("(Ana Bia Caio Duda", None) == (["Ana", "Bia", "Caio", "Duda"], [], {})
+    assert parse_roster("Ana) Bia (Caio", None) == (["Ana", "Bia", "Caio"], [], {})
+
+
+def test_weights_are_read_inside_and_outside_groups():
+    roster = parse_roster("(João:3 Maria:1) Pedro:2.5 Ana", None)
+
+    assert roster.players == ["João", "Maria", "Pedro", "Ana"]
+    assert roster.groups == [["João", "Maria"]]
+    assert roster.weights == {"joão": 3.0, "maria": 1.0, "pedro": 2.5}
+
+
+def test_duplicates_differing_only_in_case_are_dropped():
+    roster = parse_roster("Ana ana ANA:2 Bia (ana Caio)", None)
+
+    assert roster.players == ["Ana", "Bia", "Caio"]
+    assert roster.groups == [["ana", "Caio"]]
+
+
+def test_team_message_is_read_back_with_the_roster_names():
+    users = ["Silva, João", "Ana", "Bia", "Caio", "Duda"]
+    content = format_team_message(["Silva, João", "Ana"], ["Bia", "Caio"], ["Duda"], weights={"ana": 2.0})
+
+    assert parse_team_message(content, users) == (["Silva, João", "Ana"], ["Bia", "Caio"])
+    # Names that are not in the roster can't be told apart
+    assert parse_team_message(content, ["Ana", "Bia", "Caio", "Duda"]) is None
+    assert parse_team_message("🔁 Sorteio cancelado", users) is None
@@ -0,0 +1,71 @@
+from benchmarks.fakes import FakeMember, FakeVoiceState, make_voice_guild
+from bot.voice import VoiceRosterIndex
+
+
+def _move(index: VoiceRosterIndex, member: FakeMember, channel):
+    """Move a member in the fake guild and send the index the matching update."""
+    before = FakeVoiceState(member.voice.channel if member.voice else None)
+    if before.channel is not None:
+        before.channel.members.remove(member)
+    if channel is not None:
+        channel.members.append(member)
+    member.voice = FakeVoiceState(channel)
+    index.on_voice_state_update(member, before, member.voice)
+
+
+def test_seeded_index_matches_a_scan_without_bots():
+    guild = make_voice_guild([5, 3], bot_ratio=0.4)
+    index = VoiceRosterIndex()
+
+    index.seed_guild(guild)
+
+    assert index.mismatches(guild) == {}
+    first = guild.voice_channels[0]
+    assert index.names(first.id) == [m.display_name for m in first.members if not m.bot]
+
+
+def test_index_follows_joins_moves_and_leaves():
+    guild = make_voice_guild([4, 2, 0], bot_ratio=0)
+    index = VoiceRosterIndex()
+    index.seed_guild(guild)
+    first, second, third = guild.voice_channels
+
+    _move(index, first.members[0], second)
+    _move(index, first.members[0], None)
+    newcomer = FakeMember("Novato", guild=guild)
+    _move(index, newcomer, third)
+
+    assert index.mismatches(guild) == {}
+    assert index.names(third.id) == ["Novato"]
+    assert index.names_in([first.id, third.id]) == [m.display_name for m in first.members] + ["Novato"]
+
+
+def test_index_follows_display_name_changes():
+    guild = make_voice_guild([2], bot_ratio=0)
+    index = VoiceRosterIndex()
+    index.seed_guild(guild)
+    member = guild.voice_channels[0].members[0]
+
+    before = FakeMember(member.display_name, member_id=member.id, guild=guild)
+    member.display_name = "Apelido"
+    index.on_member_update(before, member)
+
+    assert index.mismatches(guild) == {}
+    assert "Apelido" in index.names(guild.voice_channels[0].id)
+
+
+def test_missed_update_is_reported_as_a_mismatch():
+    guild = make_voice_guild([3, 0], bot_ratio=0)
+    index = VoiceRosterIndex()
+    index.seed_guild(guild)
+    first, second = guild.voice_channels
+    member = first.members.pop()
+    second.members.append(member)
+
+    differences = index.mismatches(guild)
+
+    assert set(differences) == {first.id, second.id}
+    assert differences[second.id] == ([], [member.display_name])
+
+    index.seed_guild(guild)
+    assert index.mismatches(guild) == {}